@@ -1,6 +1,6 @@
 {
     'name': 'Stone Workshop',
-    'version': '19.0.17.5.0',
+    'version': '19.0.17.19.0',
     'category': 'Manufacturing',
     'summary': 'Taller de piedra en 3 pasos; panel con cola priorizada y bitácora declarativa',
     'description': '''
@@ -32,6 +32,7 @@ Soporta:
         'stock',
         'product',
         'mail',
+        'bus',
         'web',
         'stock_lot_dimensions',
         'inventory_visual_enhanced',
@@ -49,7 +50,11 @@ Soporta:
         'views/res_config_settings_views.xml',
         'views/workshop_tablet_operator_views.xml',
         'views/workshop_menus.xml',
+        'views/workshop_kpi_daily_views.xml',
+        'views/workshop_workcenter_views.xml',
+        'views/workshop_estimate_views.xml',
         'views/workshop_process_recipe_views.xml',
+        'views/workshop_job_views.xml',
         'wizard/workshop_ticket_wizard_views.xml',
         'reports/workshop_pick_report.xml',
         'reports/workshop_ticket_report.xml',
@@ -65,6 +70,7 @@ Soporta:
             'stone_workshop/static/src/scss/workshop_lot_selector.scss',
             'stone_workshop/static/src/components/workshop_ticket_selector/workshop_ticket_selector.scss',
             'stone_workshop/static/src/components/workshop_progress_lot_selector/workshop_progress_lot_selector.scss',
+            'stone_workshop/static/src/components/workshop_job_progress/workshop_job_progress.scss',
             'stone_workshop/static/src/components/workshop_lot_selector/workshop_lot_selector.xml',
             'stone_workshop/static/src/components/workshop_lot_selector/workshop_lot_selector.js',
             'stone_workshop/static/src/components/reclassification_lot_selector/reclassification_lot_selector.xml',
@@ -75,6 +81,8 @@ Soporta:
             'stone_workshop/static/src/components/workshop_ticket_selector/workshop_ticket_selector.js',
             'stone_workshop/static/src/components/workshop_progress_lot_selector/workshop_progress_lot_selector.xml',
             'stone_workshop/static/src/components/workshop_progress_lot_selector/workshop_progress_lot_selector.js',
+            'stone_workshop/static/src/components/workshop_job_progress/workshop_job_progress.xml',
+            'stone_workshop/static/src/components/workshop_job_progress/workshop_job_progress.js',
             'stone_workshop/static/src/js/workshop_dashboard_loader.js',
         ],
         # Panel de taller: carga perezosa al abrir la acción.
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""Borra el sello de la corrida perezosa del auto-park.
+
+Hasta 19.0.17.18.0 la carga del panel sellaba su última corrida en
+`ir.config_parameter`; ahora el sello vive en memoria de cada proceso y el
+parámetro queda huérfano.
+"""
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute(
+        "DELETE FROM ir_config_parameter WHERE key = %s",
+        ('stone_workshop.auto_park_last_run',),
+    )
@@ -4,10 +4,18 @@ from . import workshop_process
 from . import workshop_process_recipe
 from . import workshop_order
 from . import workshop_order_tablet
+from . import workshop_board
+from . import workshop_kpi_daily
+from . import workshop_workcenter
+from . import workshop_schedule
+from . import workshop_estimate
 from . import workshop_tablet_operator
+from . import workshop_tablet_command
 from . import stock_quant
 from . import workshop_ticket
+from . import workshop_report
 from . import res_config_settings
 from . import stock_lot
 from . import stock_lot_reclassification
 from . import stock_lot_writeoff
+from . import workshop_job
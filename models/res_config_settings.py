@@ -12,3 +12,26 @@ class ResConfigSettings(models.TransientModel):
              '"próximo espacio en taller": próximo_espacio = trabajo pendiente ÷ esta capacidad. '
              'Si hay varias máquinas en paralelo, súmalas (ej. 2 máquinas = 16).',
     )
+    workshop_holidays = fields.Char(
+        string='Feriados del taller',
+        config_parameter='stone_workshop.holidays',
+        help='Fechas no laborables además de los domingos, en formato AAAA-MM-DD '
+             'separadas por coma (ej. 2026-01-01, 2026-12-25). Se usan para '
+             'proyectar el próximo espacio y las fechas de cada orden.',
+    )
+    workshop_learned_estimates = fields.Boolean(
+        string='Estimados aprendidos',
+        config_parameter='stone_workshop.learned_estimates',
+        help='Calcula el tiempo estimado con el minuto/m² aprendido de las órdenes '
+             'terminadas (por proceso, categoría y espesor) cuando hay muestra '
+             'suficiente; si no, usa el minuto/m² del servicio.',
+    )
+
+    def set_values(self):
+        previous = bool(self.env['ir.config_parameter'].sudo().get_param(
+            'stone_workshop.learned_estimates'
+        ))
+        super().set_values()
+        if previous != bool(self.workshop_learned_estimates):
+            # Cambió el origen del estimado: se rehacen los de las órdenes activas.
+            self.env['workshop.order']._recompute_active_estimates()
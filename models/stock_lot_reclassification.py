@@ -440,6 +440,21 @@ class StockLotReclassification(models.Model):
             'context': {'default_reclassification_id': self.id},
         }
 
+    def _workshop_job_print_labels(self):
+        """Tramo del trabajo en segundo plano de etiquetas: genera el .zpl
+        con el formato del contexto y lo deja adjunto al trabajo."""
+        job = self.env['workshop.job'].browse(self.env.context.get('workshop_job_id'))
+        Wizard = self.env['stock.lot.reclassification.label.wizard']
+        label_format = self.env.context.get('workshop_label_format')
+        for rec in self:
+            vals = {'reclassification_id': rec.id}
+            if label_format:
+                vals['label_format'] = label_format
+            wizard = Wizard.create(vals)
+            attachment = wizard._create_label_attachment(job._name, job.id)
+            job.sudo().attachment_id = attachment
+        return True
+
     def action_cancel(self):
         for rec in self:
             if rec.state == 'done':
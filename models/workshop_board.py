@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""Revisión del tablero del taller y snapshots con lectura condicional.
+
+El panel web y las tabletas piden el tablero completo (cola, ejecución, KPIs y
+capacidad) una y otra vez aunque nada haya cambiado. Aquí se lleva una
+REVISIÓN global del tablero: cualquier escritura que altere lo que muestra una
+tarjeta (estado y posición de la orden, sesiones del cronómetro, entradas,
+salidas, bitácora) la avanza una vez por transacción, ya confirmada. El
+cliente manda la última revisión que conoce y recibe `unchanged` o un payload
+nuevo; el servidor guarda además un snapshot por usuario ligado a la revisión
+para que un mismo panel abierto en varias pestañas no recalcule lo mismo.
+
+La revisión se numera con una secuencia pero se publica en una tabla: el
+avance es un INSERT confirmado en su propia transacción, después del commit de
+quien escribió. Quien lee la revisión la ve con el mismo snapshot que los
+datos, así que nunca obtiene una revisión nueva con datos viejos (leer la
+secuencia en vivo sí lo permitía).
+
+Además, al confirmar una transacción que tocó el tablero se publica por el bus
+un delta compacto por compañía: tarjetas de las órdenes tocadas, las que salen
+del tablero, el orden vigente de la cola y de ejecución, fechas proyectadas,
+KPIs y capacidad. Se arma en postcommit (cursor propio, fuera de la
+transacción y los bloqueos de quien escribe) una vez por compañía, idioma y
+zona horaria, y cada usuario de taller recibe sólo los de sus compañías. Todo
+usuario de taller recibe la revisión nueva aunque no le toque ningún delta:
+así el panel detecta un hueco (un aviso perdido o desordenado) y sólo
+entonces vuelve a pedir el snapshot.
+"""
+import logging
+import time
+
+import psycopg2
+
+from odoo import SUPERUSER_ID, api, fields, models
+
+from .workshop_schedule import WORKSHOP_SCHEDULE_CACHE_TTL
+
+_logger = logging.getLogger(__name__)
+
+# Secuencia que numera las revisiones y tabla donde se publican (ver arriba).
+# De la tabla sólo importa el máximo: se purgan las filas viejas cada tanto.
+BOARD_REVISION_SEQUENCE = 'workshop_board_revision_seq'
+BOARD_REVISION_TABLE = 'workshop_board_revision'
+BOARD_REVISION_KEEP = 1000
+BOARD_REVISION_PENDING_KEY = 'stone_workshop.board_revision_pending'
+
+# Órdenes tocadas en la transacción ({orden: compañía}, en postcommit) y tipo
+# de notificación del bus.
+BOARD_DIRTY_KEY = 'stone_workshop.board_dirty'
+BOARD_DELTA_NOTIFICATION = 'stone_workshop/board_delta'
+
+# Campos de la orden cuya escritura cambia lo que pinta el tablero. Los totales
+# y estimados almacenados se recalculan desde líneas/sesiones, que tienen su
+# propio aviso.
+WORKSHOP_BOARD_FIELDS = frozenset({
+    'name', 'state', 'queue_sequence', 'parked_in_queue', 'auto_parked_at',
+    'operation_mode', 'process_id', 'responsible_id', 'tablet_operator_id',
+    'company_id', 'input_product_id', 'default_product_out_id', 'remnant_product_id',
+    'production_target_sqm', 'date_planned', 'date_start', 'date_done', 'workcenter_id',
+})
+
+# Snapshots por proceso: {(bd, usuario, compañías, idioma, fecha): (caduca,
+# revisión, payload)}. El usuario va en la llave: las reglas de registro y los
+# campos por grupo hacen que dos usuarios de la misma compañía puedan ver
+# tableros distintos. Caducan igual que la programación que llevan dentro.
+_BOARD_SNAPSHOT_CACHE = {}
+
+
+class WorkshopOrderBoard(models.Model):
+    _inherit = 'workshop.order'
+
+    def init(self):
+        super().init()
+        self.env.cr.execute('CREATE SEQUENCE IF NOT EXISTS %s' % BOARD_REVISION_SEQUENCE)
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS %s (
+                revision bigint PRIMARY KEY,
+                create_date timestamp without time zone DEFAULT (now() at time zone 'UTC')
+            )
+        """ % BOARD_REVISION_TABLE)
+
+    # ─── Revisión ───────────────────────────────────────────────────────────
+    @api.model
+    def _workshop_board_revision(self):
+        """Revisión vigente del tablero (lectura, no la avanza).
+
+        Es 0 mientras no se haya publicado ninguna; la primera vale 1.
+        """
+        self.env.cr.execute('SELECT COALESCE(max(revision), 0) FROM %s' % BOARD_REVISION_TABLE)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _workshop_board_bump_revision(self, cr):
+        """Publica una revisión nueva con el cursor `cr` (postcommit) y la devuelve."""
+        cr.execute(
+            "INSERT INTO %s (revision) VALUES (nextval('%s')) RETURNING revision"
+            % (BOARD_REVISION_TABLE, BOARD_REVISION_SEQUENCE)
+        )
+        revision = cr.fetchone()[0]
+        if revision % BOARD_REVISION_KEEP == 0:
+            try:
+                with cr.savepoint(flush=False):
+                    cr.execute(
+                        'DELETE FROM %s WHERE revision < %%s' % BOARD_REVISION_TABLE,
+                        (revision - BOARD_REVISION_KEEP,),
+                    )
+            except psycopg2.Error:
+                # Otra purga concurrente ya se encargó; no es crítico.
+                _logger.info('[STONE WORKSHOP] purga de revisiones del tablero omitida.')
+        return revision
+
+    def _workshop_board_touch(self):
+        """Marca que el tablero cambió en la transacción en curso.
+
+        La revisión avanza UNA vez por transacción, después del commit y en un
+        cursor propio, y con ella sale el aviso del bus; si la transacción se
+        revierte no pasa nada. Aquí sólo se anotan las órdenes tocadas (con su
+        compañía, que tras un unlink ya no se podría leer).
+        """
+        if not self:
+            return
+        cr = self.env.cr
+        dirty = cr.postcommit.data.get(BOARD_DIRTY_KEY)
+        if dirty is None:
+            dirty = cr.postcommit.data[BOARD_DIRTY_KEY] = {}
+        for order in self.sudo():
+            dirty[order.id] = order.company_id.id
+
+        if cr.postcommit.data.get(BOARD_REVISION_PENDING_KEY):
+            return
+        cr.postcommit.data[BOARD_REVISION_PENDING_KEY] = True
+        registry = self.env.registry
+
+        @cr.postcommit.add
+        def _bump_board_revision():
+            with registry.cursor() as bump_cr:
+                env = api.Environment(bump_cr, SUPERUSER_ID, {})
+                revision = env['workshop.order']._workshop_board_bump_revision(bump_cr)
+                env['workshop.order']._workshop_board_notify(revision, dirty)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        orders._workshop_board_touch()
+        return orders
+
+    def write(self, vals):
+        res = super().write(vals)
+        if WORKSHOP_BOARD_FIELDS.intersection(vals):
+            self._workshop_board_touch()
+        return res
+
+    def unlink(self):
+        if self:
+            self._workshop_board_touch()
+        return super().unlink()
+
+    # ─── Deltas por bus ─────────────────────────────────────────────────────
+    @api.model
+    def _workshop_board_notify(self, revision, dirty):
+        """Publica la revisión nueva y los deltas de las compañías tocadas.
+
+        Corre en postcommit (cursor propio). Cada usuario interno de taller
+        recibe un solo mensaje `{'revision', 'deltas'}` con los deltas de las
+        compañías que tiene permitidas (lista vacía si no le toca ninguna).
+        Nunca debe romper el avance de la revisión: si falla, los clientes se
+        resincronizan con la lectura condicional al detectar el hueco.
+        """
+        if not dirty:
+            return
+        by_company = {}
+        for order_id, company_id in dirty.items():
+            by_company.setdefault(company_id, []).append(order_id)
+        try:
+            with self.env.cr.savepoint():
+                users = self.env['res.users'].search([('share', '=', False)]).filtered(
+                    lambda u: u.has_group('stone_workshop.group_workshop_user')
+                )
+                deltas = {}
+                notifications = []
+                for user in users:
+                    parts = []
+                    for company_id, order_ids in by_company.items():
+                        if company_id not in user.company_ids.ids:
+                            continue
+                        key = (company_id, user.lang or '', user.tz or '')
+                        if key not in deltas:
+                            deltas[key] = self._workshop_board_delta_for(user, company_id, order_ids)
+                        parts.append(deltas[key])
+                    notifications.append((
+                        user.partner_id, BOARD_DELTA_NOTIFICATION,
+                        {'revision': revision, 'deltas': parts},
+                    ))
+                if notifications:
+                    self.env['bus.bus']._sendmany(notifications)
+        except Exception:  # noqa: BLE001 - el aviso es best-effort
+            _logger.exception('[STONE WORKSHOP] no se pudo publicar el delta del tablero.')
+
+    @api.model
+    def _workshop_board_delta_for(self, user, company_id, order_ids):
+        """Delta de `company_id` con idioma y zona horaria de `user`.
+
+        Se arma como superusuario (una vez para todos los usuarios con el
+        mismo idioma y zona); si falla, el delta sólo pide resincronizar.
+        """
+        board = self.with_user(user).sudo().with_context(
+            allowed_company_ids=[company_id], lang=user.lang, tz=user.tz,
+        )
+        try:
+            with self.env.cr.savepoint():
+                return board._workshop_board_delta(order_ids)
+        except Exception:  # noqa: BLE001 - el cliente cae al snapshot
+            _logger.exception('[STONE WORKSHOP] delta del tablero de la compañía %s falló.', company_id)
+            return {'company_id': company_id, 'resync': True}
+
+    @api.model
+    def _workshop_board_delta(self, order_ids):
+        """Delta compacto del tablero de la compañía vigente.
+
+        - `cards`: tarjetas de las órdenes tocadas que siguen en el tablero.
+        - `removed`: órdenes tocadas que ya no están en ninguna lista.
+        - `queue_order` / `execution_order`: IDs en el orden vigente, para
+          reacomodar sin mandar todas las tarjetas.
+        - `schedule`: fechas proyectadas de todas las tarjetas del tablero
+          (mover o pausar una orden corre las de las demás).
+        - `kpis` / `capacity`: parche de los indicadores.
+
+        Sale de la misma lectura de órdenes activas que el snapshot, pero sólo
+        arma las tarjetas tocadas.
+        """
+        rows = self._workshop_active_order_rows()
+        ids = self._workshop_board_ids_from_rows(rows)
+        on_board = set(ids['queue']) | set(ids['execution'])
+        cards = self.browse([oid for oid in order_ids if oid in on_board])._workshop_board_payloads()
+        try:
+            kpis = self._workshop_kpis_compute()
+        except Exception:  # noqa: BLE001 - los KPIs nunca tumban el delta
+            _logger.exception('[STONE WORKSHOP] KPIs del delta fallaron.')
+            kpis = False
+        try:
+            plan = self._workshop_schedule_plan(rows)
+        except Exception:  # noqa: BLE001
+            _logger.exception('[STONE WORKSHOP] programación del delta falló.')
+            plan = None
+        try:
+            capacity = self._workshop_capacity_from_rows(rows, plan=plan)
+        except Exception:  # noqa: BLE001
+            _logger.exception('[STONE WORKSHOP] capacidad del delta falló.')
+            capacity = False
+        schedule = plan['orders'] if plan else {}
+        self._workshop_board_annotate_schedule(cards, schedule)
+        return {
+            'company_id': self.env.company.id,
+            'cards': cards,
+            'removed': sorted(oid for oid in order_ids if oid not in on_board),
+            'queue_order': ids['queue'],
+            'execution_order': ids['execution'],
+            'schedule': {oid: schedule[oid] for oid in on_board if oid in schedule},
+            'kpis': kpis,
+            'capacity': capacity,
+        }
+
+    # ─── Snapshot ───────────────────────────────────────────────────────────
+    @api.model
+    def get_workshop_board_revision(self):
+        """Revisión vigente del tablero, para que el cliente decida si recargar."""
+        return self._workshop_board_revision()
+
+    @api.model
+    def get_workshop_board_snapshot(self, since_revision=False):
+        """Tablero completo (cola, ejecución, KPIs, capacidad) con lectura condicional.
+
+        Si `since_revision` coincide con la revisión vigente devuelve sólo
+        `{'revision', 'unchanged': True}`. Si no, devuelve el snapshot de la
+        compañía para esa revisión, calculándolo una sola vez por revisión.
+
+        La revisión se lee antes que cualquier otro dato y, si la regla de
+        24 h devolvió órdenes a la cola en esta misma llamada, el payload no
+        se guarda: lleva cambios que la revisión leída aún no cuenta.
+        """
+        revision = self._workshop_board_revision()
+        parked = self._workshop_board_lazy_auto_park()
+        if since_revision and int(since_revision) == revision and not parked:
+            return {'revision': revision, 'unchanged': True}
+
+        today = fields.Date.context_today(self)
+        key = (
+            self.env.cr.dbname,
+            self.env.uid,
+            tuple(sorted(self.env.companies.ids)),
+            self.env.lang or '',
+            today,
+        )
+        now = time.monotonic()
+        cached = _BOARD_SNAPSHOT_CACHE.get(key)
+        if cached and cached[0] > now and cached[1] == revision and not parked:
+            payload = cached[2]
+        else:
+            payload = self._workshop_board_snapshot_compute()
+            if not parked:
+                # Entradas de otros días de la misma base ya no sirven.
+                for stale in [k for k, v in _BOARD_SNAPSHOT_CACHE.items()
+                              if v[0] <= now or (k[0] == key[0] and k[4] != today)]:
+                    _BOARD_SNAPSHOT_CACHE.pop(stale, None)
+                _BOARD_SNAPSHOT_CACHE[key] = (now + WORKSHOP_SCHEDULE_CACHE_TTL, revision, payload)
+        return dict(payload, revision=revision, unchanged=False)
+
+    @api.model
+    def get_workshop_dashboard_bootstrap(self, since_revision=False):
+        """Todo lo que el panel web necesita al abrir, en una sola llamada.
+
+        Cola + ejecución, KPIs, capacidad (del snapshot, con la misma lectura
+        condicional por revisión), los permisos del usuario y la tendencia de
+        los últimos 7 días del resumen diario.
+        """
+        result = self.get_workshop_board_snapshot(since_revision=since_revision)
+        result['access'] = self.get_workshop_dashboard_access()
+        try:
+            result['trend'] = self.env['workshop.kpi.daily'].get_kpi_trend(days=7)
+        except Exception:  # noqa: BLE001 - la tendencia nunca tumba el panel
+            _logger.exception('[STONE WORKSHOP] tendencia del panel falló.')
+            result['trend'] = []
+        return result
+
+    @api.model
+    def _workshop_board_snapshot_compute(self):
+        """Cola + ejecución + KPIs + capacidad, sin aplicar la regla de 24 h.
+
+        Cada tarjeta lleva además su inicio/fin proyectados. Todo sale de una
+        sola lectura de las órdenes activas.
+        """
+        rows = self._workshop_active_order_rows()
+        board = self._workshop_board_lists(rows=rows)
+        try:
+            kpis = self.get_workshop_kpis()
+        except Exception:  # noqa: BLE001 - los KPIs nunca tumban el panel
+            _logger.exception('[STONE WORKSHOP] KPIs del tablero fallaron.')
+            kpis = {}
+        try:
+            plan = self.get_workshop_queue_plan(rows=rows)
+        except Exception:  # noqa: BLE001
+            _logger.exception('[STONE WORKSHOP] programación de la cola falló.')
+            plan = None
+        try:
+            capacity = self._workshop_capacity_from_rows(rows, plan=plan)
+        except Exception:  # noqa: BLE001
+            _logger.exception('[STONE WORKSHOP] capacidad del tablero falló.')
+            capacity = {}
+        self._workshop_board_annotate_schedule(
+            board['queue'] + board['execution'], plan['orders'] if plan else {},
+        )
+        return {
+            'queue': board['queue'],
+            'execution': board['execution'],
+            'kpis': kpis,
+            'capacity': capacity,
+        }
+
+
+class WorkshopWorkSessionBoard(models.Model):
+    _inherit = 'workshop.work.session'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        sessions = super().create(vals_list)
+        sessions.order_id._workshop_board_touch()
+        return sessions
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.order_id._workshop_board_touch()
+        return res
+
+    def unlink(self):
+        self.order_id._workshop_board_touch()
+        return super().unlink()
+
+
+class WorkshopInputLineBoard(models.Model):
+    _inherit = 'workshop.input.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.order_id._workshop_board_touch()
+        return lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.order_id._workshop_board_touch()
+        return res
+
+    def unlink(self):
+        self.order_id._workshop_board_touch()
+        return super().unlink()
+
+
+class WorkshopOutputLineBoard(models.Model):
+    _inherit = 'workshop.output.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.order_id._workshop_board_touch()
+        return lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.order_id._workshop_board_touch()
+        return res
+
+    def unlink(self):
+        self.order_id._workshop_board_touch()
+        return super().unlink()
+
+
+class WorkshopProgressLogBoard(models.Model):
+    _inherit = 'workshop.progress.log'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        logs = super().create(vals_list)
+        logs.order_id._workshop_board_touch()
+        return logs
+
+    def unlink(self):
+        self.order_id._workshop_board_touch()
+        return super().unlink()
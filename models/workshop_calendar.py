@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Calendario laboral del taller: días hábiles en forma cerrada.
+
+Sumar N días hábiles ya no avanza día por día: se calculan semanas completas
+más el resto (a lo sumo 7 pasos) y los feriados se cuentan por rango con
+`bisect` sobre la lista ordenada. El costo no depende del tamaño de N.
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+import re
+
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def parse_holidays(raw):
+    """Fechas ISO (AAAA-MM-DD) de un texto libre; ignora lo que no sea fecha."""
+    holidays = set()
+    for token in _DATE_RE.findall(raw or ''):
+        try:
+            holidays.add(date.fromisoformat(token))
+        except ValueError:
+            continue
+    return tuple(sorted(holidays))
+
+
+class WorkingCalendar:
+    """Días no laborables por día de la semana (lunes=0 … domingo=6) + feriados."""
+
+    __slots__ = ('non_working', 'week_len', 'holidays')
+
+    def __init__(self, non_working_weekdays=(6,), holidays=()):
+        non_working = frozenset(int(d) for d in non_working_weekdays if 0 <= int(d) <= 6)
+        if len(non_working) == 7:
+            # Un calendario sin días hábiles no tiene sentido: se ignora.
+            non_working = frozenset()
+        self.non_working = non_working
+        self.week_len = 7 - len(non_working)
+        # Sólo cuentan los feriados que caen en día laborable.
+        self.holidays = tuple(sorted({
+            h for h in holidays if h.weekday() not in non_working
+        }))
+
+    def is_working_day(self, day):
+        if day.weekday() in self.non_working:
+            return False
+        idx = bisect_right(self.holidays, day)
+        return not (idx and self.holidays[idx - 1] == day)
+
+    def holidays_between(self, start, end):
+        """Feriados (en día laborable) dentro de (start, end]."""
+        if end <= start:
+            return 0
+        return bisect_right(self.holidays, end) - bisect_right(self.holidays, start)
+
+    def next_working_day(self, day):
+        """El mismo día si es hábil; si no, el siguiente hábil."""
+        if self.is_working_day(day):
+            return day
+        return self.add_working_days(day, 1)
+
+    def _add_weekdays(self, start, count):
+        """El `count`-ésimo día laborable por semana (sin feriados) después de `start`."""
+        weeks, rest = divmod(count, self.week_len)
+        if rest == 0:
+            weeks -= 1
+            rest = self.week_len
+        day = start + timedelta(days=7 * weeks)
+        while rest:
+            day += timedelta(days=1)
+            if day.weekday() not in self.non_working:
+                rest -= 1
+        return day
+
+    def add_working_days(self, start, count):
+        """El `count`-ésimo día hábil estrictamente después de `start` (count ≥ 1).
+
+        Primero semanas + resto sin feriados; luego, mientras el tramo recién
+        cubierto contenga feriados, se avanza ese número de días laborables más.
+        Cada vuelta consume feriados, así que termina en ≤ len(holidays) vueltas.
+        """
+        count = int(count)
+        if count <= 0:
+            return self.next_working_day(start)
+        day = self._add_weekdays(start, count)
+        pending = self.holidays_between(start, day)
+        while pending:
+            previous = day
+            day = self._add_weekdays(previous, pending)
+            pending = self.holidays_between(previous, day)
+        return day
+
+    def count_working_days(self, start, end):
+        """Días hábiles dentro de (start, end]."""
+        if end <= start:
+            return 0
+        weeks, rest = divmod((end - start).days, 7)
+        total = weeks * self.week_len
+        day = start + timedelta(days=7 * weeks)
+        for _i in range(rest):
+            day += timedelta(days=1)
+            if day.weekday() not in self.non_working:
+                total += 1
+        return total - self.holidays_between(start, end)
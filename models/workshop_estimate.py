@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Estimados de tiempo aprendidos de las sesiones reales del taller.
+
+El minuto por m² fijo del proceso no distingue material ni espesor. Aquí se
+ajusta, con UNA consulta agregada sobre las órdenes terminadas, un minuto/m²
+por compañía × proceso × categoría de producto × banda de espesor:
+
+    min/m² = Σ minutos trabajados ÷ Σ m² de entrada
+
+(mínimos cuadrados ponderados por área, sin término independiente), quitando
+los extremos por proceso cuando hay muestra suficiente. Con `GROUPING SETS`
+salen en la misma pasada los niveles de respaldo (proceso × categoría y sólo
+proceso). Un cron nocturno rehace la tabla y recalcula los estimados de las
+órdenes activas; `_compute_estimate` usa el nivel más fino con muestra.
+"""
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Bandas de espesor (cm): (clave, etiqueta, límite superior exclusivo).
+THICKNESS_BANDS = [
+    ('lt2', 'Menos de 1.8 cm', 1.8),
+    ('2cm', '1.8 – 2.5 cm', 2.5),
+    ('3cm', '2.5 – 3.5 cm', 3.5),
+    ('gt3', 'Más de 3.5 cm', None),
+]
+
+# Órdenes mínimas para confiar en un coeficiente.
+ESTIMATE_MIN_SAMPLES = 3
+# Con al menos esta muestra por proceso se recortan los extremos (p10–p90).
+ESTIMATE_TRIM_MIN_SAMPLES = 10
+# Historia que entra al ajuste.
+ESTIMATE_HISTORY_DAYS = 365
+
+LEARNED_ESTIMATES_PARAM = 'stone_workshop.learned_estimates'
+
+
+def thickness_band(value):
+    """Banda de un espesor en cm; 'any' si no se conoce."""
+    if not value or value <= 0:
+        return 'any'
+    for key, _label, upper in THICKNESS_BANDS:
+        if upper is None or value < upper:
+            return key
+    return 'any'
+
+
+def _thickness_band_sql(column):
+    cases = ' '.join(
+        "WHEN %s < %s THEN '%s'" % (column, upper, key)
+        for key, _label, upper in THICKNESS_BANDS if upper is not None
+    )
+    return "CASE WHEN %s IS NULL OR %s <= 0 THEN 'any' %s ELSE '%s' END" % (
+        column, column, cases, THICKNESS_BANDS[-1][0],
+    )
+
+
+class WorkshopEstimateCoef(models.Model):
+    _name = 'workshop.estimate.coef'
+    _description = 'Coeficiente aprendido de tiempo del taller'
+    _order = 'company_id, process_id, scope, categ_id, thickness_band'
+
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, index=True, readonly=True)
+    process_id = fields.Many2one(
+        'workshop.process', string='Proceso', required=True, index=True,
+        ondelete='cascade', readonly=True,
+    )
+    categ_id = fields.Many2one(
+        'product.category', string='Categoría de producto', ondelete='cascade', readonly=True,
+    )
+    thickness_band = fields.Selection(
+        [('any', 'Cualquiera')] + [(key, label) for key, label, _u in THICKNESS_BANDS],
+        string='Espesor', required=True, default='any', readonly=True,
+    )
+    scope = fields.Selection([
+        ('exact', 'Proceso + categoría + espesor'),
+        ('category', 'Proceso + categoría'),
+        ('process', 'Proceso'),
+    ], string='Nivel', required=True, readonly=True)
+    sample_count = fields.Integer(string='Órdenes', readonly=True)
+    area_total = fields.Float(string='m² de entrada', digits=(12, 2), readonly=True)
+    minutes_total = fields.Float(string='Minutos trabajados', digits=(12, 1), readonly=True)
+    minutes_per_sqm = fields.Float(string='Min/m² aprendido', digits=(12, 4), readonly=True)
+    base_minutes_per_sqm = fields.Float(
+        string='Min/m² del proceso', related='process_id.minutes_per_sqm', readonly=True,
+    )
+    fitted_at = fields.Datetime(string='Ajustado', readonly=True)
+
+    # ─── Ajuste ─────────────────────────────────────────────────────────────
+    @api.model
+    def _fit(self, history_days=ESTIMATE_HISTORY_DAYS):
+        """Rehace la tabla completa con una sola consulta agregada."""
+        self.env['workshop.order'].flush_model([
+            'state', 'date_done', 'company_id', 'process_id', 'input_product_id',
+            'area_in_total', 'worked_seconds_closed',
+        ])
+        self.env['workshop.input.line'].flush_model(['order_id', 'thickness_cm', 'state'])
+        since = fields.Datetime.now() - timedelta(days=history_days)
+        cr = self.env.cr
+        cr.execute('DELETE FROM workshop_estimate_coef')
+        cr.execute("""
+            WITH samples AS (
+                SELECT o.company_id, o.process_id, t.categ_id,
+                       %(band)s AS band,
+                       o.area_in_total AS area,
+                       o.worked_seconds_closed / 60.0 AS minutes
+                  FROM workshop_order o
+             LEFT JOIN product_product p ON p.id = o.input_product_id
+             LEFT JOIN product_template t ON t.id = p.product_tmpl_id
+             LEFT JOIN LATERAL (
+                       SELECT avg(l.thickness_cm) FILTER (WHERE l.thickness_cm > 0) AS thickness
+                         FROM workshop_input_line l
+                        WHERE l.order_id = o.id
+                          AND l.state NOT IN ('rejected', 'cancelled')
+                       ) th ON TRUE
+                 WHERE o.state = 'done'
+                   AND o.process_id IS NOT NULL
+                   AND o.area_in_total > 0
+                   AND o.worked_seconds_closed > 0
+                   AND o.date_done >= %%(since)s
+            ), bounds AS (
+                SELECT company_id, process_id, count(*) AS n,
+                       percentile_cont(0.1) WITHIN GROUP (ORDER BY minutes / area) AS lo,
+                       percentile_cont(0.9) WITHIN GROUP (ORDER BY minutes / area) AS hi
+                  FROM samples
+              GROUP BY company_id, process_id
+            )
+            INSERT INTO workshop_estimate_coef (
+                company_id, process_id, categ_id, thickness_band, scope,
+                sample_count, area_total, minutes_total, minutes_per_sqm, fitted_at,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT s.company_id, s.process_id,
+                   CASE WHEN GROUPING(s.categ_id) = 0 THEN s.categ_id END,
+                   CASE WHEN GROUPING(s.band) = 0 THEN s.band ELSE 'any' END,
+                   CASE GROUPING(s.categ_id, s.band)
+                        WHEN 0 THEN 'exact' WHEN 1 THEN 'category' ELSE 'process' END,
+                   count(*), sum(s.area), sum(s.minutes), sum(s.minutes) / sum(s.area),
+                   now() at time zone 'UTC',
+                   %%(uid)s, now() at time zone 'UTC', %%(uid)s, now() at time zone 'UTC'
+              FROM samples s
+              JOIN bounds b ON b.company_id = s.company_id AND b.process_id = s.process_id
+             WHERE b.n < %%(trim_n)s OR s.minutes / s.area BETWEEN b.lo AND b.hi
+          GROUP BY GROUPING SETS (
+                   (s.company_id, s.process_id, s.categ_id, s.band),
+                   (s.company_id, s.process_id, s.categ_id),
+                   (s.company_id, s.process_id)
+                   )
+            HAVING count(*) >= %%(min_n)s
+        """ % {'band': _thickness_band_sql('th.thickness')}, {
+            'since': since,
+            'uid': self.env.uid,
+            'trim_n': ESTIMATE_TRIM_MIN_SAMPLES,
+            'min_n': ESTIMATE_MIN_SAMPLES,
+        })
+        count = cr.rowcount
+        self.invalidate_model()
+        return count
+
+    @api.model
+    def _cron_fit(self):
+        """Cron nocturno: reajusta y actualiza los estimados de órdenes activas."""
+        count = self._fit()
+        _logger.info('[STONE WORKSHOP] estimados aprendidos: %s coeficiente(s).', count)
+        if self.env['ir.config_parameter'].sudo().get_param(LEARNED_ESTIMATES_PARAM):
+            self.env['workshop.order']._recompute_active_estimates()
+        return True
+
+    # ─── Consulta ───────────────────────────────────────────────────────────
+    @api.model
+    def _learned_rates(self, orders):
+        """`{orden: (min/m², nivel)}` con el coeficiente más fino disponible.
+
+        Una sola lectura de la tabla para todas las órdenes. Vacío si los
+        estimados aprendidos están apagados.
+        """
+        if not orders or not self.env['ir.config_parameter'].sudo().get_param(LEARNED_ESTIMATES_PARAM):
+            return {}
+        process_ids = orders.process_id.ids
+        if not process_ids:
+            return {}
+        rows = self.sudo().search_read(
+            [('process_id', 'in', process_ids), ('company_id', 'in', orders.company_id.ids)],
+            ['company_id', 'process_id', 'categ_id', 'thickness_band', 'scope', 'minutes_per_sqm'],
+            load=None,
+        )
+        table = {
+            (r['company_id'], r['process_id'], r['categ_id'] or False, r['thickness_band'], r['scope']):
+                r['minutes_per_sqm']
+            for r in rows
+        }
+        rates = {}
+        for order in orders:
+            company, process = order.company_id.id, order.process_id.id
+            categ = order.input_product_id.categ_id.id or False
+            band = thickness_band(order.estimate_thickness_cm)
+            for key in (
+                (company, process, categ, band, 'exact'),
+                (company, process, categ, 'any', 'category'),
+                (company, process, False, 'any', 'process'),
+            ):
+                rate = table.get(key)
+                if rate and rate > 0:
+                    rates[order] = (rate, 'learned')
+                    break
+        return rates
+
+
+class WorkshopOrderEstimate(models.Model):
+    _inherit = 'workshop.order'
+
+    @api.model
+    def _recompute_active_estimates(self):
+        """Recalcula el estimado de las órdenes activas tras un reajuste."""
+        orders = self.sudo().search([('state', 'in', ('draft', 'in_workshop'))])
+        if not orders:
+            return
+        for fname in ('estimated_minutes', 'estimated_hours', 'estimated_days',
+                      'has_estimate', 'estimate_rate', 'estimate_source'):
+            self.env.add_to_compute(orders._fields[fname], orders)
+        orders.flush_recordset()
+        orders._workshop_board_touch()
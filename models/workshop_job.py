@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""Trabajos en segundo plano del taller.
+
+Declarar, reabrir o confirmar una orden grande (y aplicar una reclasificación
+o una baja de cientos de lotes) puede pasarse del tiempo del worker HTTP y
+revertirse completo. Aquí esas acciones se encolan en `workshop.job` y las
+procesa un cron del propio módulo: sin cola externa, funciona igual en un
+Odoo local de un solo proceso.
+
+Cada trabajo guarda los ids, el método a ejecutar y el contexto extra con el
+que corre; si la acción produce un archivo (etiquetas ZPL) queda adjunto al
+trabajo para descargarlo. El cron lo toma con
+`FOR UPDATE SKIP LOCKED`, lo parte en tramos de `chunk_size` registros y hace
+commit tras cada tramo con `ir.cron._commit_progress`, así el avance queda
+guardado y un reintento continúa donde se quedó. La corrida cede antes de que
+el límite de tiempo real del worker de cron la mate a media transacción. Un tramo corre en su propio savepoint con el usuario y la
+compañía de quien lo encoló:
+
+- Error de negocio (UserError, ValidationError, AccessError): el trabajo
+  falla y guarda el mensaje; reintentar no cambiaría el resultado.
+- Cualquier otro error (bloqueos, serialización): se reintenta el tramo con
+  espera creciente hasta `max_attempts`.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Acciones que se pueden mandar a segundo plano: (modelo, método) → tamaño del
+# tramo. Las de stock van de una en una (cada registro mueve inventario); la
+# normalización de lotes sólo toca stock.lot, resuelve folios del tramo con
+# una consulta y aguanta tramos grandes.
+WORKSHOP_JOB_METHODS = {
+    ('workshop.order', 'action_confirm_workshop'): 1,
+    ('workshop.order', 'action_declare_result'): 1,
+    ('workshop.order', 'action_reopen'): 1,
+    ('workshop.order', 'action_normalize_result_lots'): 100,
+    ('stock.lot.reclassification', 'action_confirm'): 1,
+    ('stock.lot.writeoff', 'action_confirm'): 1,
+    # Etiquetas ZPL de una reclasificación: el tramo es la reclasificación
+    # entera, el generador ya trabaja por tandas dentro.
+    ('stock.lot.reclassification', '_workshop_job_print_labels'): 1,
+}
+
+# Tope de segundos que una corrida del cron sigue tomando tramos antes de
+# ceder; lo pendiente queda para la siguiente corrida (se re-dispara de
+# inmediato). La corrida real usa la mitad del límite del worker de cron si es
+# menor: el tramo en curso necesita margen para terminar y hacer commit.
+WORKSHOP_JOB_TIME_BUDGET = 60
+# Minutos sin latido tras los que un trabajo "en ejecución" se da por
+# interrumpido (worker reiniciado o muerto a media corrida).
+WORKSHOP_JOB_STALE_MINUTES = 15
+# Espera antes de cada reintento, en minutos, según el número de intento.
+WORKSHOP_JOB_BACKOFF = (1, 5, 15)
+
+WORKSHOP_JOB_BUSINESS_ERRORS = (UserError, ValidationError, AccessError)
+
+
+class WorkshopJob(models.Model):
+    _name = 'workshop.job'
+    _description = 'Trabajo en segundo plano del taller'
+    _order = 'id desc'
+
+    name = fields.Char(string='Trabajo', required=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'En cola'),
+        ('running', 'En ejecución'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+        ('cancelled', 'Cancelado'),
+    ], string='Estado', default='pending', required=True, readonly=True, index=True)
+    user_id = fields.Many2one(
+        'res.users', string='Solicitado por', required=True, readonly=True,
+        default=lambda self: self.env.user,
+    )
+    company_id = fields.Many2one(
+        'res.company', string='Compañía', required=True, readonly=True,
+        default=lambda self: self.env.company,
+    )
+    res_model = fields.Char(string='Modelo', required=True, readonly=True)
+    res_ids = fields.Json(string='Registros', readonly=True)
+    method = fields.Char(string='Acción', required=True, readonly=True)
+    job_context = fields.Json(string='Contexto', readonly=True)
+    attachment_id = fields.Many2one(
+        'ir.attachment', string='Archivo', readonly=True, ondelete='set null',
+    )
+    chunk_size = fields.Integer(string='Tramo', default=1, readonly=True)
+    progress_done = fields.Integer(string='Procesados', readonly=True)
+    progress_total = fields.Integer(string='Total', readonly=True)
+    progress = fields.Float(string='Avance (%)', compute='_compute_progress')
+    attempts = fields.Integer(string='Intentos', readonly=True)
+    max_attempts = fields.Integer(string='Máx. intentos', default=3, readonly=True)
+    next_try = fields.Datetime(string='Siguiente intento', readonly=True)
+    date_started = fields.Datetime(string='Inicio', readonly=True)
+    date_heartbeat = fields.Datetime(string='Último avance', readonly=True)
+    date_done = fields.Datetime(string='Fin', readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+    error_details = fields.Text(string='Detalle técnico', readonly=True)
+    failed_res_id = fields.Integer(string='Registro con error', readonly=True)
+
+    @api.depends('progress_done', 'progress_total')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = (
+                100.0 * job.progress_done / job.progress_total if job.progress_total else 0.0
+            )
+
+    # ─── Encolar ─────────────────────────────────────────────────────────────
+    @api.model
+    def _enqueue(self, records, method, context=None):
+        """Crea el trabajo para `records.method()` y despierta al cron.
+
+        `context` (dict serializable) se agrega al contexto de cada tramo.
+        """
+        chunk_size = WORKSHOP_JOB_METHODS.get((records._name, method))
+        if not chunk_size:
+            raise UserError(_('La acción %s no se puede ejecutar en segundo plano.') % method)
+        if not records:
+            raise UserError(_('No hay registros para procesar.'))
+        records.check_access('write')
+
+        busy = self.sudo().search([
+            ('res_model', '=', records._name),
+            ('method', '=', method),
+            ('state', 'in', ('pending', 'running')),
+        ])
+        busy_ids = {res_id for job in busy for res_id in (job.res_ids or [])}
+        if busy_ids & set(records.ids):
+            raise UserError(_(
+                'Ya hay un trabajo en segundo plano pendiente para estos registros. '
+                'Espera a que termine antes de volver a lanzarlo.'
+            ))
+
+        label = ', '.join(records[:3].mapped('display_name'))
+        if len(records) > 3:
+            label += _(' y %s más') % (len(records) - 3)
+        job = self.sudo().create({
+            'name': '%s: %s' % (self._method_label(records._name, method), label),
+            'user_id': self.env.uid,
+            'company_id': self.env.company.id,
+            'res_model': records._name,
+            'res_ids': records.ids,
+            'method': method,
+            'job_context': context or False,
+            'chunk_size': chunk_size,
+            'progress_total': len(records),
+        })
+        self.env.ref('stone_workshop.ir_cron_workshop_job_runner').sudo()._trigger()
+        _logger.info('[STONE WORKSHOP] trabajo %s encolado: %s.%s sobre %s registro(s).',
+                     job.id, records._name, method, len(records))
+        return job
+
+    @api.model
+    def _method_label(self, res_model, method):
+        if method == 'action_confirm':
+            return _('Aplicar %s') % self.env[res_model]._description
+        return {
+            'action_confirm_workshop': _('Confirmar taller'),
+            'action_declare_result': _('Declarar resultado'),
+            'action_reopen': _('Reabrir'),
+            'action_normalize_result_lots': _('Normalizar lotes resultado'),
+            '_workshop_job_print_labels': _('Etiquetas ZPL'),
+        }.get(method, method)
+
+    # ─── Worker (cron) ───────────────────────────────────────────────────────
+    @api.model
+    def _cron_run(self, time_budget=None):
+        """Cron: procesa trabajos en cola hasta agotar el tiempo de la corrida."""
+        deadline = time.monotonic() + (time_budget or self._job_time_budget())
+        self._requeue_stale_jobs()
+        while time.monotonic() < deadline:
+            job = self._acquire_next()
+            if not job:
+                break
+            job._run(deadline)
+        return True
+
+    @api.model
+    def _job_time_budget(self):
+        """Segundos de la corrida según el límite real del worker de cron.
+
+        `limit_time_real_cron` negativo (por omisión) hereda `limit_time_real`;
+        0 es sin límite y se queda con el tope del módulo.
+        """
+        limit = config.get('limit_time_real_cron')
+        if limit is None or limit < 0:
+            limit = config.get('limit_time_real') or 0
+        if limit <= 0:
+            return WORKSHOP_JOB_TIME_BUDGET
+        return min(WORKSHOP_JOB_TIME_BUDGET, limit / 2)
+
+    def _job_commit(self, processed=0):
+        """Commit del avance vía ir.cron; devuelve los segundos que le quedan."""
+        return self.env['ir.cron']._commit_progress(processed)
+
+    def _requeue_stale_jobs(self):
+        """Devuelve a la cola los trabajos cuyo worker murió a media corrida."""
+        limit = fields.Datetime.now() - timedelta(minutes=WORKSHOP_JOB_STALE_MINUTES)
+        stale = self.search([('state', '=', 'running'), ('date_heartbeat', '<', limit)])
+        for job in stale:
+            job._register_failure(
+                _('El worker se interrumpió sin terminar el tramo.'), retry=True,
+            )
+        if stale:
+            self._job_commit()
+
+    def _acquire_next(self):
+        """Toma el siguiente trabajo listo; otro worker concurrente lo salta."""
+        self.env.cr.execute("""
+            SELECT id FROM workshop_job
+             WHERE state = 'pending'
+               AND (next_try IS NULL OR next_try <= now() at time zone 'UTC')
+             ORDER BY id
+             LIMIT 1
+             FOR UPDATE SKIP LOCKED
+        """)
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        job = self.browse(row[0])
+        now = fields.Datetime.now()
+        job.write({
+            'state': 'running',
+            'date_started': job.date_started or now,
+            'date_heartbeat': now,
+        })
+        self._job_commit()
+        return job
+
+    def _run(self, deadline):
+        """Ejecuta tramos del trabajo con commit tras cada uno."""
+        self.ensure_one()
+        res_ids = self.res_ids or []
+        chunk_size = max(self.chunk_size, 1)
+        target = self.env[self.res_model].with_user(self.user_id).with_company(
+            self.company_id).with_context(**(self.job_context or {}), workshop_job_id=self.id)
+        remaining = None
+        while self.progress_done < len(res_ids):
+            if time.monotonic() >= deadline or (remaining is not None and remaining <= 0):
+                # Se cede el turno: lo que falta va en la siguiente corrida.
+                self.write({'state': 'pending'})
+                self._job_commit()
+                self.env.ref('stone_workshop.ir_cron_workshop_job_runner')._trigger()
+                return
+            chunk = res_ids[self.progress_done:self.progress_done + chunk_size]
+            records = target.browse(chunk).exists()
+            try:
+                with self.env.cr.savepoint():
+                    if records:
+                        getattr(records, self.method)()
+            except Exception as exc:  # noqa: BLE001 — se guarda y se decide si reintentar
+                self.env.invalidate_all()
+                failed_id = chunk[0] if len(chunk) == 1 else 0
+                self._register_failure(
+                    str(exc) or exc.__class__.__name__,
+                    retry=not isinstance(exc, WORKSHOP_JOB_BUSINESS_ERRORS),
+                    details=traceback.format_exc(),
+                    failed_res_id=failed_id,
+                )
+                self._job_commit()
+                return
+            self.write({
+                'progress_done': self.progress_done + len(chunk),
+                'date_heartbeat': fields.Datetime.now(),
+            })
+            remaining = self._job_commit(len(chunk))
+
+        self.write({'state': 'done', 'date_done': fields.Datetime.now(), 'next_try': False})
+        self._notify_owner()
+        self._job_commit()
+        _logger.info('[STONE WORKSHOP] trabajo %s terminado (%s registro(s)).', self.id, len(res_ids))
+
+    def _register_failure(self, message, retry=True, details=False, failed_res_id=0):
+        """Guarda el error; reprograma con espera creciente o marca fallido."""
+        self.ensure_one()
+        attempts = self.attempts + 1
+        vals = {
+            'attempts': attempts,
+            'error': message,
+            'error_details': details or False,
+            'failed_res_id': failed_res_id,
+        }
+        if retry and attempts < self.max_attempts:
+            wait = WORKSHOP_JOB_BACKOFF[min(attempts, len(WORKSHOP_JOB_BACKOFF)) - 1]
+            vals.update({
+                'state': 'pending',
+                'next_try': fields.Datetime.now() + timedelta(minutes=wait),
+            })
+            _logger.warning('[STONE WORKSHOP] trabajo %s: intento %s falló, reintento en %s min: %s',
+                            self.id, attempts, wait, message)
+        else:
+            vals.update({'state': 'failed', 'date_done': fields.Datetime.now(), 'next_try': False})
+            _logger.warning('[STONE WORKSHOP] trabajo %s fallido: %s', self.id, message)
+        self.write(vals)
+        if vals['state'] == 'failed':
+            self._notify_owner()
+
+    def _notify_owner(self):
+        """Aviso al usuario que lo encoló (si tiene el cliente abierto)."""
+        self.ensure_one()
+        if self.state == 'done':
+            payload = {
+                'type': 'success',
+                'title': _('Trabajo terminado'),
+                'message': self.name,
+            }
+        else:
+            payload = {
+                'type': 'danger',
+                'title': _('Trabajo fallido'),
+                'message': '%s — %s' % (self.name, self.error or ''),
+                'sticky': True,
+            }
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', payload)
+
+    # ─── Acciones de usuario ─────────────────────────────────────────────────
+    def _check_job_owner(self):
+        is_supervisor = (
+            self.env.user.has_group('stone_workshop.group_workshop_supervisor')
+            or self.env.user.has_group('base.group_system')
+        )
+        if not is_supervisor and any(job.user_id != self.env.user for job in self):
+            raise UserError(_('Solo quien lanzó el trabajo o un supervisor puede modificarlo.'))
+
+    def action_cancel(self):
+        self._check_job_owner()
+        if any(job.state != 'pending' for job in self):
+            raise UserError(_('Solo puedes cancelar trabajos en cola.'))
+        self.sudo().write({'state': 'cancelled', 'next_try': False})
+        return True
+
+    def action_retry(self):
+        """Reencola un trabajo fallido desde el tramo que falló."""
+        self._check_job_owner()
+        if any(job.state != 'failed' for job in self):
+            raise UserError(_('Solo puedes reintentar trabajos fallidos.'))
+        self.sudo().write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_try': False,
+            'date_done': False,
+        })
+        self.env.ref('stone_workshop.ir_cron_workshop_job_runner').sudo()._trigger()
+        return True
+
+    def action_download_attachment(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_('Este trabajo no generó ningún archivo.'))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def action_open_records(self):
+        self.ensure_one()
+        records = self.env[self.res_model].browse(self.res_ids or []).exists()
+        action = {
+            'type': 'ir.actions.act_window',
+            'name': self.name,
+            'res_model': self.res_model,
+            'target': 'current',
+        }
+        if len(records) == 1:
+            action.update({'view_mode': 'form', 'res_id': records.id})
+        else:
+            action.update({'view_mode': 'list,form', 'domain': [('id', 'in', records.ids)]})
+        return action
+
+    @api.model
+    def get_job_status(self, job_ids):
+        """Estado compacto para el sondeo del cliente."""
+        jobs = self.browse(job_ids).exists()
+        return [{
+            'id': job.id,
+            'state': job.state,
+            'progressDone': job.progress_done,
+            'progressTotal': job.progress_total,
+            'progress': job.progress,
+            'attempts': job.attempts,
+            'nextTry': fields.Datetime.to_string(job.next_try) if job.next_try else False,
+            'error': job.error or False,
+        } for job in jobs]
+
+
+class WorkshopJobMixin(models.AbstractModel):
+    _name = 'workshop.job.mixin'
+    _description = 'Acciones ejecutables en segundo plano'
+
+    def action_run_in_background(self):
+        """Encola el método del contexto (`workshop_job_method`) y abre el trabajo.
+
+        `workshop_job_context` (opcional) es el contexto extra del trabajo.
+        """
+        method = self.env.context.get('workshop_job_method')
+        job = self.env['workshop.job']._enqueue(
+            self, method, context=self.env.context.get('workshop_job_context'))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Trabajo en segundo plano'),
+            'res_model': 'workshop.job',
+            'res_id': job.id,
+            'view_mode': 'form',
+            'views': [(self.env.ref('stone_workshop.view_workshop_job_form').id, 'form')],
+            'target': 'new',
+        }
+
+
+class WorkshopOrder(models.Model):
+    _name = 'workshop.order'
+    _inherit = ['workshop.order', 'workshop.job.mixin']
+
+
+class StockLotReclassification(models.Model):
+    _name = 'stock.lot.reclassification'
+    _inherit = ['stock.lot.reclassification', 'workshop.job.mixin']
+
+
+class StockLotWriteoff(models.Model):
+    _name = 'stock.lot.writeoff'
+    _inherit = ['stock.lot.writeoff', 'workshop.job.mixin']
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""Resumen diario de KPIs del taller (rollup).
+
+Los KPIs del día se calculan al vuelo y se descartan; cualquier tendencia
+(rendimiento semanal, merma por proceso) tendría que recorrer todas las órdenes
+terminadas. Aquí se guarda un renglón por fecha de cierre × compañía × modo
+operativo × proceso con las sumas ya hechas. Se mantiene al cerrar/reabrir una
+orden (se recalcula el día completo de esa compañía, en precommit) y un cron
+diario rellena/repara los últimos días. Las series de N días salen de este
+resumen a costo constante.
+"""
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Órdenes cuyo cierre cambió en la transacción (fecha, compañía) → precommit.
+KPI_DAILY_DIRTY_KEY = 'stone_workshop.kpi_daily_dirty'
+
+# Campos de la orden que mueven el resumen de una orden terminada.
+KPI_DAILY_ORDER_FIELDS = frozenset({
+    'state', 'date_done', 'company_id', 'operation_mode', 'process_id',
+})
+
+# Días hacia atrás que el cron vuelve a cuadrar en cada corrida.
+KPI_DAILY_CRON_DAYS = 3
+
+
+class WorkshopKpiDaily(models.Model):
+    _name = 'workshop.kpi.daily'
+    _description = 'Resumen diario de KPIs del taller'
+    _order = 'date desc, company_id, operation_mode, process_id'
+
+    date = fields.Date(string='Fecha', required=True, index=True, readonly=True)
+    company_id = fields.Many2one(
+        'res.company', string='Compañía', required=True, index=True, readonly=True,
+    )
+    operation_mode = fields.Selection(
+        selection=lambda self: self.env['workshop.order']._fields['operation_mode'].selection,
+        string='Modo operativo', readonly=True,
+    )
+    process_id = fields.Many2one(
+        'workshop.process', string='Proceso', ondelete='set null', readonly=True,
+    )
+    done_count = fields.Integer(string='Órdenes cerradas', readonly=True)
+    area_in = fields.Float(string='Entrada m²', digits=(12, 4), readonly=True)
+    area_out = fields.Float(string='Útil m²', digits=(12, 4), readonly=True)
+    area_remnant = fields.Float(string='Subproductos m²', digits=(12, 4), readonly=True)
+    area_loss = fields.Float(string='Merma m²', digits=(12, 4), readonly=True)
+    yield_sum = fields.Float(
+        string='Suma de rendimientos (%)', digits=(12, 2), readonly=True,
+        help='Suma de rendimientos reales distintos de cero; con `yield_count` da el '
+             'promedio del día igual que el KPI del panel.',
+    )
+    yield_count = fields.Integer(string='Órdenes con rendimiento', readonly=True)
+    worked_hours = fields.Float(string='Horas trabajadas', digits=(12, 2), readonly=True)
+    avg_yield = fields.Float(
+        string='Rendimiento promedio (%)', compute='_compute_ratios', digits=(12, 2),
+    )
+    loss_percent = fields.Float(
+        string='Merma (%)', compute='_compute_ratios', digits=(12, 2),
+    )
+
+    @api.depends('yield_sum', 'yield_count', 'area_loss', 'area_in')
+    def _compute_ratios(self):
+        for rec in self:
+            rec.avg_yield = (rec.yield_sum / rec.yield_count) if rec.yield_count else 0.0
+            rec.loss_percent = (rec.area_loss / rec.area_in * 100.0) if rec.area_in else 0.0
+
+    # ─── Mantenimiento ──────────────────────────────────────────────────────
+    @api.model
+    def _refresh_buckets(self, buckets):
+        """Recalcula por completo los días (fecha, compañía) indicados.
+
+        Borra y vuelve a insertar con un INSERT … SELECT agrupado sobre las
+        órdenes terminadas: idempotente, sirve igual para cierre, reapertura o
+        reparación.
+        """
+        buckets = {(d, c) for d, c in buckets if d and c}
+        if not buckets:
+            return
+        dates = [fields.Date.to_string(d) for d, _c in buckets]
+        company_ids = [c for _d, c in buckets]
+        self.env['workshop.order'].flush_model([
+            'state', 'date_done', 'company_id', 'operation_mode', 'process_id',
+            'area_in_total', 'area_out_total', 'area_remnant_total', 'area_loss_total',
+            'yield_percent', 'worked_seconds_closed',
+        ])
+        cr = self.env.cr
+        cr.execute("""
+            DELETE FROM workshop_kpi_daily k
+             USING unnest(%s::date[], %s::int[]) AS b(day, company_id)
+             WHERE k.date = b.day AND k.company_id = b.company_id
+        """, (dates, company_ids))
+        cr.execute("""
+            INSERT INTO workshop_kpi_daily (
+                date, company_id, operation_mode, process_id, done_count,
+                area_in, area_out, area_remnant, area_loss, yield_sum, yield_count,
+                worked_hours, create_uid, create_date, write_uid, write_date
+            )
+            SELECT o.date_done::date, o.company_id, o.operation_mode, o.process_id,
+                   count(*),
+                   coalesce(sum(o.area_in_total), 0),
+                   coalesce(sum(o.area_out_total), 0),
+                   coalesce(sum(o.area_remnant_total), 0),
+                   coalesce(sum(o.area_loss_total), 0),
+                   coalesce(sum(o.yield_percent) FILTER (WHERE coalesce(o.yield_percent, 0) != 0), 0),
+                   count(*) FILTER (WHERE coalesce(o.yield_percent, 0) != 0),
+                   coalesce(sum(o.worked_seconds_closed), 0) / 3600.0,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM workshop_order o
+              JOIN unnest(%(dates)s::date[], %(companies)s::int[]) AS b(day, company_id)
+                ON o.date_done::date = b.day AND o.company_id = b.company_id
+             WHERE o.state = 'done'
+          GROUP BY o.date_done::date, o.company_id, o.operation_mode, o.process_id
+        """, {'uid': self.env.uid, 'dates': dates, 'companies': company_ids})
+        self.invalidate_model()
+
+    @api.model
+    def _cron_backfill(self, days=KPI_DAILY_CRON_DAYS):
+        """Cron: rellena el resumen.
+
+        Si la tabla está vacía (primera corrida) recorre todo el histórico; si
+        no, vuelve a cuadrar los últimos `days` días por si algo se escapó.
+        """
+        cr = self.env.cr
+        cr.execute('SELECT 1 FROM workshop_kpi_daily LIMIT 1')
+        full = not cr.fetchone()
+        self.env['workshop.order'].flush_model(['state', 'date_done', 'company_id'])
+        if full:
+            cr.execute("""
+                SELECT DISTINCT date_done::date, company_id
+                  FROM workshop_order
+                 WHERE state = 'done' AND date_done IS NOT NULL
+            """)
+        else:
+            since = fields.Date.context_today(self) - timedelta(days=days)
+            cr.execute("""
+                SELECT DISTINCT date_done::date, company_id
+                  FROM workshop_order
+                 WHERE state = 'done' AND date_done >= %s
+            """, (since,))
+        buckets = set(cr.fetchall())
+        if not full:
+            # Días que quedaron sin órdenes terminadas (todo se reabrió).
+            cr.execute(
+                'SELECT DISTINCT date, company_id FROM workshop_kpi_daily WHERE date >= %s',
+                (since,),
+            )
+            buckets |= set(cr.fetchall())
+        self._refresh_buckets(buckets)
+        _logger.info('[STONE WORKSHOP] resumen diario de KPIs: %s día(s) recalculados.', len(buckets))
+        return True
+
+    # ─── Series para gráficas ───────────────────────────────────────────────
+    @api.model
+    def get_kpi_trend(self, days=14):
+        """Serie diaria de los últimos `days` días (incluye hoy) para gráficas.
+
+        Agrega el resumen por día para las compañías activas; los días sin
+        cierres salen en cero para que el eje sea continuo.
+        """
+        days = max(1, min(int(days or 14), 366))
+        today = fields.Date.context_today(self)
+        start = today - timedelta(days=days - 1)
+        groups = self._read_group(
+            [('date', '>=', start), ('company_id', 'in', self.env.companies.ids)],
+            ['date:day', 'operation_mode'],
+            [
+                'done_count:sum', 'area_in:sum', 'area_out:sum', 'area_loss:sum',
+                'yield_sum:sum', 'yield_count:sum', 'worked_hours:sum',
+            ],
+        )
+        by_day = {}
+        for day, mode, done, area_in, area_out, area_loss, y_sum, y_count, hours in groups:
+            row = by_day.setdefault(day, {
+                'done_count': 0, 'area_in': 0.0, 'area_out': 0.0, 'area_loss': 0.0,
+                'yield_sum': 0.0, 'yield_count': 0, 'worked_hours': 0.0,
+                'area_cut': 0.0, 'area_finish': 0.0, 'area_format': 0.0,
+            })
+            row['done_count'] += done
+            row['area_in'] += area_in
+            row['area_out'] += area_out
+            row['area_loss'] += area_loss
+            row['yield_sum'] += y_sum
+            row['yield_count'] += y_count
+            row['worked_hours'] += hours
+            if mode == 'slab_cut':
+                row['area_cut'] += area_out
+            elif mode == 'slab_finish':
+                row['area_finish'] += area_out
+            elif mode == 'format_process':
+                row['area_format'] += area_out
+
+        series = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            row = by_day.get(day, {})
+            area_in = row.get('area_in', 0.0)
+            y_count = row.get('yield_count', 0)
+            series.append({
+                'date': fields.Date.to_string(day),
+                'label': self.env['workshop.order']._format_spanish_date(day),
+                'done_count': row.get('done_count', 0),
+                'area_out': row.get('area_out', 0.0),
+                'area_cut': row.get('area_cut', 0.0),
+                'area_finish': row.get('area_finish', 0.0),
+                'area_format': row.get('area_format', 0.0),
+                'area_loss': row.get('area_loss', 0.0),
+                'avg_yield': (row.get('yield_sum', 0.0) / y_count) if y_count else 0.0,
+                'loss_percent': (row.get('area_loss', 0.0) / area_in * 100.0) if area_in else 0.0,
+                'worked_hours': row.get('worked_hours', 0.0),
+            })
+        return series
+
+
+class WorkshopOrderKpiDaily(models.Model):
+    _inherit = 'workshop.order'
+
+    def _kpi_daily_buckets(self):
+        return {
+            (order.date_done.date(), order.company_id.id)
+            for order in self
+            if order.state == 'done' and order.date_done
+        }
+
+    def _kpi_daily_mark(self, buckets):
+        """Encola días a recalcular; se resuelven una vez, en precommit."""
+        if not buckets:
+            return
+        cr = self.env.cr
+        if KPI_DAILY_DIRTY_KEY not in cr.precommit.data:
+            cr.precommit.data[KPI_DAILY_DIRTY_KEY] = set()
+            env = self.env
+
+            @cr.precommit.add
+            def _refresh_kpi_daily():
+                dirty = env.cr.precommit.data.get(KPI_DAILY_DIRTY_KEY) or set()
+                env['workshop.kpi.daily'].sudo()._refresh_buckets(dirty)
+        cr.precommit.data[KPI_DAILY_DIRTY_KEY].update(buckets)
+
+    def write(self, vals):
+        if not KPI_DAILY_ORDER_FIELDS.intersection(vals):
+            return super().write(vals)
+        before = self._kpi_daily_buckets()
+        res = super().write(vals)
+        self._kpi_daily_mark(before | self._kpi_daily_buckets())
+        return res
+
+    def unlink(self):
+        self._kpi_daily_mark(self._kpi_daily_buckets())
+        return super().unlink()
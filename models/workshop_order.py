@@ -2,14 +2,18 @@ from markupsafe import Markup
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
 from odoo.tools.float_utils import float_compare, float_is_zero
 
 from .som_date_format import som_format_date
+from .workshop_calendar import WorkingCalendar, parse_holidays
 from html import escape
-from datetime import timedelta
+from datetime import datetime, timedelta
 import math
+import psycopg2
 import random
 import string
+import time
 import logging
 import re
 
@@ -39,6 +43,32 @@ DEFAULT_DAILY_CAPACITY_HOURS = 8.0
 # priorizada en la parte superior como la siguiente a retomar).
 PAUSE_TO_QUEUE_HOURS = 24.0
 
+# La carga del panel aplica la regla de 24 h de forma perezosa, pero como mucho
+# una vez por este intervalo (minutos) en cada proceso: el sello de la última
+# corrida vive en memoria ({base: time.monotonic()}) y la corrida se serializa
+# entre procesos con un candado consultivo de PostgreSQL. Nada se escribe para
+# sellarla (escribir un ir.config_parameter vaciaba la caché del registro en
+# todos los workers). El cron horario sigue cubriendo el resto.
+AUTO_PARK_LAZY_INTERVAL_MINUTES = 5
+AUTO_PARK_LOCK_KEY = 718_260_001
+_AUTO_PARK_LAST_RUN = {}
+
+# Rangos de la cola con huecos: mover una tarjeta escribe sólo su fila con un
+# rango entre el de sus vecinos. Si ya no cabe un entero en medio (o el rango se
+# aleja demasiado de cero) se renumera toda la cola con un solo UPDATE.
+QUEUE_RANK_STEP = 1024
+QUEUE_RANK_LIMIT = 2 ** 30
+
+# Placas por página en el selector de bitácora. Si toda la orden cabe en una
+# página el selector la recibe completa; si no, carga cada grupo al expandirlo.
+PROGRESS_SELECTOR_PAGE_SIZE = 80
+
+# Caché corta (segundos) de los KPIs del panel, por base/usuario/compañías/día
+# (las reglas de registro dependen del usuario). Una entrada también caduca en
+# cuanto avanza la revisión del tablero.
+WORKSHOP_KPI_CACHE_TTL = 30.0
+_WORKSHOP_KPI_CACHE = {}
+
 # Catálogo de motivos de pausa del cronómetro de taller. Se comparte entre la
 # sesión de trabajo y el wizard de pausa para mantener una sola fuente.
 WORKSHOP_PAUSE_REASONS = [
@@ -96,6 +126,13 @@ class WorkshopOrder(models.Model):
         ondelete='restrict',
     )
     process_type = fields.Selection(related='process_id.process_type', store=True, readonly=True)
+    workcenter_id = fields.Many2one(
+        'workshop.workcenter', string='Centro de trabajo', tracking=True,
+        ondelete='set null', index=True,
+        domain="[('company_id', '=', company_id)]",
+        help='Centro fijo para esta orden. Vacío: el programador de la cola la '
+             'asigna al primer centro libre donde corre su proceso.',
+    )
     default_product_out_id = fields.Many2one(
         'product.product',
         string='Producto salida principal',
@@ -224,6 +261,20 @@ class WorkshopOrder(models.Model):
     has_estimate = fields.Boolean(
         string='Tiene estimado', compute='_compute_estimate', store=True,
     )
+    estimate_rate = fields.Float(
+        string='Min/m² aplicado', compute='_compute_estimate', store=True, digits=(12, 4),
+        help='Minutos por m² con que se calculó el estimado: el aprendido del '
+             'historial si está activo y hay muestra, si no el del servicio.',
+    )
+    estimate_source = fields.Selection([
+        ('process', 'Servicio'),
+        ('learned', 'Aprendido del historial'),
+    ], string='Origen del estimado', compute='_compute_estimate', store=True)
+    estimate_thickness_cm = fields.Float(
+        string='Espesor de referencia (cm)', compute='_compute_estimate_thickness',
+        store=True, digits=(12, 2),
+        help='Espesor promedio de las entradas; elige la banda del estimado aprendido.',
+    )
     remaining_minutes = fields.Float(
         string='Tiempo restante (min)', compute='_compute_estimate_progress', digits=(12, 2),
         help='Estimado − trabajado. Se congela al pausar el cronómetro.',
@@ -709,17 +760,9 @@ class WorkshopOrder(models.Model):
            folio ST tecleado a mano) se toma el siguiente número.
         """
         self.ensure_one()
-        seq = self.env['ir.sequence'].sudo()
         Lot = self.env['stock.lot'].sudo().with_context(active_test=False)
         for _attempt in range(500):
-            number = seq.next_by_code('stone.workshop.st.lot')
-            if not number:
-                raise UserError(_(
-                    'No existe la secuencia de folios de taller '
-                    '(stone.workshop.st.lot). Actualiza el módulo '
-                    'stone_workshop.'))
-            letter = random.choice(string.ascii_uppercase)
-            candidate = 'ST%s-%s' % (letter, number)
+            candidate = self._somt_lot_candidate()
             if Lot.search_count([('name', '=', candidate)]):
                 continue
             output_exists = bool(self.output_line_ids.filtered(
@@ -731,6 +774,17 @@ class WorkshopOrder(models.Model):
                 return candidate
         raise UserError(_('No se pudo obtener un folio ST libre.'))
 
+    @api.model
+    def _somt_lot_candidate(self):
+        """Un folio ST<letra>-N sin validar (consume un número de la secuencia)."""
+        number = self.env['ir.sequence'].sudo().next_by_code('stone.workshop.st.lot')
+        if not number:
+            raise UserError(_(
+                'No existe la secuencia de folios de taller '
+                '(stone.workshop.st.lot). Actualiza el módulo '
+                'stone_workshop.'))
+        return 'ST%s-%s' % (random.choice(string.ascii_uppercase), number)
+
     def _get_active_input_lines(self):
         self.ensure_one()
         return self.input_line_ids.filtered(lambda l: l.state != 'cancelled')
@@ -949,15 +1003,31 @@ class WorkshopOrder(models.Model):
         return '%02d:%02d:%02d' % (hours, minutes, secs)
 
     # ─── Motor de tiempo estimado ───────────────────────────────────────────
-    @api.depends('minutes_per_sqm', 'production_target_sqm')
+    @api.depends(
+        'minutes_per_sqm', 'production_target_sqm', 'company_id',
+        'input_product_id.categ_id', 'estimate_thickness_cm',
+    )
     def _compute_estimate(self):
+        learned = self.env['workshop.estimate.coef']._learned_rates(self)
         for rec in self:
-            minutes = (rec.minutes_per_sqm or 0.0) * (rec.production_target_sqm or 0.0)
+            rate, source = learned.get(rec) or (rec.minutes_per_sqm or 0.0, 'process')
+            minutes = rate * (rec.production_target_sqm or 0.0)
+            rec.estimate_rate = rate
+            rec.estimate_source = source
             rec.estimated_minutes = minutes
             rec.estimated_hours = minutes / 60.0
             rec.estimated_days = (minutes / 60.0) / WORKSHOP_HOURS_PER_DAY
             rec.has_estimate = minutes > 0.0
 
+    @api.depends('input_line_ids.thickness_cm', 'input_line_ids.state')
+    def _compute_estimate_thickness(self):
+        for rec in self:
+            values = [
+                line.thickness_cm for line in rec.input_line_ids
+                if line.thickness_cm > 0 and line.state not in ('rejected', 'cancelled')
+            ]
+            rec.estimate_thickness_cm = (sum(values) / len(values)) if values else 0.0
+
     @api.depends('estimated_minutes', 'worked_seconds')
     def _compute_estimate_progress(self):
         for rec in self:
@@ -985,6 +1055,29 @@ class WorkshopOrder(models.Model):
             value = 0.0
         return value if value > 0.0 else DEFAULT_DAILY_CAPACITY_HOURS
 
+    # Campos almacenados de las órdenes activas (borrador + en taller) que
+    # comparten la capacidad, los KPIs y el orden de las listas del panel.
+    _WORKSHOP_ACTIVE_ROW_FIELDS = [
+        'state', 'parked_in_queue', 'queue_sequence', 'create_date', 'date_start',
+        'operation_mode', 'estimated_minutes', 'worked_seconds_closed', 'area_in_total',
+        'process_id', 'workcenter_id',
+    ]
+
+    @api.model
+    def _workshop_active_order_rows(self):
+        """Un solo `search_read` de las órdenes activas de las compañías vigentes.
+
+        Solo campos ALMACENADOS: evita disparar la cascada de cómputos en vivo
+        (worked_seconds/remaining_minutes) por cada registro.
+        """
+        return self.search_read(
+            [
+                ('company_id', 'in', self.env.companies.ids),
+                ('state', 'in', ('draft', 'in_workshop')),
+            ],
+            self._WORKSHOP_ACTIVE_ROW_FIELDS,
+        )
+
     @api.model
     def get_workshop_capacity_overview(self):
         """Indicador global 'próximo espacio en taller'.
@@ -993,16 +1086,13 @@ class WorkshopOrder(models.Model):
         suma de días por trabajo. Backlog = estimado de la cola de borradores +
         lo que falta de las órdenes en taller.
         """
-        capacity_hours = self._get_daily_capacity_hours()
+        return self._workshop_capacity_from_rows(self._workshop_active_order_rows())
 
-        # Solo campos ALMACENADOS vía search_read: evita disparar la cascada de
-        # cómputos en vivo (worked_seconds/remaining_minutes) por cada registro,
-        # que era lo que hacía lento el panel.
-        draft_rows = self.search_read([('state', '=', 'draft')], ['estimated_minutes'])
-        iw_rows = self.search_read(
-            [('state', '=', 'in_workshop')],
-            ['estimated_minutes', 'worked_seconds_closed'],
-        )
+    @api.model
+    def _workshop_capacity_from_rows(self, rows):
+        capacity_hours = self._get_daily_capacity_hours()
+        draft_rows = [r for r in rows if r['state'] == 'draft']
+        iw_rows = [r for r in rows if r['state'] == 'in_workshop']
 
         backlog_minutes = sum((r['estimated_minutes'] or 0.0) for r in draft_rows)
         # Restante por orden = max(0, estimado − trabajado cerrado). Se ignora el
@@ -1014,7 +1104,7 @@ class WorkshopOrder(models.Model):
         backlog_hours = backlog_minutes / 60.0
         next_slot_days = (backlog_hours / capacity_hours) if capacity_hours > 0 else 0.0
 
-        # Fecha proyectada saltando los domingos (días no laborables).
+        # Fecha proyectada saltando domingos y feriados (días no laborables).
         today = fields.Date.context_today(self)
         next_slot_date = self._add_working_days(today, next_slot_days)
         return {
@@ -1027,27 +1117,25 @@ class WorkshopOrder(models.Model):
         }
 
     @api.model
-    def _add_working_days(self, start_date, working_days):
-        """Suma días hábiles a una fecha, saltando los domingos.
+    def _get_workshop_calendar(self):
+        """Calendario laboral del taller: domingos + feriados configurados."""
+        raw = self.env['ir.config_parameter'].sudo().get_param('stone_workshop.holidays')
+        return WorkingCalendar(WORKSHOP_NON_WORKING_WEEKDAYS, parse_holidays(raw))
+
+    @api.model
+    def _add_working_days(self, start_date, working_days, calendar=None):
+        """Suma días hábiles a una fecha, saltando domingos y feriados.
 
         `working_days` es la carga pendiente expresada en días de capacidad; se
         redondea hacia arriba (la fecha es el primer día hábil en que hay espacio).
-        Si es 0, devuelve la misma fecha (hay espacio hoy).
+        Si es 0, devuelve la misma fecha (hay espacio hoy) o el siguiente día
+        hábil si hoy no se labora.
         """
+        calendar = calendar or self._get_workshop_calendar()
         days_to_add = int(math.ceil(working_days - 0.0001)) if working_days > 0 else 0
-        result = start_date
-        added = 0
-        # Guarda de seguridad por si working_days fuera enorme.
-        guard = 0
-        while added < days_to_add and guard < 100000:
-            guard += 1
-            result = result + timedelta(days=1)
-            if result.weekday() not in WORKSHOP_NON_WORKING_WEEKDAYS:
-                added += 1
-        # Si la fecha de hoy cae en domingo, empuja al siguiente día hábil.
-        while result.weekday() in WORKSHOP_NON_WORKING_WEEKDAYS:
-            result = result + timedelta(days=1)
-        return result
+        if days_to_add <= 0:
+            return calendar.next_working_day(start_date)
+        return calendar.add_working_days(start_date, days_to_add)
 
     @api.model
     def _format_spanish_date(self, value):
@@ -1095,61 +1183,159 @@ class WorkshopOrder(models.Model):
         """Diccionario con todo lo que la tarjeta del panel necesita de una orden.
 
         Incluye el suministro (qué se consume / qué se produce) y los datos del
-        cronómetro en vivo. La integración de ventas extiende esto con el cliente,
-        el vendedor y el pedido vía `_workshop_board_payload_extend`.
+        cronómetro en vivo. Es la versión de un registro de
+        `_workshop_board_payloads`, que es la que usa el panel.
         """
         self.ensure_one()
-        target = self.production_target_sqm or self.area_in_total or 0.0
-        done = self.area_out_total or 0.0
-        progress = min(100, round((done / target) * 100)) if target > 0 else 0
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'state': self.state,
-            'operation_mode': self.operation_mode,
-            'process': self.process_id.display_name if self.process_id else '',
-            'responsible': self.responsible_id.name if self.responsible_id else '',
-            'consume_product': self._workshop_consume_product_label(),
-            'produce_product': self._workshop_produce_product_label(),
-            'queue_sequence': self.queue_sequence,
-            'production_target_sqm': self.production_target_sqm,
-            'area_in_total': self.area_in_total,
-            'area_out_total': self.area_out_total,
-            'input_count': self.input_count,
-            'progress_log_count': self.progress_log_count,
-            'progress': progress,
-            'target_area': target,
-            'done_area': done,
-            'estimated_days': self.estimated_days or 0.0,
-            'has_estimate': bool(self.has_estimate),
-            'estimated_minutes': self.estimated_minutes or 0.0,
-            'date_planned': fields.Datetime.to_string(self.date_planned) if self.date_planned else False,
-            # Cronómetro en vivo.
-            'timer_running': bool(self.timer_running),
-            'active_session_start': (
-                fields.Datetime.to_string(self.active_session_start) if self.active_session_start else False
-            ),
-            'worked_seconds_closed': self.worked_seconds_closed or 0.0,
-            # Regla 24 h.
-            'parked_in_queue': bool(self.parked_in_queue),
-            'date_last_pause': (
-                fields.Datetime.to_string(self.date_last_pause) if self.date_last_pause else False
-            ),
-            'auto_parked_at': (
-                fields.Datetime.to_string(self.auto_parked_at) if self.auto_parked_at else False
-            ),
-            # Datos comerciales (los rellena la integración de ventas si está).
-            'sale_order': '',
-            'sale_partner': '',
-            'sale_user': '',
-            'sale_product': '',
-            'sale_requested_qty': 0.0,
+        return self._workshop_board_payloads()[0]
+
+    # Campos almacenados de la orden que la tarjeta lee de un solo `read`.
+    _WORKSHOP_BOARD_READ_FIELDS = (
+        'name', 'state', 'operation_mode', 'process_id', 'responsible_id',
+        'input_product_id', 'default_product_out_id', 'remnant_product_id',
+        'queue_sequence', 'production_target_sqm', 'area_in_total', 'area_out_total',
+        'estimated_days', 'has_estimate', 'estimated_minutes', 'date_planned',
+        'worked_seconds_closed', 'parked_in_queue', 'date_last_pause', 'auto_parked_at',
+    )
+
+    def _workshop_board_payloads(self):
+        """Tarjetas del panel para todas las órdenes de `self`, en lote.
+
+        Hace un número fijo de consultas sin importar cuántas tarjetas haya:
+        campos de la orden (y nombres de sus many2one) en un solo `read`, primera
+        entrada/salida por orden para las etiquetas de suministro, conteos con
+        `_read_group` y la sesión abierta del cronómetro. Respeta el orden de
+        `self`. La integración de ventas enriquece todas las tarjetas de una vez
+        vía `_workshop_board_payloads_extend`.
+        """
+        if not self:
+            return []
+        order_ids = self.ids
+        rows = {row['id']: row for row in self.read(list(self._WORKSHOP_BOARD_READ_FIELDS))}
+
+        def _m2o_name(value):
+            return value[1] if value else ''
+
+        # Primera entrada activa (orden de la línea) de las órdenes sin producto
+        # de entrada explícito.
+        consume_labels = {}
+        need_input = [oid for oid in order_ids if not rows[oid]['input_product_id']]
+        if need_input:
+            for line in self.env['workshop.input.line'].search_read(
+                [('order_id', 'in', need_input), ('state', '!=', 'cancelled')],
+                ['order_id', 'product_id'],
+            ):
+                consume_labels.setdefault(line['order_id'][0], _m2o_name(line['product_id']))
+
+        # Primera salida útil activa de las órdenes sin producto de salida.
+        produce_labels = {}
+        need_output = [oid for oid in order_ids if not rows[oid]['default_product_out_id']]
+        if need_output:
+            for line in self.env['workshop.output.line'].search_read(
+                [
+                    ('order_id', 'in', need_output),
+                    ('state', '!=', 'cancelled'),
+                    ('output_type', 'in', ('finished_slab', 'format_piece')),
+                ],
+                ['order_id', 'product_id'],
+            ):
+                produce_labels.setdefault(line['order_id'][0], _m2o_name(line['product_id']))
+
+        input_counts = {
+            order.id: count
+            for order, count in self.env['workshop.input.line']._read_group(
+                [('order_id', 'in', order_ids)], ['order_id'], ['__count'],
+            )
+        }
+        log_counts = {
+            order.id: count
+            for order, count in self.env['workshop.progress.log']._read_group(
+                [('order_id', 'in', order_ids)], ['order_id'], ['__count'],
+            )
         }
-        self._workshop_board_payload_extend(data)
-        return data
+
+        # Sesión abierta más reciente por orden (misma regla que `_compute_timer`).
+        open_starts = {}
+        for session in self.env['workshop.work.session'].search_read(
+            [('order_id', 'in', order_ids), ('end', '=', False)],
+            ['order_id', 'start'],
+        ):
+            open_starts.setdefault(session['order_id'][0], session['start'])
+
+        def _dt_str(value):
+            return fields.Datetime.to_string(value) if value else False
+
+        payloads = []
+        for oid in order_ids:
+            row = rows[oid]
+            target = row['production_target_sqm'] or row['area_in_total'] or 0.0
+            done = row['area_out_total'] or 0.0
+            progress = min(100, round((done / target) * 100)) if target > 0 else 0
+            if row['input_product_id']:
+                consume_product = _m2o_name(row['input_product_id'])
+            else:
+                consume_product = consume_labels.get(oid, '')
+            if row['default_product_out_id']:
+                produce_product = _m2o_name(row['default_product_out_id'])
+            else:
+                produce_product = produce_labels.get(oid) or _m2o_name(row['remnant_product_id'])
+            active_start = open_starts.get(oid)
+            payloads.append({
+                'id': oid,
+                'name': row['name'],
+                'state': row['state'],
+                'operation_mode': row['operation_mode'],
+                'process': _m2o_name(row['process_id']),
+                'responsible': _m2o_name(row['responsible_id']),
+                'consume_product': consume_product,
+                'produce_product': produce_product,
+                'queue_sequence': row['queue_sequence'],
+                'production_target_sqm': row['production_target_sqm'],
+                'area_in_total': row['area_in_total'],
+                'area_out_total': row['area_out_total'],
+                'input_count': input_counts.get(oid, 0),
+                'progress_log_count': log_counts.get(oid, 0),
+                'progress': progress,
+                'target_area': target,
+                'done_area': done,
+                'estimated_days': row['estimated_days'] or 0.0,
+                'has_estimate': bool(row['has_estimate']),
+                'estimated_minutes': row['estimated_minutes'] or 0.0,
+                'date_planned': _dt_str(row['date_planned']),
+                # Cronómetro en vivo.
+                'timer_running': bool(active_start),
+                'active_session_start': _dt_str(active_start),
+                'worked_seconds_closed': row['worked_seconds_closed'] or 0.0,
+                # Regla 24 h.
+                'parked_in_queue': bool(row['parked_in_queue']),
+                'date_last_pause': _dt_str(row['date_last_pause']),
+                'auto_parked_at': _dt_str(row['auto_parked_at']),
+                # Datos comerciales (los rellena la integración de ventas si está).
+                'sale_order': '',
+                'sale_partner': '',
+                'sale_user': '',
+                'sale_product': '',
+                'sale_requested_qty': 0.0,
+            })
+        self._workshop_board_payloads_extend(payloads)
+        return payloads
+
+    def _workshop_board_payloads_extend(self, payloads):
+        """Punto de extensión en lote: enriquece las tarjetas de `self` a la vez.
+
+        `payloads` va en el mismo orden que `self`. Las integraciones deberían
+        sobrescribir este método (una consulta para todas las tarjetas); por
+        compatibilidad, la base sigue llamando al hook por registro.
+        """
+        for order, data in zip(self, payloads):
+            order._workshop_board_payload_extend(data)
+        return payloads
 
     def _workshop_board_payload_extend(self, data):
-        """Punto de extensión para enriquecer la tarjeta del panel (no-op en base)."""
+        """Punto de extensión por tarjeta (no-op en base).
+
+        Se conserva por compatibilidad; preferir `_workshop_board_payloads_extend`.
+        """
         return data
 
     @api.model
@@ -1157,35 +1343,80 @@ class WorkshopOrder(models.Model):
         """Cola priorizada (borradores + estacionadas) y órdenes en ejecución.
 
         Aplica de forma perezosa la regla de 24 h al cargar el panel, para que la
-        devolución a la cola se refleje aunque el cron aún no haya corrido. Se hace
-        con sudo y a prueba de fallos: un vendedor (solo lectura) no debe romper el
-        panel ni quedarse sin la actualización (el cron horario la cubre igual).
+        devolución a la cola se refleje aunque el cron aún no haya corrido.
+        """
+        self._workshop_board_lazy_auto_park()
+        return self._workshop_board_lists()
+
+    @api.model
+    def _workshop_board_lazy_auto_park(self):
+        """Regla de 24 h perezosa, con sudo y a prueba de fallos.
+
+        Un vendedor (solo lectura) no debe romper el panel ni quedarse sin la
+        actualización (el cron horario la cubre igual). Devuelve las órdenes
+        estacionadas en esta llamada.
         """
         try:
-            self.sudo().search([
-                ('state', '=', 'in_workshop'),
-                ('parked_in_queue', '=', False),
-            ])._auto_park_stale_paused_orders()
+            # Savepoint: un conflicto de concurrencia al estacionar no debe
+            # abortar la transacción de lectura del panel.
+            with self.env.cr.savepoint():
+                return self._lazy_auto_park_paused_orders()
+        except psycopg2.OperationalError:
+            # Otro proceso tocó las mismas órdenes: el cron (o la siguiente
+            # carga) lo reintenta; no es un error que valga un traceback.
+            _logger.info('[STONE WORKSHOP] auto-park perezoso cedió por concurrencia.')
         except Exception:  # noqa: BLE001 - nunca debe tumbar la carga del panel
             _logger.exception('[STONE WORKSHOP] auto-park perezoso falló; lo cubrirá el cron.')
+        return self.browse()
 
-        queue = self.search(
-            [
-                '|',
-                ('state', '=', 'draft'),
-                '&', ('state', '=', 'in_workshop'), ('parked_in_queue', '=', True),
-            ],
-            order='parked_in_queue desc, queue_sequence asc, create_date asc, id asc',
-            limit=30,
+    @api.model
+    def _workshop_board_lists(self, rows=None):
+        """Tarjetas de la cola priorizada y de las órdenes en ejecución.
+
+        Con `rows` (de `_workshop_active_order_rows`) las listas se ordenan en
+        memoria con el mismo criterio que el SQL, sin volver a buscar.
+        """
+        if rows is None:
+            queue = self.search(
+                [
+                    '|',
+                    ('state', '=', 'draft'),
+                    '&', ('state', '=', 'in_workshop'), ('parked_in_queue', '=', True),
+                ],
+                order='parked_in_queue desc, queue_sequence asc, create_date asc, id asc',
+                limit=30,
+            )
+            execution = self.search(
+                [('state', '=', 'in_workshop'), ('parked_in_queue', '=', False)],
+                order='date_start asc, id asc',
+                limit=30,
+            )
+        else:
+            ids = self._workshop_board_ids_from_rows(rows)
+            queue = self.browse(ids['queue'])
+            execution = self.browse(ids['execution'])
+        return {
+            'queue': queue._workshop_board_payloads(),
+            'execution': execution._workshop_board_payloads(),
+        }
+
+    @api.model
+    def _workshop_board_ids_from_rows(self, rows, limit=30):
+        """IDs de la cola y de ejecución ordenados como en el panel."""
+        queue_rows = sorted(
+            (r for r in rows if r['state'] == 'draft' or r['parked_in_queue']),
+            key=lambda r: (not r['parked_in_queue'], r['queue_sequence'], r['create_date'], r['id']),
         )
-        execution = self.search(
-            [('state', '=', 'in_workshop'), ('parked_in_queue', '=', False)],
-            order='date_start asc, id asc',
-            limit=30,
+        # Igual que `date_start asc, id asc` de PostgreSQL: los nulos al final
+        # y, entre ellos, sólo por id (nada de desempatar por create_date).
+        # search_read devuelve False (no None) para la fecha vacía.
+        execution_rows = sorted(
+            (r for r in rows if r['state'] == 'in_workshop' and not r['parked_in_queue']),
+            key=lambda r: (not r['date_start'], r['date_start'] or datetime.min, r['id']),
         )
         return {
-            'queue': [o._workshop_board_payload() for o in queue],
-            'execution': [o._workshop_board_payload() for o in execution],
+            'queue': [r['id'] for r in queue_rows[:limit]],
+            'execution': [r['id'] for r in execution_rows[:limit]],
         }
 
     @api.model
@@ -1193,54 +1424,105 @@ class WorkshopOrder(models.Model):
         """KPIs del panel del taller. Solo lo que aporta valor operativo del día.
 
         Devuelve cierres del día, m² cortados vs acabados, rendimiento y merma del
-        día, y el trabajo en proceso (placas y m² en taller).
+        día, y el trabajo en proceso (placas y m² en taller). Se sirve desde una
+        caché corta por usuario y compañía que se invalida en cuanto avanza la revisión
+        del tablero (cambios de estado, cola, sesiones…).
         """
-        today_start = fields.Datetime.to_string(
-            fields.Datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        )
-        done_today = self.search_read(
-            [('state', '=', 'done'), ('date_done', '>=', today_start)],
-            ['operation_mode', 'area_out_total', 'area_in_total', 'area_loss_total', 'yield_percent'],
-        )
-        in_workshop = self.search_read(
-            [('state', '=', 'in_workshop')],
-            ['area_in_total', 'input_count', 'parked_in_queue'],
-        )
-        active = self.search_read(
-            [('state', 'in', ('draft', 'in_workshop'))],
-            ['operation_mode'],
-        )
-
-        def _mode(mode):
-            return sum(1 for r in active if r['operation_mode'] == mode)
+        today = fields.Date.context_today(self)
+        # `su` en la clave: una llamada con sudo() ve más que la del mismo usuario.
+        key = (self.env.cr.dbname, self.env.uid, self.env.su, tuple(sorted(self.env.companies.ids)), today)
+        revision = self._workshop_board_revision()
+        now = time.monotonic()
+        cached = _WORKSHOP_KPI_CACHE.get(key)
+        if cached and cached[0] > now and cached[1] == revision:
+            return dict(cached[2])
+        kpis = self._workshop_kpis_compute()
+        # Una entrada por usuario: se barren las caducadas para no acumularlas.
+        for expired in [k for k, v in _WORKSHOP_KPI_CACHE.items() if v[0] <= now]:
+            _WORKSHOP_KPI_CACHE.pop(expired, None)
+        _WORKSHOP_KPI_CACHE[key] = (now + WORKSHOP_KPI_CACHE_TTL, revision, kpis)
+        return dict(kpis)
 
-        def _area(rows, modes):
-            return sum((r['area_out_total'] or 0.0) for r in rows if r['operation_mode'] in modes)
+    @api.model
+    def _workshop_kpis_compute(self):
+        """Calcula los KPIs con UNA consulta agregada (sin caché).
 
-        yields = [r['yield_percent'] for r in done_today if r.get('yield_percent')]
-        loss_today = sum((r['area_loss_total'] or 0.0) for r in done_today)
-        out_today = sum((r['area_out_total'] or 0.0) for r in done_today)
-        in_today = sum((r['area_in_total'] or 0.0) for r in done_today)
+        Se parte del `Query` del ORM (respeta reglas de registro y compañía) y
+        se agregan con `FILTER` las cifras del día (terminadas hoy) y las del
+        trabajo en proceso; así el costo no crece con Python sobre el backlog.
+        """
+        today_start = fields.Datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        query = self._search([
+            ('company_id', 'in', self.env.companies.ids),
+            '|',
+            ('state', 'in', ('draft', 'in_workshop')),
+            '&', ('state', '=', 'done'), ('date_done', '>=', today_start),
+        ])
+        self.flush_model([
+            'state', 'operation_mode', 'parked_in_queue', 'area_in_total',
+            'area_out_total', 'area_loss_total', 'yield_percent',
+        ])
+        self.env['workshop.input.line'].flush_model(['order_id'])
+
+        def col(name):
+            return SQL.identifier(query.table, name)
+
+        done = SQL("%s = 'done'", col('state'))
+        wip = SQL("%s = 'in_workshop'", col('state'))
+        active = SQL("%s IN ('draft', 'in_workshop')", col('state'))
+        aggregates = SQL(
+            """
+            count(*) FILTER (WHERE %(done)s),
+            coalesce(sum(%(out)s) FILTER (WHERE %(done)s AND %(mode)s = 'slab_cut'), 0),
+            coalesce(sum(%(out)s) FILTER (WHERE %(done)s AND %(mode)s = 'slab_finish'), 0),
+            coalesce(sum(%(out)s) FILTER (WHERE %(done)s AND %(mode)s = 'format_process'), 0),
+            coalesce(sum(%(out)s) FILTER (WHERE %(done)s), 0),
+            coalesce(sum(%(inp)s) FILTER (WHERE %(done)s), 0),
+            coalesce(sum(%(loss)s) FILTER (WHERE %(done)s), 0),
+            coalesce(sum(%(yld)s) FILTER (WHERE %(done)s AND coalesce(%(yld)s, 0) != 0), 0),
+            count(*) FILTER (WHERE %(done)s AND coalesce(%(yld)s, 0) != 0),
+            count(*) FILTER (WHERE %(wip)s),
+            coalesce(sum(%(inp)s) FILTER (WHERE %(wip)s), 0),
+            coalesce(sum((
+                SELECT count(*) FROM workshop_input_line l WHERE l.order_id = %(id)s
+            )) FILTER (WHERE %(wip)s), 0),
+            count(*) FILTER (WHERE %(wip)s AND %(parked)s IS TRUE),
+            count(*) FILTER (WHERE %(active)s AND %(mode)s = 'slab_finish'),
+            count(*) FILTER (WHERE %(active)s AND %(mode)s = 'slab_cut'),
+            count(*) FILTER (WHERE %(active)s AND %(mode)s = 'format_process'),
+            count(*) FILTER (WHERE %(active)s AND %(mode)s = 'rework')
+            """,
+            done=done, wip=wip, active=active,
+            id=col('id'), mode=col('operation_mode'), parked=col('parked_in_queue'),
+            out=col('area_out_total'), inp=col('area_in_total'),
+            loss=col('area_loss_total'), yld=col('yield_percent'),
+        )
+        self.env.cr.execute(query.select(aggregates))
+        (
+            done_today, area_cut, area_finish, area_format, out_today, in_today, loss_today,
+            yield_sum, yield_count, wip_orders, wip_area, wip_slabs, parked_orders,
+            mode_finish, mode_cut, mode_format, mode_rework,
+        ) = self.env.cr.fetchone()
 
         return {
-            'done_today': len(done_today),
-            'area_cut_today': _area(done_today, ('slab_cut',)),
-            'area_finish_today': _area(done_today, ('slab_finish',)),
-            'area_format_today': _area(done_today, ('format_process',)),
-            'avg_yield_today': (sum(yields) / len(yields)) if yields else 0.0,
+            'done_today': done_today,
+            'area_cut_today': area_cut,
+            'area_finish_today': area_finish,
+            'area_format_today': area_format,
+            'avg_yield_today': (yield_sum / yield_count) if yield_count else 0.0,
             'loss_today': loss_today,
             'loss_percent_today': (loss_today / in_today * 100.0) if in_today > 0 else 0.0,
             'area_done_today': out_today,
             # Trabajo en proceso (en taller ahora mismo).
-            'wip_orders': len(in_workshop),
-            'wip_area': sum((r['area_in_total'] or 0.0) for r in in_workshop),
-            'wip_slabs': sum((r['input_count'] or 0) for r in in_workshop),
-            'parked_orders': sum(1 for r in in_workshop if r.get('parked_in_queue')),
+            'wip_orders': wip_orders,
+            'wip_area': wip_area,
+            'wip_slabs': wip_slabs,
+            'parked_orders': parked_orders,
             'mode_stats': {
-                'slab_finish': _mode('slab_finish'),
-                'slab_cut': _mode('slab_cut'),
-                'format_process': _mode('format_process'),
-                'rework': _mode('rework'),
+                'slab_finish': mode_finish,
+                'slab_cut': mode_cut,
+                'format_process': mode_format,
+                'rework': mode_rework,
             },
         }
 
@@ -2137,6 +2419,27 @@ class WorkshopOrder(models.Model):
             rec.message_post(body=_('Orden confirmada y material enviado a taller.'))
         return True
 
+    def _workshop_timer_moment(self, floor=None):
+        """Momento de un evento del reloj.
+
+        Normalmente ahora. Si la tableta sincroniza acciones hechas sin red,
+        manda en contexto (`workshop_timer_at`) cuándo ocurrieron: se respeta,
+        pero nunca en el futuro ni antes de `floor` (el evento anterior).
+        """
+        now = fields.Datetime.now()
+        at = self.env.context.get('workshop_timer_at')
+        if not at:
+            return now
+        try:
+            at = fields.Datetime.to_datetime(at)
+        except (TypeError, ValueError):
+            return now
+        if not at or at > now:
+            return now
+        if floor and at < floor:
+            return floor
+        return at
+
     def _start_work_session(self):
         """Abre una sesión de trabajo si no hay ninguna corriendo.
 
@@ -2145,10 +2448,11 @@ class WorkshopOrder(models.Model):
         self.ensure_one()
         if self.work_session_ids.filtered(lambda s: not s.end):
             return self.work_session_ids.filtered(lambda s: not s.end)[:1]
+        last_end = max(self.work_session_ids.mapped('end'), default=None)
         return self.env['workshop.work.session'].create({
             'order_id': self.id,
             'responsible_id': (self.responsible_id.id or self.env.user.id),
-            'start': fields.Datetime.now(),
+            'start': self._workshop_timer_moment(floor=last_end),
         })
 
     def _close_work_session(self, reason=False, note=False):
@@ -2158,7 +2462,7 @@ class WorkshopOrder(models.Model):
         if not open_session:
             return False
         open_session.write({
-            'end': fields.Datetime.now(),
+            'end': self._workshop_timer_moment(floor=open_session.start),
             'pause_reason': reason or open_session.pause_reason,
             'pause_note': note or open_session.pause_note,
         })
@@ -2206,48 +2510,92 @@ class WorkshopOrder(models.Model):
         sigue en taller (su material ya se consumió) pero reaparece arriba en la
         cola priorizada como la siguiente a retomar.
         """
-        self.search([
-            ('state', '=', 'in_workshop'),
-            ('parked_in_queue', '=', False),
-        ])._auto_park_stale_paused_orders()
+        self._auto_park_stale_paused_orders()
         return True
 
+    @api.model
+    def _lazy_auto_park_paused_orders(self):
+        """Regla de 24 h disparada por la carga del panel, con límite de frecuencia.
+
+        Sólo corre si en este proceso pasó `AUTO_PARK_LAZY_INTERVAL_MINUTES`
+        desde la última corrida perezosa. El candado consultivo de transacción
+        evita que varios clientes que abren el panel a la vez la evalúen en
+        paralelo: el que no obtiene el candado sigue de largo sin esperar.
+        """
+        cr = self.env.cr
+        now = time.monotonic()
+        last_run = _AUTO_PARK_LAST_RUN.get(cr.dbname)
+        if last_run and now - last_run < AUTO_PARK_LAZY_INTERVAL_MINUTES * 60:
+            return self.browse()
+        cr.execute('SELECT pg_try_advisory_xact_lock(%s)', (AUTO_PARK_LOCK_KEY,))
+        if not cr.fetchone()[0]:
+            return self.browse()
+        _AUTO_PARK_LAST_RUN[cr.dbname] = now
+        return self.sudo()._auto_park_stale_paused_orders()
+
+    @api.model
+    def _find_stale_paused_order_ids(self, threshold):
+        """IDs de órdenes en taller, sin estacionar, en pausa desde antes de `threshold`.
+
+        Se resuelve en una sola consulta agregada sobre `workshop_work_session`
+        (sin sesión abierta y con el fin de la última sesión ≤ umbral) en lugar
+        de cargar todas las órdenes en taller y evaluar en Python su cronómetro.
+        La más antigua en pausa va primero.
+        """
+        self.env['workshop.work.session'].flush_model(['order_id', 'end'])
+        self.flush_model(['state', 'parked_in_queue'])
+        self.env.cr.execute("""
+            SELECT o.id
+              FROM workshop_order o
+              JOIN workshop_work_session s ON s.order_id = o.id
+             WHERE o.state = 'in_workshop'
+               AND o.parked_in_queue IS NOT TRUE
+          GROUP BY o.id
+            HAVING bool_and(s."end" IS NOT NULL)
+               AND max(s."end") <= %s
+          ORDER BY max(s."end"), o.id
+        """, (threshold,))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
     def _auto_park_stale_paused_orders(self):
-        """Estaciona en la cola las órdenes de `self` que llevan > 24 h en pausa."""
+        """Estaciona en la cola las órdenes que llevan > 24 h en pausa.
+
+        Las estacionadas quedan ARRIBA de los borradores: reciben rangos de la
+        cola (paso `QUEUE_RANK_STEP`) por debajo del mínimo activo (la más
+        antigua en pausa queda más arriba, la siguiente a retomar). Se escriben
+        por el ORM (revisión de tableta, aviso al tablero, seguimiento) y el
+        aviso en el chatter se registra en lote.
+        """
         now = fields.Datetime.now()
         threshold = now - timedelta(hours=PAUSE_TO_QUEUE_HOURS)
-        to_park = self.filtered(
-            lambda o: (
-                o.state == 'in_workshop'
-                and not o.parked_in_queue
-                and not o.timer_running
-                and o.date_last_pause
-                and o.date_last_pause <= threshold
-            )
-        )
-        if not to_park:
+        stale_ids = self._find_stale_paused_order_ids(threshold)
+        if not stale_ids:
             return self.browse()
-        # Las estacionadas quedan ARRIBA de los borradores en la cola: les
-        # asignamos un queue_sequence menor que el mínimo activo. La más antigua
-        # en pausa queda más arriba (la siguiente a retomar).
-        active = self.search([
-            '|',
-            ('state', '=', 'draft'),
-            '&', ('state', '=', 'in_workshop'), ('parked_in_queue', '=', True),
-        ])
-        base_seq = min(active.mapped('queue_sequence') or [10])
-        for offset, order in enumerate(
-            to_park.sorted(lambda o: o.date_last_pause or now), start=1
-        ):
-            order.write({
-                'parked_in_queue': True,
-                'auto_parked_at': now,
-                'queue_sequence': base_seq - offset * 10,
-            })
-            order.message_post(body=_(
-                'Devuelta automáticamente a la cola: estuvo en pausa más de %s h. '
-                'Queda arriba como la siguiente a retomar.'
-            ) % int(PAUSE_TO_QUEUE_HOURS))
+        self.flush_model(['queue_sequence'])
+        self.env.cr.execute("""
+            SELECT min(queue_sequence)
+              FROM workshop_order
+             WHERE state = 'draft'
+                OR (state = 'in_workshop' AND parked_in_queue IS TRUE)
+        """)
+        base_seq = self.env.cr.fetchone()[0]
+        if base_seq is None:
+            base_seq = QUEUE_RANK_STEP
+        if base_seq - len(stale_ids) * QUEUE_RANK_STEP <= -QUEUE_RANK_LIMIT:
+            self._queue_renormalize_ranks()
+            base_seq = QUEUE_RANK_STEP
+        to_park = self.browse(stale_ids)
+        to_park.write({'parked_in_queue': True, 'auto_parked_at': now})
+        # El rango es distinto por orden; son pocas (las que cruzaron el plazo).
+        for offset, order in enumerate(to_park, start=1):
+            order.write({'queue_sequence': base_seq - offset * QUEUE_RANK_STEP})
+        body = _(
+            'Devuelta automáticamente a la cola: estuvo en pausa más de %s h. '
+            'Queda arriba como la siguiente a retomar.'
+        ) % int(PAUSE_TO_QUEUE_HOURS)
+        to_park._message_log_batch(bodies={order_id: body for order_id in stale_ids})
+        _logger.info('[STONE WORKSHOP] auto-park: %s orden(es) devueltas a la cola.', len(stale_ids))
         return to_park
 
     def _guacal_template_vals(self):
@@ -2545,8 +2893,9 @@ class WorkshopOrder(models.Model):
     def _create_produce_picking(self, output_lines):
         self.ensure_one()
         move_specs = []
+        lots = output_lines._ensure_result_lots()
         for line in output_lines:
-            lot = line._ensure_result_lot()
+            lot = lots.get(line.id, False)
             move_specs.append({
                 'product': line.product_id,
                 'qty': line.qty_out,
@@ -2756,43 +3105,210 @@ class WorkshopOrder(models.Model):
         Útil para órdenes donde el lote salió como T-TALLER/...-OBJ o ...-SP
         sin color, bloque, tipo, origen o pedimento. No mueve inventario; solo
         actualiza stock.lot y la referencia de la línea de salida.
+
+        Trabaja por lote de órdenes (ver `_normalize_result_lots_batch`): para
+        todo el histórico conviene lanzarla en segundo plano desde la lista,
+        que la corre en tramos con commit y retoma donde se quedó.
+        """
+        counts = self._normalize_result_lots_batch()
+        if counts:
+            self.browse(list(counts))._message_log_batch(bodies={
+                order_id: _('Se normalizaron %(count)s lote(s) resultado con nombre corto y metadata heredada.') % {'count': count}
+                for order_id, count in counts.items()
+            })
+        return True
+
+    # ─── Normalización de lotes resultado en lote ───────────────────────────
+    def _normalize_result_lots_batch(self):
+        """Normaliza los lotes resultado de todas las órdenes de `self`.
+
+        Equivale a llamar `_get_compact_result_lot_name` y
+        `_sync_result_lot_metadata` salida por salida, pero sin sondear folio
+        por folio contra la base: los folios ocupados de cada base se leen en
+        una sola consulta (`_result_lot_folio_map`) y se resuelven en memoria.
+        Renombres y metadata se escriben al final. Los folios son únicos por
+        lote, así que cada renombre es su propio `write`, en el orden en que se
+        resolvió (ver `_write_names_in_order`). Devuelve
+        {order_id: salidas normalizadas}.
         """
+        plan = []
         for rec in self:
-            updated = 0
-            for output in rec._get_active_output_lines().filtered(lambda l: l.output_type not in ('scrap', 'rejected') and l.product_id):
-                target_area = rec._output_line_area(output)
-                lot = output.lot_id
-                new_name = rec._get_compact_result_lot_name(
+            outputs = rec._get_active_output_lines().filtered(
+                lambda l: l.output_type not in ('scrap', 'rejected') and l.product_id
+            )
+            for output in outputs:
+                source_line = rec._get_result_lot_source_line(
                     output_type=output.output_type,
-                    product=output.product_id,
-                    target_area=target_area,
-                    exclude_output=output,
-                    exclude_lot=lot,
+                    target_area=rec._output_line_area(output),
                 )
-                if lot:
-                    output._sync_result_lot_metadata(lot, force_name=new_name)
-                    output.lot_name = new_name
-                else:
-                    output.lot_name = new_name
-                    output._ensure_result_lot()
-                updated += 1
-            if updated:
-                rec.message_post(body=_('Se normalizaron %(count)s lote(s) resultado con nombre corto y metadata heredada.') % {'count': updated})
-        return True
+                source_lot = source_line.lot_id if source_line else False
+                plan.append((rec, output, source_lot))
+        if not plan:
+            return {}
 
+        workshop_lot_ids = self._workshop_output_lot_ids(
+            self.env['stock.lot'].union(*(lot for _rec, _out, lot in plan if lot))
+        )
 
-    def get_workshop_progress_selector_data(self, current_input_line_ids=None, editing_log_id=None, current_consumptions=None):
-        """Datos para selector visual de placas en cada corrida de bitácora.
+        # Base de folio de cada salida, con la misma regla que
+        # _get_compact_result_lot_name / _generic_next_folio_parts.
+        resolved = []
+        for rec, output, source_lot in plan:
+            base = source_lot.name if source_lot else rec._fallback_compact_order_lot_name()
+            if output.output_type == 'remnant':
+                resolved.append((rec, output, 'unique', '%s-%s' % (base, rec._get_result_lot_suffix('remnant')), None))
+                continue
+            name, number = self._generic_folio_parts_known(base, source_lot, workshop_lot_ids)
+            resolved.append((rec, output, 'generic', name or rec._fallback_compact_order_lot_name(), number))
+
+        taken = self._result_lot_folio_map({item[3] for item in resolved})
+        output_names = {}
+        lot_names = {}
+        lot_renames = []
+        output_renames = []
+        counts = {}
+        for rec, output, kind, base, number in resolved:
+            if rec.id not in output_names:
+                output_names[rec.id] = {
+                    line.id: (line.lot_name or '', line.state)
+                    for line in rec.output_line_ids
+                }
+            siblings = output_names[rec.id]
+            lot = output.lot_id
+            if kind == 'unique':
+                new_name = self._resolve_unique_folio(
+                    taken, siblings, base, output, lot, output.product_id,
+                )
+            else:
+                new_name = self._resolve_generic_folio(
+                    taken, siblings, base, number, output, lot,
+                )
+            # El folio queda ocupado para las salidas siguientes del lote y el
+            # nombre anterior del lote se libera, igual que al normalizar
+            # salida por salida contra la base. Los renombres se escriben en
+            # este mismo orden, así que el nombre ya está libre cuando otro
+            # lote lo toma.
+            taken.setdefault(new_name, []).append((lot.id if lot else 0, output.product_id.id))
+            siblings[output.id] = (new_name, output.state)
+            if lot:
+                old_name = lot_names.get(lot.id, lot.name)
+                if old_name != new_name:
+                    taken[old_name] = [item for item in taken.get(old_name, ()) if item[0] != lot.id]
+                    lot_names[lot.id] = new_name
+                    lot_renames.append((lot.id, new_name))
+            if output.lot_name != new_name:
+                output_renames.append((output.id, new_name))
+            counts[rec.id] = counts.get(rec.id, 0) + 1
+
+        Output = self.env['workshop.output.line']
+        self._write_names_in_order(Output, 'lot_name', output_renames)
+        self._write_names_in_order(self.env['stock.lot'], 'name', lot_renames)
+
+        # Metadata en bloque y lotes faltantes con un solo create.
+        Output.browse([item[1].id for item in resolved])._ensure_result_lots()
+
+        _logger.info(
+            '[STONE WORKSHOP] lotes resultado normalizados: %s orden(es), %s salida(s), '
+            '%s lote(s) renombrado(s).',
+            len(counts), len(resolved), len(lot_names),
+        )
+        return counts
 
-        Devuelve las placas con remanente > 0 (área total − suma consumida en
-        otras corridas). Cuando se edita una corrida existente, las placas que
-        ya tiene asignadas se mantienen para poder editar o quitar.
+    @api.model
+    def _workshop_output_lot_ids(self, lots):
+        """IDs de `lots` que nacieron en el taller, en una consulta.
 
-        Por cada placa se devuelve:
-          - `areaSqm`: m² totales de la placa
-          - `remainingSqm`: m² disponibles para consumir en esta corrida
-          - `consumedInThisLog`: m² ya capturados en esta corrida (si edita)
+        Versión en lote de `_lot_is_workshop_output`.
+        """
+        if not lots:
+            return set()
+        return {
+            lot.id for [lot] in self.env['workshop.output.line'].sudo()._read_group(
+                [('lot_id', 'in', lots.ids), ('state', '!=', 'cancelled')],
+                ['lot_id'],
+            )
+        }
+
+    @api.model
+    def _generic_folio_parts_known(self, source_name, source_lot, workshop_lot_ids):
+        """`_generic_next_folio_parts` con los lotes de taller ya leídos."""
+        name = (source_name or '').strip()
+        match = re.match(r'^(.*?)-(\d+)$', name)
+        if match and match.group(1) and source_lot and source_lot.id in workshop_lot_ids:
+            return match.group(1), int(match.group(2)) + 1
+        return name, 1
+
+    @api.model
+    def _result_lot_folio_map(self, bases):
+        """{folio: [(lot_id, product_id)]} de los lotes (incl. archivados)
+        que ya ocupan `base` o `base-…`, para todas las bases en una consulta."""
+        bases = [base for base in bases if base]
+        if not bases:
+            return {}
+        patterns = [
+            base.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '-%'
+            for base in bases
+        ]
+        self.env['stock.lot'].flush_model(['name', 'product_id'])
+        self.env.cr.execute(SQL(
+            'SELECT name, id, product_id FROM stock_lot WHERE name = ANY(%s) OR name LIKE ANY(%s)',
+            bases, patterns,
+        ))
+        taken = {}
+        for name, lot_id, product_id in self.env.cr.fetchall():
+            taken.setdefault(name, []).append((lot_id, product_id))
+        return taken
+
+    @api.model
+    def _resolve_generic_folio(self, taken, siblings, base, number, output, lot):
+        """Versión en memoria de `_next_generic_lot_name`."""
+        for _attempt in range(500):
+            candidate = '%s-%s' % (base, number)
+            lot_exists = any(
+                not lot or lot_id != lot.id for lot_id, _product_id in taken.get(candidate, ())
+            )
+            output_exists = any(
+                line_id != output.id and state != 'cancelled' and name.strip() == candidate
+                for line_id, (name, state) in siblings.items()
+            )
+            if not lot_exists and not output_exists:
+                return candidate
+            number += 1
+        return '%s-%s' % (base, number)
+
+    @api.model
+    def _resolve_unique_folio(self, taken, siblings, base_name, output, lot, product):
+        """Versión en memoria de `_make_unique_lot_name` (folio por producto)."""
+        candidate = base_name
+        index = 2
+        while True:
+            lot_exists = any(
+                product_id == product.id and (not lot or lot_id != lot.id)
+                for lot_id, product_id in taken.get(candidate, ())
+            )
+            output_exists = any(
+                line_id != output.id and name == candidate
+                for line_id, (name, _state) in siblings.items()
+            )
+            if not lot_exists and not output_exists:
+                return candidate
+            candidate = '%s-%02d' % (base_name, index)
+            index += 1
+
+    @api.model
+    def _write_names_in_order(self, records, fname, renames):
+        """Aplica `renames` ([(id, nombre)]) con un `write` por renombre, en orden.
+
+        Pasa por el ORM (restricción de lote único, overrides de `write`,
+        seguimiento). El orden importa: un nombre que otro registro deja libre
+        se escribe antes de que lo tome el siguiente.
         """
+        for record_id, name in renames:
+            records.browse(record_id).write({fname: name})
+
+    # ─── Selector de placas de bitácora (paginado) ──────────────────────────
+    def _progress_selector_state(self, current_input_line_ids=None, editing_log_id=None, current_consumptions=None):
+        """Selección de la corrida que se edita: ids, consumos aquí y lo ya guardado."""
         self.ensure_one()
 
         def _safe_ids(values):
@@ -2826,6 +3342,8 @@ class WorkshopOrder(models.Model):
                         consumed_in_this_log.get(cons.input_line_id.id, 0.0)
                         + (cons.consumed_sqm or 0.0)
                     )
+        # Lo guardado de esta corrida: se descuenta del libro de consumo.
+        persisted_in_this_log = dict(consumed_in_this_log)
         for raw_id, raw_qty in (current_consumptions or {}).items():
             try:
                 input_id = int(raw_id)
@@ -2836,101 +3354,326 @@ class WorkshopOrder(models.Model):
                 consumed_in_this_log[input_id] = qty
                 if qty > 0.0:
                     selected_ids.add(input_id)
+        return {
+            'selected_ids': selected_ids,
+            'consumed': consumed_in_this_log,
+            'persisted': persisted_in_this_log,
+        }
 
-        # Consumido en TODAS las demás corridas (no esta).
-        consumed_other = {}
-        for log in self.progress_log_ids:
-            if editing_log and log == editing_log:
-                continue
-            for cons in log.consumption_line_ids:
-                if cons.input_line_id and (cons.consumed_sqm or 0.0) > 0.0:
-                    consumed_other[cons.input_line_id.id] = (
-                        consumed_other.get(cons.input_line_id.id, 0.0)
-                        + (cons.consumed_sqm or 0.0)
-                    )
+    def _progress_selector_domain(self, selection, search=None, only_available=False, only_selected=False):
+        """Dominio de las placas que muestra el selector (filtros incluidos).
 
-        groups_map = {}
-
-        # Mostrar todas las placas activas de la orden (las del pick ticket),
-        # sin exigir is_consumed: el usuario no debería tener que "consumir"
-        # antes de poder asignarlas a una corrida de la bitácora.
-        active_lines = self.input_line_ids.filtered(
-            lambda line: line.state != 'cancelled'
-            and line.lot_id
-            and line.product_id
-        ).sorted(lambda line: (
-            line.product_id.display_name or '',
-            line.lot_id.name or '',
-            line.sequence or 0,
-            line.id,
-        ))
+        Todas las placas activas de la orden (las del pick ticket), sin exigir
+        is_consumed: el usuario no debería tener que "consumir" antes de poder
+        asignarlas a una corrida. Se ocultan las que no tienen remanente y no
+        están ya seleccionadas en esta corrida.
+        """
+        self.ensure_one()
+        selected_ids = list(selection['selected_ids'])
+        domain = [
+            ('order_id', '=', self.id),
+            ('state', '!=', 'cancelled'),
+            ('lot_id', '!=', False),
+            ('product_id', '!=', False),
+            '|', ('remaining_sqm', '>', 0.0001), ('id', 'in', selected_ids),
+        ]
+        search = (search or '').strip()
+        if search:
+            domain += [
+                '|', '|', '|', '|',
+                ('lot_id.name', 'ilike', search),
+                ('block_name', 'ilike', search),
+                ('tone', 'ilike', search),
+                ('product_id.name', 'ilike', search),
+                ('location_id.complete_name', 'ilike', search),
+            ]
+        if only_available:
+            domain.append(('remaining_sqm', '>', 0.0001))
+        if only_selected:
+            domain.append(('id', 'in', selected_ids))
+        return domain
 
-        for line in active_lines:
-            area = self._input_line_area(line)
-            consumed_in_others = consumed_other.get(line.id, 0.0)
-            remaining = max(0.0, area - consumed_in_others)
-            already_here = consumed_in_this_log.get(line.id, 0.0)
-            is_selected = line.id in selected_ids or already_here > 0.0
+    def _progress_selector_line(self, line, selection):
+        self.ensure_one()
+        area = self._input_line_area(line)
+        # Consumido en TODAS las demás corridas (no esta), según el libro.
+        consumed_in_others = max(
+            0.0, (line.consumed_sqm_total or 0.0) - selection['persisted'].get(line.id, 0.0)
+        )
+        already_here = selection['consumed'].get(line.id, 0.0)
+        product = line.product_id
+        return {
+            'rowKey': 'progress-input-%s' % line.id,
+            'inputLineId': line.id,
+            'lotId': line.lot_id.id,
+            'lotName': line.lot_id.name or '',
+            'productId': product.id,
+            'productName': product.display_name or '',
+            'qty': line.qty_in or 0.0,
+            'areaSqm': area or 0.0,
+            'remainingSqm': max(0.0, area - consumed_in_others),
+            'consumedInThisLog': already_here,
+            'widthCm': line.width_cm or 0.0,
+            'heightCm': line.height_cm or 0.0,
+            'thicknessCm': line.thickness_cm or 0.0,
+            'blockName': line.block_name or '',
+            'tone': line.tone or '',
+            'locationId': line.location_id.id if line.location_id else 0,
+            'locationName': line.location_id.display_name if line.location_id else '',
+            'state': line.state or '',
+            'isUsed': bool(line.is_used),
+            'isSelected': line.id in selection['selected_ids'] or already_here > 0.0,
+        }
 
-            # Filtrar placas sin remanente y que no estén ya seleccionadas en esta corrida.
-            if remaining <= 0.0001 and not is_selected:
-                continue
+    def get_workshop_progress_selector_data(self, current_input_line_ids=None, editing_log_id=None,
+                                            current_consumptions=None, search=None,
+                                            only_available=False, only_selected=False):
+        """Datos para selector visual de placas en cada corrida de bitácora.
 
-            product = line.product_id
-            product_id = product.id
-            if product_id not in groups_map:
-                groups_map[product_id] = {
-                    'groupKey': 'product-%s' % product_id,
-                    'productId': product_id,
-                    'productName': product.display_name or '',
-                    'lines': [],
-                    'lineCount': 0,
-                    'selectedCount': 0,
-                    'totalArea': 0.0,
-                }
+        Devuelve las placas con remanente > 0 (área total − suma consumida en
+        otras corridas). Cuando se edita una corrida existente, las placas que
+        ya tiene asignadas se mantienen para poder editar o quitar.
 
-            line_data = {
-                'rowKey': 'progress-input-%s' % line.id,
-                'inputLineId': line.id,
-                'lotId': line.lot_id.id,
-                'lotName': line.lot_id.name or '',
-                'productId': product_id,
-                'productName': product.display_name or '',
-                'qty': line.qty_in or 0.0,
-                'areaSqm': area or 0.0,
-                'remainingSqm': remaining,
-                'consumedInThisLog': already_here,
-                'widthCm': line.width_cm or 0.0,
-                'heightCm': line.height_cm or 0.0,
-                'thicknessCm': line.thickness_cm or 0.0,
-                'blockName': line.block_name or '',
-                'tone': line.tone or '',
-                'locationId': line.location_id.id if line.location_id else 0,
-                'locationName': line.location_id.display_name if line.location_id else '',
-                'state': line.state or '',
-                'isUsed': bool(line.is_used),
-                'isSelected': is_selected,
-            }
+        Órdenes de formato con cientos de placas: se devuelven los grupos por
+        producto con su resumen (conteos y m²) calculado en SQL, y las placas
+        de un grupo se piden por página al expandirlo
+        (`get_workshop_progress_selector_lines`). Si todo cabe en una página,
+        las placas vienen ya incluidas (`loaded`). Las placas seleccionadas en
+        la corrida siempre vienen en `selected`.
 
-            group = groups_map[product_id]
-            group['lines'].append(line_data)
-            group['lineCount'] += 1
-            if is_selected:
-                group['selectedCount'] += 1
-                group['totalArea'] += already_here or remaining
+        Por cada placa se devuelve:
+          - `areaSqm`: m² totales de la placa
+          - `remainingSqm`: m² disponibles para consumir en esta corrida
+          - `consumedInThisLog`: m² ya capturados en esta corrida (si edita)
+        """
+        self.ensure_one()
+        InputLine = self.env['workshop.input.line']
+        selection = self._progress_selector_state(
+            current_input_line_ids, editing_log_id, current_consumptions,
+        )
+        domain = self._progress_selector_domain(
+            selection, search=search, only_available=only_available, only_selected=only_selected,
+        )
+        summaries = InputLine._read_group(
+            domain, ['product_id'], ['__count', 'remaining_sqm:sum'],
+        )
+        selected_lines = InputLine.search([
+            ('id', 'in', list(selection['selected_ids'])),
+            ('order_id', '=', self.id),
+            ('state', '!=', 'cancelled'),
+            ('lot_id', '!=', False),
+            ('product_id', '!=', False),
+        ], order='lot_id, sequence, id')
+        selected = [self._progress_selector_line(line, selection) for line in selected_lines]
+
+        total = sum(count for _product, count, _remaining in summaries)
+        inline = {}
+        if total <= PROGRESS_SELECTOR_PAGE_SIZE:
+            for line in InputLine.search(domain, order='lot_id, sequence, id'):
+                inline.setdefault(line.product_id.id, []).append(
+                    self._progress_selector_line(line, selection)
+                )
+
+        groups = []
+        for product, count, remaining in summaries:
+            here = [data for data in selected if data['productId'] == product.id]
+            lines = inline.get(product.id, [])
+            groups.append({
+                'groupKey': 'product-%s' % product.id,
+                'productId': product.id,
+                'productName': product.display_name or '',
+                'lines': lines,
+                'loaded': len(lines) >= count,
+                'lineCount': count,
+                'selectedCount': len(here),
+                'totalArea': sum(data['consumedInThisLog'] or data['remainingSqm'] for data in here),
+                'remainingArea': (remaining or 0.0) + sum(
+                    selection['persisted'].get(data['inputLineId'], 0.0) for data in here
+                ),
+            })
 
         return {
             'operationMode': self.operation_mode or '',
-            'groups': [group for group in groups_map.values() if group['lineCount'] > 0],
+            'groups': groups,
+            'selected': selected,
+            'pageSize': PROGRESS_SELECTOR_PAGE_SIZE,
+        }
+
+    def get_workshop_progress_selector_lines(self, product_id, offset=0, limit=None,
+                                             current_input_line_ids=None, editing_log_id=None,
+                                             current_consumptions=None, search=None,
+                                             only_available=False, only_selected=False):
+        """Una página de placas de un grupo (producto) del selector de bitácora.
+
+        Mismos filtros que `get_workshop_progress_selector_data`; orden por lote
+        resuelto en SQL.
+        """
+        self.ensure_one()
+        InputLine = self.env['workshop.input.line']
+        selection = self._progress_selector_state(
+            current_input_line_ids, editing_log_id, current_consumptions,
+        )
+        domain = self._progress_selector_domain(
+            selection, search=search, only_available=only_available, only_selected=only_selected,
+        ) + [('product_id', '=', int(product_id))]
+        limit = min(int(limit or PROGRESS_SELECTOR_PAGE_SIZE), PROGRESS_SELECTOR_PAGE_SIZE * 5)
+        offset = max(0, int(offset or 0))
+        lines = InputLine.search(domain, order='lot_id, sequence, id', offset=offset, limit=limit + 1)
+        return {
+            'lines': [self._progress_selector_line(line, selection) for line in lines[:limit]],
+            'offset': offset,
+            'hasMore': len(lines) > limit,
         }
 
+    # ─── Orden de la cola (rangos con huecos) ───────────────────────────────
+    @api.model
+    def _queue_where(self, alias):
+        """Condición SQL de "está en la cola" (borrador o estacionada)."""
+        return SQL(
+            "(%(state)s = 'draft' OR (%(state)s = 'in_workshop' AND %(parked)s IS TRUE))",
+            state=SQL.identifier(alias, 'state'),
+            parked=SQL.identifier(alias, 'parked_in_queue'),
+        )
+
+    def _in_workshop_queue(self):
+        self.ensure_one()
+        return self.state == 'draft' or (self.state == 'in_workshop' and self.parked_in_queue)
+
+    @api.model
+    def _queue_renormalize_ranks(self, company_ids=None):
+        """Renumera la cola (paso `QUEUE_RANK_STEP`) con un solo UPDATE.
+
+        Respeta el orden visible (estacionadas arriba, rango, alta, id) y no
+        escribe filas cuyo rango ya es el correcto.
+        """
+        self.flush_model(['queue_sequence', 'state', 'parked_in_queue', 'company_id'])
+        company_filter = SQL("TRUE")
+        if company_ids:
+            company_filter = SQL("q.company_id = ANY(%s)", list(company_ids))
+        self.env.cr.execute(SQL("""
+            UPDATE workshop_order o
+               SET queue_sequence = v.rank
+              FROM (
+                    SELECT q.id, row_number() OVER (
+                               PARTITION BY q.company_id
+                               ORDER BY q.parked_in_queue IS NOT TRUE, q.queue_sequence,
+                                        q.create_date, q.id
+                           ) * %(step)s AS rank
+                      FROM workshop_order q
+                     WHERE %(queue)s AND %(company)s
+                   ) v
+             WHERE o.id = v.id AND o.queue_sequence IS DISTINCT FROM v.rank
+         RETURNING o.id
+        """, step=QUEUE_RANK_STEP, queue=self._queue_where('q'), company=company_filter))
+        changed = self.browse([row[0] for row in self.env.cr.fetchall()])
+        changed.invalidate_recordset(['queue_sequence'])
+        changed._workshop_board_touch()
+        return True
+
+    def _queue_neighbor_ranks(self, anchor):
+        """(rango previo, rango del ancla) donde debe caer `self` en la cola.
+
+        Sin ancla va al final. El vecino previo se busca con una comparación de
+        tuplas en el mismo orden que el panel, sin contar a la propia orden.
+        """
+        self.ensure_one()
+        self.flush_model(['queue_sequence', 'state', 'parked_in_queue', 'company_id'])
+        cr = self.env.cr
+        others = SQL(
+            "%s AND o.company_id = %s AND o.id != %s",
+            self._queue_where('o'), self.company_id.id, self.id,
+        )
+        if not anchor:
+            cr.execute(SQL("SELECT max(o.queue_sequence) FROM workshop_order o WHERE %s", others))
+            last = cr.fetchone()[0]
+            return (last if last is not None else 0), None
+        cr.execute(SQL("""
+            SELECT o.queue_sequence
+              FROM workshop_order o, workshop_order a
+             WHERE a.id = %(anchor)s AND %(others)s
+               AND (o.parked_in_queue IS NOT TRUE, o.queue_sequence, o.create_date, o.id)
+                 < (a.parked_in_queue IS NOT TRUE, a.queue_sequence, a.create_date, a.id)
+          ORDER BY o.parked_in_queue IS NOT TRUE DESC, o.queue_sequence DESC,
+                   o.create_date DESC, o.id DESC
+             LIMIT 1
+        """, anchor=anchor.id, others=others))
+        row = cr.fetchone()
+        return (row[0] if row else None), anchor.queue_sequence
+
+    def _queue_successor(self, after):
+        """Orden que sigue a `after` en la cola, sin contar a `self` (o vacío)."""
+        self.ensure_one()
+        self.flush_model(['queue_sequence', 'state', 'parked_in_queue', 'company_id'])
+        self.env.cr.execute(SQL("""
+            SELECT o.id
+              FROM workshop_order o, workshop_order a
+             WHERE a.id = %(after)s AND %(queue)s
+               AND o.company_id = %(company)s AND o.id != %(order)s
+               AND (o.parked_in_queue IS NOT TRUE, o.queue_sequence, o.create_date, o.id)
+                 > (a.parked_in_queue IS NOT TRUE, a.queue_sequence, a.create_date, a.id)
+          ORDER BY o.parked_in_queue IS NOT TRUE, o.queue_sequence, o.create_date, o.id
+             LIMIT 1
+        """, after=after.id, queue=self._queue_where('o'), company=self.company_id.id, order=self.id))
+        row = self.env.cr.fetchone()
+        return self.browse(row[0]) if row else self.browse()
+
+    @api.model
+    def move_before(self, order_id, anchor_id=False, after_id=False):
+        """Mueve UNA tarjeta de la cola justo antes de `anchor_id` (o al final).
+
+        Sin ancla pero con `after_id`, la tarjeta cae justo después de esa
+        orden: el panel lo manda al soltar sobre la última tarjeta visible,
+        cuya sucesora en la cola completa puede estar oculta.
+
+        Escribe sólo la fila movida con un rango entre el de sus nuevos
+        vecinos; si no queda hueco, renumera la cola de la compañía con un
+        UPDATE y vuelve a calcular. Devuelve el rango asignado.
+        """
+        order = self.browse(int(order_id)).exists()
+        anchor = self.browse(int(anchor_id)).exists() if anchor_id else self.browse()
+        if not order or not order._in_workshop_queue():
+            return False
+
+        def _valid_neighbor(other):
+            return (
+                other != order and other._in_workshop_queue()
+                and other.company_id == order.company_id
+            )
+
+        if anchor and not _valid_neighbor(anchor):
+            return False
+        if not anchor and after_id:
+            after = self.browse(int(after_id)).exists()
+            if not after or not _valid_neighbor(after):
+                return False
+            anchor = order._queue_successor(after)
+        for _attempt in range(2):
+            prev_rank, next_rank = order._queue_neighbor_ranks(anchor)
+            if next_rank is None:
+                rank = prev_rank + QUEUE_RANK_STEP
+            elif prev_rank is None:
+                rank = next_rank - QUEUE_RANK_STEP
+            elif next_rank - prev_rank >= 2:
+                rank = (prev_rank + next_rank) // 2
+            else:
+                rank = None
+            if rank is not None and abs(rank) < QUEUE_RANK_LIMIT:
+                break
+            self._queue_renormalize_ranks(order.company_id.ids)
+        else:
+            return False
+        if order.queue_sequence != rank:
+            order.queue_sequence = rank
+        return rank
+
     @api.model
     def reorder_workshop_queue(self, ordered_ids):
-        """Persiste el nuevo orden manual de la cola del panel del taller.
+        """Persiste un orden completo de la cola (compatibilidad).
 
-        Recibe la lista de ids de `workshop.order` en el orden deseado (el primer
-        elemento queda arriba) y reasigna `queue_sequence` con paso 10 para que
-        haya espacio entre filas si luego se reordena de a una.
+        Recibe la lista de ids en el orden deseado (el primero queda arriba) y
+        asigna los rangos con paso `QUEUE_RANK_STEP`. Como `move_before`,
+        escribe por el ORM y sólo las órdenes cuyo rango cambia. Para arrastrar
+        una tarjeta conviene `move_before`, que escribe una fila.
         """
         clean_ids = []
         seen = set()
@@ -2950,11 +3693,11 @@ class WorkshopOrder(models.Model):
         orders = self.browse(clean_ids).exists()
         # Mantener sólo los ids que existen, respetando el orden recibido.
         existing_ids = set(orders.ids)
-        for position, order_id in enumerate(
-            [oid for oid in clean_ids if oid in existing_ids],
-            start=1,
-        ):
-            self.browse(order_id).queue_sequence = position * 10
+        ids = [oid for oid in clean_ids if oid in existing_ids]
+        for position, order in enumerate(self.browse(ids), start=1):
+            rank = position * QUEUE_RANK_STEP
+            if order.queue_sequence != rank:
+                order.queue_sequence = rank
         return True
 
     def action_print_pick_report(self):
@@ -3052,15 +3795,21 @@ class WorkshopInputLine(models.Model):
         compute='_compute_progress_log_ids',
         help='Corridas de bitácora donde se registró algún consumo de este lote.',
     )
+    # Libro de consumo por placa: almacenado y mantenido por el ORM cuando
+    # se crean, editan o borran consumos de bitácora (sólo se recalculan las
+    # placas tocadas). Selector, corridas, tableta y constraint leen de aquí
+    # en lugar de re-sumar todas las corridas de la orden.
     consumed_sqm_total = fields.Float(
         string='m² consumidos en taller',
         compute='_compute_consumed_remaining',
+        store=True,
         digits=(12, 4),
         help='Suma de m² consumidos de este lote a través de todas las corridas de la bitácora.',
     )
     remaining_sqm = fields.Float(
         string='m² remanentes',
         compute='_compute_consumed_remaining',
+        store=True,
         digits=(12, 4),
         help='m² del lote que aún no han sido consumidos en ninguna corrida.',
     )
@@ -3087,7 +3836,10 @@ class WorkshopInputLine(models.Model):
                 lambda c: (c.consumed_sqm or 0.0) > 0.0
             ).mapped('log_id')
 
-    @api.depends('area_sqm', 'qty_in', 'product_id', 'consumption_line_ids.consumed_sqm')
+    @api.depends(
+        'area_sqm', 'qty_in', 'product_id', 'product_id.uom_id',
+        'consumption_line_ids', 'consumption_line_ids.consumed_sqm',
+    )
     def _compute_consumed_remaining(self):
         for line in self:
             order = line.order_id
@@ -3730,16 +4482,27 @@ class WorkshopOutputLine(models.Model):
         )
         return not field_name.startswith(blocked_prefixes)
 
-    def _copy_lot_metadata_from_source_lot(self, vals, source_lot):
-        Lot = self.env['stock.lot']
+    def _copyable_lot_metadata_fields(self, cache=None):
+        """Campos de stock.lot que se heredan del lote origen.
+
+        La introspección de `_fields` es igual para todas las salidas: con
+        `cache` (dict compartido por el lote de salidas) se hace una sola vez.
+        """
+        if cache is not None and 'copy_fields' in cache:
+            return cache['copy_fields']
+        field_names = [
+            field_name
+            for field_name, field in self.env['stock.lot']._fields.items()
+            if self._is_copyable_lot_metadata_field(field_name, field)
+        ]
+        if cache is not None:
+            cache['copy_fields'] = field_names
+        return field_names
+
+    def _copy_lot_metadata_from_source_lot(self, vals, source_lot, cache=None):
         if not source_lot:
             return vals
-        for field_name, source_field in source_lot._fields.items():
-            if field_name not in Lot._fields:
-                continue
-            target_field = Lot._fields[field_name]
-            if not self._is_copyable_lot_metadata_field(field_name, target_field):
-                continue
+        for field_name in self._copyable_lot_metadata_fields(cache):
             self._set_lot_field_value(vals, field_name, source_lot[field_name])
         return vals
 
@@ -3841,7 +4604,9 @@ class WorkshopOutputLine(models.Model):
             return self.env['workshop.input.line']
         return self.order_id._get_active_input_lines().filtered(lambda line: line.lot_id)
 
-    def _build_aggregate_lot_note(self, input_lines):
+    def _aggregate_lot_note_context(self, input_lines):
+        """Parte común de la nota agregada: título, resumen y detalle de
+        entradas. Sólo depende de la orden, no de la salida."""
         aliases = self._lot_metadata_aliases()
         order = self.order_id
         detail_rows = []
@@ -3870,6 +4635,10 @@ class WorkshopOutputLine(models.Model):
         }
 
         title = _('Origen de corte/formato generado desde la orden %s') % (order.name if order else '')
+        return title, summary, detail_rows
+
+    def _build_aggregate_lot_note(self, input_lines, note_context=None):
+        title, summary, detail_rows = note_context or self._aggregate_lot_note_context(input_lines)
         output_line = _('Salida: %(lot)s | Producto: %(product)s | Pallets/piezas generadas: %(pieces)s') % {
             'lot': self.lot_name or (self.lot_id.name if self.lot_id else ''),
             'product': self.product_id.display_name if self.product_id else '',
@@ -3929,28 +4698,50 @@ class WorkshopOutputLine(models.Model):
                 note_value = note_value[:limit]
             vals[field_name] = note_value
 
-    def _prepare_aggregate_result_lot_metadata_vals(self):
+    def _aggregate_lot_shared_values(self, cache=None):
+        """Agregados de la orden comunes a todas sus salidas de corte.
+
+        Pedimento y contenedor ponderados y el contexto de la nota se
+        calculan una vez por orden; con `cache` se reutilizan entre salidas.
+        """
         self.ensure_one()
-        vals = {}
+        key = ('aggregate', self.order_id.id)
+        if cache is not None and key in cache:
+            return cache[key]
+        shared = False
         input_lines = self._aggregate_input_lines()
-        if not input_lines:
-            return vals
-
-        # El lote de un corte/formato es material NUEVO: no hereda identidad
-        # dimensional ni estética de las placas origen (nada de alto/ancho/
-        # color/bloque/atado). Se conserva SOLO la trazabilidad aduanal
-        # (pedimento/contenedor, ponderados) y la nota de auditoría con el
-        # detalle de las placas consumidas.
-        aliases = self._lot_metadata_aliases()
-        pedimento = self._get_weighted_input_value(input_lines, aliases['pedimento'])
-        container = self._get_weighted_input_value(input_lines, aliases['container'])
-
-        if pedimento:
-            self._set_lot_alias_values(vals, aliases['pedimento'], pedimento)
-        if container:
-            self._set_lot_alias_values(vals, aliases['container'], container)
+        if input_lines:
+            # El lote de un corte/formato es material NUEVO: no hereda identidad
+            # dimensional ni estética de las placas origen (nada de alto/ancho/
+            # color/bloque/atado). Se conserva SOLO la trazabilidad aduanal
+            # (pedimento/contenedor, ponderados) y la nota de auditoría con el
+            # detalle de las placas consumidas.
+            aliases = self._lot_metadata_aliases()
+            pedimento = self._get_weighted_input_value(input_lines, aliases['pedimento'])
+            container = self._get_weighted_input_value(input_lines, aliases['container'])
+            vals = {}
+            if pedimento:
+                self._set_lot_alias_values(vals, aliases['pedimento'], pedimento)
+            if container:
+                self._set_lot_alias_values(vals, aliases['container'], container)
+            shared = {
+                'input_lines': input_lines,
+                'vals': vals,
+                'note_context': self._aggregate_lot_note_context(input_lines),
+            }
+        if cache is not None:
+            cache[key] = shared
+        return shared
 
-        plain_note, html_note = self._build_aggregate_lot_note(input_lines)
+    def _prepare_aggregate_result_lot_metadata_vals(self, cache=None):
+        self.ensure_one()
+        shared = self._aggregate_lot_shared_values(cache)
+        if not shared:
+            return {}
+        vals = dict(shared['vals'])
+        plain_note, html_note = self._build_aggregate_lot_note(
+            shared['input_lines'], note_context=shared['note_context'],
+        )
         self._set_lot_note_values(vals, plain_note, html_note)
         return vals
 
@@ -3982,7 +4773,12 @@ class WorkshopOutputLine(models.Model):
                     break
         return vals
 
-    def _prepare_result_lot_metadata_vals(self):
+    def _prepare_result_lot_metadata_vals(self, cache=None):
+        """Valores de metadata del lote resultado de esta salida.
+
+        `cache`: dict compartido al preparar varias salidas a la vez (ver
+        `_ensure_result_lots`); guarda lo que no depende de la salida.
+        """
         self.ensure_one()
         vals = {}
         source_line = self._get_metadata_source_input_line()
@@ -4000,9 +4796,9 @@ class WorkshopOutputLine(models.Model):
         )
 
         if is_aggregate_cut:
-            vals.update(self._prepare_aggregate_result_lot_metadata_vals())
+            vals.update(self._prepare_aggregate_result_lot_metadata_vals(cache))
         elif source_lot:
-            self._copy_lot_metadata_from_source_lot(vals, source_lot)
+            self._copy_lot_metadata_from_source_lot(vals, source_lot, cache)
 
         self._apply_result_lot_area_and_dimensions(
             vals, thickness_only=is_aggregate_cut)
@@ -4019,76 +4815,239 @@ class WorkshopOutputLine(models.Model):
 
         return vals
 
-    def _sync_result_lot_metadata(self, lot, force_name=False):
+    def _sync_result_lot_metadata(self, lot, force_name=False, cache=None):
         self.ensure_one()
         if not lot:
             return False
-        vals = self._prepare_result_lot_metadata_vals()
+        vals = self._prepare_result_lot_metadata_vals(cache)
         if force_name:
             vals['name'] = force_name
         if vals:
             lot.write(vals)
         return True
 
+    def _sync_result_lots_metadata(self, cache=None):
+        """Refresca la metadata de los lotes de varias salidas: una escritura
+        por juego de valores idéntico en lugar de una por lote."""
+        grouped = {}
+        for line in self.filtered('lot_id'):
+            vals = line._prepare_result_lot_metadata_vals(cache)
+            if not vals:
+                continue
+            key = tuple(sorted((fname, repr(value)) for fname, value in vals.items()))
+            grouped.setdefault(key, (vals, []))[1].append(line.lot_id.id)
+        for vals, lot_ids in grouped.values():
+            self.env['stock.lot'].browse(lot_ids).write(vals)
+        return True
+
     def _ensure_result_lot(self):
         self.ensure_one()
-        if self.output_type in ('scrap', 'rejected'):
-            return False
-        if not self.product_id:
-            raise UserError(_('La salida %s no tiene producto definido.') % self.display_name)
-        if self.lot_id:
-            self._sync_result_lot_metadata(self.lot_id)
-            return self.lot_id
-        if not self.lot_name:
-            is_cut_mode = self.order_id.operation_mode in ('slab_cut', 'format_process')
-            if is_cut_mode and self.output_type in ('format_piece', 'finished_slab'):
-                # Corte/formato: lote NUEVO ST<letra>-N, nunca derivado del origen.
-                self.lot_name = self.order_id._next_somt_lot_name(exclude_output=self)
-            elif self.input_line_id:
-                self.lot_name = self.order_id._make_unique_lot_name(
-                    self.order_id._default_output_lot_name(self.input_line_id),
-                    product=self.product_id,
-                    exclude_output=self,
-                )
+        return self._ensure_result_lots().get(self.id, False)
+
+    def _assign_result_lot_name(self):
+        """Folio para una salida sin lote ni folio capturado."""
+        self.ensure_one()
+        is_cut_mode = self.order_id.operation_mode in ('slab_cut', 'format_process')
+        if is_cut_mode and self.output_type in ('format_piece', 'finished_slab'):
+            # Corte/formato: lote NUEVO ST<letra>-N, nunca derivado del origen.
+            self.lot_name = self.order_id._next_somt_lot_name(exclude_output=self)
+        elif self.input_line_id:
+            self.lot_name = self.order_id._make_unique_lot_name(
+                self.order_id._default_output_lot_name(self.input_line_id),
+                product=self.product_id,
+                exclude_output=self,
+            )
+        else:
+            self.lot_name = self.order_id._get_compact_result_lot_name(
+                output_type=self.output_type,
+                product=self.product_id,
+                target_area=self.order_id._output_line_area(self),
+                exclude_output=self,
+            )
+
+    def _resolve_result_lot_names(self):
+        """Folios de las salidas de `self` (sin lote ni folio), resueltos en lote.
+
+        Misma regla que `_assign_result_lot_name` salida por salida, pero sin
+        sondear folio por folio: los folios ocupados de todas las bases se leen
+        con `_result_lot_folio_map` y se resuelven en memoria, como en
+        `_normalize_result_lots_batch`. Los ST<letra>-N de corte/formato se
+        validan juntos, con una búsqueda por ronda. No escribe: devuelve
+        {output_id: folio}.
+        """
+        Order = self.env['workshop.order']
+        names = {}
+        siblings_by_order = {}
+
+        def _siblings(order):
+            if order.id not in siblings_by_order:
+                siblings_by_order[order.id] = {
+                    line.id: (line.lot_name or '', line.state) for line in order.output_line_ids
+                }
+            return siblings_by_order[order.id]
+
+        st_lines = self.browse()
+        plan = []
+        for line in self:
+            order = line.order_id
+            if (order.operation_mode in ('slab_cut', 'format_process')
+                    and line.output_type in ('format_piece', 'finished_slab')):
+                st_lines |= line
+            elif line.input_line_id:
+                source_lot = line.input_line_id.lot_id
+                source = source_lot.name if source_lot else line.input_line_id.product_id.display_name
+                plan.append((line, 'chain', source, source_lot))
             else:
-                self.lot_name = self.order_id._get_compact_result_lot_name(
-                    output_type=self.output_type,
-                    product=self.product_id,
-                    target_area=self.order_id._output_line_area(self),
-                    exclude_output=self,
+                source_line = order._get_result_lot_source_line(
+                    output_type=line.output_type,
+                    target_area=order._output_line_area(line),
                 )
+                source_lot = source_line.lot_id if source_line else self.env['stock.lot']
+                base = source_lot.name if source_lot else order._fallback_compact_order_lot_name()
+                if line.output_type == 'remnant':
+                    base = '%s-%s' % (base, order._get_result_lot_suffix('remnant'))
+                    plan.append((line, 'unique', base, source_lot))
+                else:
+                    plan.append((line, 'generic', base, source_lot))
+
+        workshop_lot_ids = Order._workshop_output_lot_ids(
+            self.env['stock.lot'].union(*(item[3] for item in plan if item[3]))
+        )
+        resolved = []
+        for line, kind, base, source_lot in plan:
+            number = None
+            if kind != 'unique':
+                if source_lot:
+                    base, number = Order._generic_folio_parts_known(base, source_lot, workshop_lot_ids)
+                else:
+                    base, number = line.order_id._generic_next_folio_parts(base)
+                base = base or line.order_id._fallback_compact_order_lot_name()
+            resolved.append((line, kind, base, number))
+
+        taken = Order._result_lot_folio_map({item[2] for item in resolved})
+        for line, kind, base, number in resolved:
+            siblings = _siblings(line.order_id)
+            if kind == 'unique':
+                name = Order._resolve_unique_folio(taken, siblings, base, line, None, line.product_id)
+            else:
+                name = Order._resolve_generic_folio(taken, siblings, base, number, line, None)
+                if kind == 'chain':
+                    name = Order._resolve_unique_folio(taken, siblings, name, line, None, line.product_id)
+            taken.setdefault(name, []).append((0, line.product_id.id))
+            siblings[line.id] = (name, line.state)
+            names[line.id] = name
+
+        Lot = self.env['stock.lot'].sudo().with_context(active_test=False)
+        pending = st_lines
+        for _attempt in range(500):
+            if not pending:
+                break
+            candidates = {line.id: line.order_id._somt_lot_candidate() for line in pending}
+            used = set(Lot.search([('name', 'in', list(candidates.values()))]).mapped('name'))
+            retry = []
+            for line in pending:
+                candidate = candidates[line.id]
+                siblings = _siblings(line.order_id)
+                if candidate in used or any(
+                    line_id != line.id and state != 'cancelled' and name.strip() == candidate
+                    for line_id, (name, state) in siblings.items()
+                ):
+                    retry.append(line.id)
+                    continue
+                siblings[line.id] = (candidate, line.state)
+                names[line.id] = candidate
+            pending = self.browse(retry)
+        if pending:
+            raise UserError(_('No se pudo obtener un folio ST libre.'))
+        return names
+
+    def _ensure_result_lots(self):
+        """Lote resultado de cada salida productiva: {output_id: lote}.
+
+        Las salidas con lote sólo refrescan su metadata. Para las demás los
+        folios se resuelven todos juntos (`_resolve_result_lot_names`), se
+        validan contra los lotes existentes con una sola búsqueda y se crean
+        con un solo `stock.lot.create(vals_list)`; cada salida recibe folio y
+        lote en una sola escritura. Los agregados de cada orden
+        (pedimento/contenedor ponderados, nota) se calculan una vez y se
+        comparten entre sus salidas.
+        """
+        productive = self.filtered(lambda l: l.output_type not in ('scrap', 'rejected'))
+        without_product = productive.filtered(lambda l: not l.product_id)
+        if without_product:
+            raise UserError(_('La salida %s no tiene producto definido.') % without_product[0].display_name)
+        cache = {}
+        with_lot = productive.filtered('lot_id')
+        with_lot._sync_result_lots_metadata(cache)
+        result = {line.id: line.lot_id for line in with_lot}
+
+        to_create = productive - with_lot
+        if not to_create:
+            return result
+        new_names = to_create.filtered(lambda l: not l.lot_name)._resolve_result_lot_names()
+        lot_names = {line.id: new_names.get(line.id) or line.lot_name for line in to_create}
+
         # VALIDACIÓN DURA: jamás producir sobre un folio que ya existe para
         # el mismo producto (ni activo ni archivado). Antes se reutilizaba
         # el lote en silencio — la producción nueva se mezclaba con un lote
         # viejo y se perdía la trazabilidad.
-        existing = self.env['stock.lot'].with_context(
-            active_test=False).search([
-                ('name', '=', self.lot_name),
-                ('product_id', '=', self.product_id.id),
-                '|', ('company_id', '=', self.company_id.id), ('company_id', '=', False),
-            ], limit=1)
-        if existing:
-            raise UserError(_(
-                'El folio "%(folio)s" ya existe como lote del producto '
-                '%(product)s%(archived)s.\n\n'
-                'No se puede producir la salida %(line)s sobre un lote '
-                'existente: cambia el folio de la línea (o deja que el '
-                'sistema lo renumere borrándolo) e intenta de nuevo.'
-            ) % {
-                'folio': self.lot_name,
-                'product': self.product_id.display_name,
-                'archived': '' if existing.active else _(' (archivado)'),
-                'line': self.display_name,
-            })
-        lot_vals = {
-            'name': self.lot_name,
-            'product_id': self.product_id.id,
-            'company_id': self.company_id.id,
+        existing = self.env['stock.lot'].with_context(active_test=False).search([
+            ('name', 'in', list(set(lot_names.values()))),
+            ('product_id', 'in', to_create.product_id.ids),
+        ])
+        existing_by_key = {
+            (lot.name, lot.product_id.id, lot.company_id.id): lot for lot in existing
         }
-        lot_vals.update(self._prepare_result_lot_metadata_vals())
-        lot = self.env['stock.lot'].create(lot_vals)
-        self.lot_id = lot.id
-        return lot
+        claimed = {}
+        for line in to_create:
+            key = (lot_names[line.id], line.product_id.id)
+            lot = (
+                existing_by_key.get(key + (line.company_id.id,))
+                or existing_by_key.get(key + (False,))
+            )
+            if lot:
+                raise UserError(_(
+                    'El folio "%(folio)s" ya existe como lote del producto '
+                    '%(product)s%(archived)s.\n\n'
+                    'No se puede producir la salida %(line)s sobre un lote '
+                    'existente: cambia el folio de la línea (o deja que el '
+                    'sistema lo renumere borrándolo) e intenta de nuevo.'
+                ) % {
+                    'folio': lot_names[line.id],
+                    'product': line.product_id.display_name,
+                    'archived': '' if lot.active else _(' (archivado)'),
+                    'line': line.display_name,
+                })
+            if key in claimed:
+                raise UserError(_(
+                    'El folio "%(folio)s" está repetido en las salidas %(first)s y '
+                    '%(line)s del producto %(product)s: cada salida necesita su '
+                    'propio lote.'
+                ) % {
+                    'folio': lot_names[line.id],
+                    'first': claimed[key].display_name,
+                    'line': line.display_name,
+                    'product': line.product_id.display_name,
+                })
+            claimed[key] = line
+
+        vals_list = []
+        for line in to_create:
+            lot_vals = {
+                'name': lot_names[line.id],
+                'product_id': line.product_id.id,
+                'company_id': line.company_id.id,
+            }
+            lot_vals.update(line._prepare_result_lot_metadata_vals(cache))
+            vals_list.append(lot_vals)
+        lots = self.env['stock.lot'].create(vals_list)
+        for line, lot in zip(to_create, lots):
+            vals = {'lot_id': lot.id}
+            if line.id in new_names:
+                vals['lot_name'] = new_names[line.id]
+            line.write(vals)
+            result[line.id] = lot
+        return result
 
 
 class WorkshopTransformationTrace(models.Model):
@@ -4176,11 +5135,7 @@ class WorkshopProgressLog(models.Model):
         'order_id',
         'order_id.input_line_ids',
         'order_id.input_line_ids.state',
-        'order_id.input_line_ids.area_sqm',
-        'order_id.progress_log_ids',
-        'order_id.progress_log_ids.consumption_line_ids',
-        'order_id.progress_log_ids.consumption_line_ids.input_line_id',
-        'order_id.progress_log_ids.consumption_line_ids.consumed_sqm',
+        'order_id.input_line_ids.remaining_sqm',
         'consumption_line_ids',
         'consumption_line_ids.input_line_id',
         'consumption_line_ids.consumed_sqm',
@@ -4191,6 +5146,8 @@ class WorkshopProgressLog(models.Model):
         Una placa está disponible mientras `area_total − sum(consumido en otras corridas) > 0`.
         Las placas ya seleccionadas en esta misma corrida también se mantienen (para
         permitir editarlas o quitarlas sin que desaparezcan del selector).
+        El consumo de las otras corridas sale del libro de la placa
+        (`consumed_sqm_total`) menos lo guardado de esta corrida.
         """
         for log in self:
             order = log.order_id
@@ -4198,19 +5155,17 @@ class WorkshopProgressLog(models.Model):
                 log.available_input_line_ids = False
                 continue
             order_lines = order.input_line_ids.filtered(lambda l: l.state != 'cancelled')
-            other_logs = order.progress_log_ids - log
-            consumed_other = {}
-            for sibling_log in other_logs:
-                for cons in sibling_log.consumption_line_ids:
-                    if cons.input_line_id and (cons.consumed_sqm or 0.0) > 0.0:
-                        consumed_other[cons.input_line_id.id] = (
-                            consumed_other.get(cons.input_line_id.id, 0.0)
-                            + (cons.consumed_sqm or 0.0)
-                        )
+            persisted_here = {}
+            if log._origin:
+                for cons in log._origin.consumption_line_ids:
+                    persisted_here[cons.input_line_id.id] = (
+                        persisted_here.get(cons.input_line_id.id, 0.0) + (cons.consumed_sqm or 0.0)
+                    )
             available = self.env['workshop.input.line']
             for line in order_lines:
                 total = order._input_line_area(line)
-                if total - consumed_other.get(line.id, 0.0) > 0.0001:
+                consumed_other = (line._origin.consumed_sqm_total or 0.0) - persisted_here.get(line._origin.id, 0.0)
+                if total - consumed_other > 0.0001:
                     available |= line
             already_in_this_log = log.consumption_line_ids.mapped('input_line_id')
             log.available_input_line_ids = available | already_in_this_log
@@ -4304,21 +5259,27 @@ class WorkshopProgressLogLine(models.Model):
     # constraint Python se evalúa al final del flush (estado final), por lo
     # que el reemplazo pasa limpio y los duplicados REALES se siguen
     # bloqueando.
+    #
+    # Ambas constraints validan el lote completo con UNA consulta agrupada:
+    # un ticket de 100 placas crea 100 filas y no debe costar 100 consultas.
     @api.constrains('log_id', 'input_line_id')
     def _check_unique_input_per_log(self):
-        for line in self:
-            if not line.log_id or not line.input_line_id:
-                continue
-            duplicates = self.search_count([
-                ('id', '!=', line.id),
-                ('log_id', '=', line.log_id.id),
-                ('input_line_id', '=', line.input_line_id.id),
-            ])
-            if duplicates:
-                raise ValidationError(_(
-                    'Una placa sólo puede aparecer una vez por corrida de '
-                    'bitácora (placa: %(lot)s).'
-                ) % {'lot': line.input_line_id.display_name})
+        lines = self.filtered(lambda l: l.log_id and l.input_line_id)
+        if not lines:
+            return
+        duplicates = self._read_group(
+            [('log_id', 'in', lines.log_id.ids), ('input_line_id', 'in', lines.input_line_id.ids)],
+            ['log_id', 'input_line_id'],
+            ['__count'],
+            having=[('__count', '>', 1)],
+            limit=1,
+        )
+        if duplicates:
+            _log, input_line, _count = duplicates[0]
+            raise ValidationError(_(
+                'Una placa sólo puede aparecer una vez por corrida de '
+                'bitácora (placa: %(lot)s).'
+            ) % {'lot': input_line.display_name})
 
     @api.constrains('consumed_sqm')
     def _check_consumed_non_negative(self):
@@ -4328,21 +5289,28 @@ class WorkshopProgressLogLine(models.Model):
 
     @api.constrains('consumed_sqm', 'input_line_id', 'log_id')
     def _check_consumed_within_lot(self):
-        """Sum(consumido en todas las corridas de la orden) ≤ área total de la placa."""
-        for line in self:
+        """Sum(consumido en todas las corridas de la orden) ≤ área total de la placa.
+
+        Una sola consulta (`SUM` por placa) para todo el lote validado.
+        """
+        lines = self.filtered(lambda l: l.input_line_id and (l.consumed_sqm or 0.0) > 0.0)
+        if not lines:
+            return
+        consumed_by_input = {
+            input_line.id: total or 0.0
+            for input_line, total in self._read_group(
+                [('input_line_id', 'in', lines.input_line_id.ids)],
+                ['input_line_id'],
+                ['consumed_sqm:sum'],
+            )
+        }
+        for line in lines:
             input_line = line.input_line_id
-            if not input_line or (line.consumed_sqm or 0.0) <= 0.0:
-                continue
             order = (line.log_id.order_id or input_line.order_id) if line.log_id else input_line.order_id
             if not order:
                 continue
             total_area = order._input_line_area(input_line)
-            # Sumar el consumo de las demás filas de bitácora (incluyendo otras corridas).
-            other_consumed = sum(
-                (sibling.consumed_sqm or 0.0)
-                for sibling in input_line.consumption_line_ids
-                if sibling.id != line.id
-            )
+            other_consumed = consumed_by_input.get(input_line.id, 0.0) - (line.consumed_sqm or 0.0)
             if (line.consumed_sqm or 0.0) + other_consumed > total_area + 0.0001:
                 remaining = max(0.0, total_area - other_consumed)
                 raise ValidationError(_(
@@ -10,15 +10,44 @@ listos para pintar; no agrega reglas de negocio nuevas.
 
 Todo devuelve diccionarios JSON-serializables y los errores de negocio salen
 como UserError/ValidationError para que la app los muestre tal cual.
+
+Respuestas delta: cada orden lleva una revisión de detalle que avanza una vez
+por transacción en que cambia la orden o algo suyo (salidas, bitácora,
+sesiones, entradas). Si la tableta manda `known_revision` en una mutación y
+coincide, la respuesta trae sólo lo que cambió más el resumen recalculado; si
+no lo manda (o está desfasada) recibe el detalle completo de siempre.
+
+La revisión NO vive en la fila de la orden: actualizarla ahí bloqueaba la
+orden en cada guardado de una línea y dos tabletas trabajando líneas de la
+misma orden chocaban. Cada avance es un INSERT en `workshop_order_tablet_rev`
+(numerado con una secuencia global) y la revisión de una orden es el máximo de
+sus filas; los INSERT no se bloquean entre sí. El cron de llaves de tableta
+purga las filas que ya no son el máximo.
 """
 import html
 import re
 
 from odoo import api, fields, models, _
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
 
 from .workshop_order import WORKSHOP_PAUSE_REASONS, RESIDUAL_SCRAP_TAG
 
+# Registros tocados en la transacción, por modelo: {modelo: {id: order_id}}.
+TABLET_DIRTY_KEY = 'stone_workshop.tablet_dirty'
+# Órdenes cuya revisión de detalle ya avanzó en la transacción: {id: revisión}.
+TABLET_DETAIL_REV_KEY = 'stone_workshop.tablet_detail_rev'
+# Tabla (sólo INSERT) y secuencia de las revisiones de detalle.
+TABLET_DETAIL_REV_TABLE = 'workshop_order_tablet_rev'
+TABLET_DETAIL_REV_SEQUENCE = 'workshop_order_tablet_rev_seq'
+
+# Secciones del detalle que viajan en un delta: modelo → clave del payload.
+TABLET_DELTA_SECTIONS = {
+    'workshop.input.line': 'inputs',
+    'workshop.output.line': 'outputs',
+    'workshop.progress.log': 'progress_logs',
+    'workshop.work.session': 'sessions',
+}
+
 
 def _dt(value):
     return fields.Datetime.to_string(value) if value else False
@@ -28,6 +57,18 @@ def _d(value):
     return fields.Date.to_string(value) if value else False
 
 
+def _tablet_mark_dirty(records):
+    """Anota registros hijos tocados y avanza la revisión de su orden."""
+    records = records.filtered('id')
+    if not records:
+        return
+    dirty = records.env.cr.precommit.data.setdefault(TABLET_DIRTY_KEY, {})
+    dirty.setdefault(records._name, {}).update(
+        {rec.id: rec.order_id.id for rec in records}
+    )
+    records.order_id._tablet_detail_bump()
+
+
 def _html_to_text(value):
     if not value:
         return ''
@@ -40,6 +81,142 @@ def _html_to_text(value):
 class WorkshopOrderTablet(models.Model):
     _inherit = 'workshop.order'
 
+    tablet_detail_revision = fields.Integer(
+        string='Revisión del detalle (tableta)',
+        compute='_compute_tablet_detail_revision',
+        help='Avanza una vez por transacción en que cambia la orden o sus líneas; '
+             'la tableta la usa para pedir sólo deltas.',
+    )
+
+    def init(self):
+        super().init()
+        self.env.cr.execute('CREATE SEQUENCE IF NOT EXISTS %s' % TABLET_DETAIL_REV_SEQUENCE)
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS %s (
+                order_id integer NOT NULL REFERENCES workshop_order (id) ON DELETE CASCADE,
+                revision bigint NOT NULL,
+                PRIMARY KEY (order_id, revision)
+            )
+        """ % TABLET_DETAIL_REV_TABLE)
+
+    # ─── Revisión de detalle ────────────────────────────────────────────────
+    def _compute_tablet_detail_revision(self):
+        ids = [oid for oid in self.ids if isinstance(oid, int)]
+        revisions = {}
+        if ids:
+            self.env.cr.execute(
+                'SELECT order_id, max(revision) FROM %s WHERE order_id = ANY(%%s) GROUP BY order_id'
+                % TABLET_DETAIL_REV_TABLE,
+                (ids,),
+            )
+            revisions = dict(self.env.cr.fetchall())
+        for order in self:
+            order.tablet_detail_revision = revisions.get(order.id, 0)
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._tablet_detail_bump()
+        return res
+
+    def _tablet_detail_bump(self):
+        """Avanza la revisión de detalle, una vez por orden y transacción.
+
+        Es un INSERT en la tabla de revisiones: no toca (ni bloquea) la fila
+        de la orden.
+        """
+        bumped = self.env.cr.precommit.data.setdefault(TABLET_DETAIL_REV_KEY, {})
+        ids = [oid for oid in self.ids if isinstance(oid, int) and oid not in bumped]
+        if not ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO %s (order_id, revision)
+            SELECT id, nextval('%s') FROM workshop_order WHERE id = ANY(%%s)
+            RETURNING order_id, revision
+        """ % (TABLET_DETAIL_REV_TABLE, TABLET_DETAIL_REV_SEQUENCE), (ids,))
+        bumped.update(dict(self.env.cr.fetchall()))
+        self.browse(ids).invalidate_recordset(['tablet_detail_revision'])
+
+    @api.model
+    def _tablet_purge_detail_revisions(self):
+        """Borra las filas de revisión que ya no son el máximo de su orden."""
+        self.env.cr.execute("""
+            DELETE FROM {table} r
+             USING (SELECT order_id, max(revision) AS keep
+                      FROM {table} GROUP BY order_id) m
+             WHERE r.order_id = m.order_id AND r.revision < m.keep
+        """.format(table=TABLET_DETAIL_REV_TABLE))
+        return self.env.cr.rowcount
+
+    def _tablet_detail_revision_now(self):
+        self.ensure_one()
+        self.invalidate_recordset(['tablet_detail_revision'])
+        return self.tablet_detail_revision or 0
+
+    def _tablet_mutation_begin(self, known_revision):
+        """Punto de partida de una mutación con respuesta delta (o None)."""
+        self.ensure_one()
+        if known_revision is False or known_revision is None:
+            return None
+        try:
+            known = int(known_revision)
+        except (TypeError, ValueError):
+            return None
+        return {'known': known, 'revision': self._tablet_detail_revision_now()}
+
+    def _tablet_mutation_result(self, begin):
+        """Detalle completo (legado / desfasado) o delta desde `begin`."""
+        self.ensure_one()
+        if self.env.context.get('tablet_command_batch'):
+            # Dentro de un lote la respuesta se arma una sola vez al final.
+            return True
+        if begin is None:
+            return self.get_tablet_order_detail()
+        revision = self._tablet_detail_revision_now()
+        # Las revisiones salen de una secuencia global: no son consecutivas por
+        # orden. En sincronía = nadie más avanzó la orden y la revisión vigente
+        # es la de partida o la que avanzó esta misma transacción.
+        own = (self.env.cr.precommit.data.get(TABLET_DETAIL_REV_KEY) or {}).get(self.id)
+        in_sync = begin['known'] == begin['revision'] and revision in (begin['revision'], own)
+        if not in_sync:
+            # La tableta estaba desfasada u otro proceso cambió la orden a la par.
+            return self.get_tablet_order_detail()
+        return self._tablet_detail_delta(begin['known'], revision)
+
+    def _tablet_detail_delta(self, base_revision, revision):
+        """Sólo las líneas de esta orden tocadas en la transacción + resumen."""
+        self.ensure_one()
+        dirty = self.env.cr.precommit.data.get(TABLET_DIRTY_KEY) or {}
+        changed = {key: [] for key in TABLET_DELTA_SECTIONS.values()}
+        removed = {key: [] for key in TABLET_DELTA_SECTIONS.values()}
+        for model, key in TABLET_DELTA_SECTIONS.items():
+            ids = [rid for rid, oid in (dirty.get(model) or {}).items() if oid == self.id]
+            if not ids:
+                continue
+            records = self.env[model].browse(ids).exists()
+            gone = set(ids) - set(records.ids)
+            if model in ('workshop.input.line', 'workshop.output.line'):
+                cancelled = records.filtered(lambda r: r.state == 'cancelled')
+                gone |= set(cancelled.ids)
+                records -= cancelled
+            removed[key] = sorted(gone)
+            if model == 'workshop.input.line':
+                changed[key] = [self._tablet_input_line_payload(r) for r in records]
+            elif model == 'workshop.output.line':
+                changed[key] = [self._tablet_output_line_payload(r) for r in records]
+            elif model == 'workshop.progress.log':
+                changed[key] = [self._tablet_progress_log_payload(r) for r in records]
+            else:
+                changed[key] = [self._tablet_session_payload(r) for r in records]
+        return {
+            'delta': True,
+            'id': self.id,
+            'base_revision': base_revision,
+            'revision': revision,
+            'summary': self._tablet_detail_summary(),
+            'changed': changed,
+            'removed': removed,
+        }
+
     # ─── Lectura ────────────────────────────────────────────────────────────
     @api.model
     def get_tablet_access(self):
@@ -68,39 +245,35 @@ class WorkshopOrderTablet(models.Model):
         }
 
     @api.model
-    def get_tablet_board(self):
+    def get_tablet_board(self, since_revision=False):
         """Una sola llamada para pintar toda la pantalla principal de la tableta.
 
         Reúne cola + ejecución (con la regla de 24 h ya aplicada), KPIs del día,
         capacidad y la hora del servidor (para que el cronómetro en vivo no
-        dependa del reloj de la tableta).
+        dependa del reloj de la tableta). Si la tableta manda la última
+        `revision` que pintó y el tablero no cambió, sólo responde
+        `unchanged` (más la hora y los accesos).
         """
-        board = self.get_workshop_board()
-        try:
-            kpis = self.get_workshop_kpis()
-        except Exception:  # noqa: BLE001 - los KPIs nunca tumban el panel
-            kpis = {}
-        try:
-            capacity = self.get_workshop_capacity_overview()
-        except Exception:  # noqa: BLE001
-            capacity = {}
-        return {
+        snapshot = self.get_workshop_board_snapshot(since_revision=since_revision)
+        result = {
             'server_now': _dt(fields.Datetime.now()),
-            'queue': board.get('queue', []),
-            'execution': board.get('execution', []),
-            'kpis': kpis,
-            'capacity': capacity,
+            'revision': snapshot['revision'],
+            'unchanged': snapshot['unchanged'],
             'access': self.get_tablet_access(),
         }
+        if not snapshot['unchanged']:
+            result.update({
+                'queue': snapshot.get('queue', []),
+                'execution': snapshot.get('execution', []),
+                'kpis': snapshot.get('kpis', {}),
+                'capacity': snapshot.get('capacity', {}),
+            })
+        return result
 
     def _tablet_input_line_payload(self, line):
         self.ensure_one()
         area = self._input_line_area(line)
-        consumed = sum(
-            (c.consumed_sqm or 0.0)
-            for c in line.consumption_line_ids
-            if (c.consumed_sqm or 0.0) > 0.0
-        )
+        consumed = line.consumed_sqm_total or 0.0
         lot = line.lot_id
         return {
             'id': line.id,
@@ -192,12 +365,27 @@ class WorkshopOrderTablet(models.Model):
     def get_tablet_order_detail(self):
         """Todo lo que el panel lateral de la tableta necesita de UNA orden."""
         self.ensure_one()
-        data = self._workshop_board_payload()
         active_inputs = self.input_line_ids.filtered(lambda l: l.state != 'cancelled')
         active_outputs = self.output_line_ids.filtered(lambda l: l.state != 'cancelled')
         logs = self.progress_log_ids.sorted(lambda l: (l.date, l.id), reverse=True)
         sessions = self.work_session_ids.sorted(lambda s: (s.start, s.id), reverse=True)
+        data = self._tablet_detail_summary()
+        data.update({
+            'delta': False,
+            'revision': self._tablet_detail_revision_now(),
+            'inputs': [self._tablet_input_line_payload(l) for l in active_inputs],
+            'outputs': [self._tablet_output_line_payload(l) for l in active_outputs],
+            'progress_logs': [self._tablet_progress_log_payload(l) for l in logs],
+            'sessions': [self._tablet_session_payload(s) for s in sessions],
+        })
+        return data
 
+    def _tablet_detail_summary(self):
+        """Parte escalar del detalle: tarjeta, totales, vista previa y banderas."""
+        self.ensure_one()
+        data = self._workshop_board_payload()
+        active_inputs = self.input_line_ids.filtered(lambda l: l.state != 'cancelled')
+        logs = self.progress_log_ids
         unused = active_inputs.filtered(lambda l: l.is_consumed and not l.is_used)
         data.update({
             'server_now': _dt(fields.Datetime.now()),
@@ -218,10 +406,6 @@ class WorkshopOrderTablet(models.Model):
             'yield_percent': self.yield_percent or 0.0,
             'loss_percent': self.loss_percent or 0.0,
             'worked_seconds': self.worked_seconds or 0.0,
-            'inputs': [self._tablet_input_line_payload(l) for l in active_inputs],
-            'outputs': [self._tablet_output_line_payload(l) for l in active_outputs],
-            'progress_logs': [self._tablet_progress_log_payload(l) for l in logs],
-            'sessions': [self._tablet_session_payload(s) for s in sessions],
             'logged_area_total': sum((l.area_sqm or 0.0) for l in logs),
             'unused_count': len(unused),
             'can_start': self.state == 'draft',
@@ -292,9 +476,10 @@ class WorkshopOrderTablet(models.Model):
             raise UserError(_('La salida %s ya está cerrada y no se puede editar.') % line.display_name)
         return line
 
-    def tablet_update_output(self, line_id, values, operator_id=False):
+    def tablet_update_output(self, line_id, values, operator_id=False, known_revision=False):
         """Edita UNA salida desde la tableta (m², piezas, lote, acabado, dims)."""
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         line = self._tablet_editable_output(line_id)
         allowed = ('area_sqm', 'qty_out', 'pieces', 'lot_name', 'finish_result',
                    'width_cm', 'height_cm', 'thickness_cm')
@@ -313,12 +498,13 @@ class WorkshopOrderTablet(models.Model):
             vals['qty_out'] = vals['area_sqm']
         if vals:
             line.write(vals)
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
-    def tablet_add_output(self, kind, values=None, operator_id=False):
+    def tablet_add_output(self, kind, values=None, operator_id=False, known_revision=False):
         """Agrega una salida: 'guacal' (útil, mismo producto), 'remnant'
         (subproducto) o 'scrap' (merma manual)."""
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         if self.state != 'in_workshop':
             raise UserError(_('Sólo se agregan salidas a órdenes en taller.'))
         values = values or {}
@@ -357,9 +543,9 @@ class WorkshopOrderTablet(models.Model):
         else:
             raise UserError(_('Tipo de salida desconocido.'))
         self._create_output_line(vals)
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
-    def tablet_finish(self, lots=None, operator_id=False):
+    def tablet_finish(self, lots=None, operator_id=False, known_revision=False):
         """TERMINAR ORDEN desde la tableta en un solo paso.
 
         `lots`: lista de m² obtenidos, uno por lote de salida (p. ej. [22.5] o
@@ -373,6 +559,7 @@ class WorkshopOrderTablet(models.Model):
         Después declara el resultado y cierra la orden.
         """
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         if self.state != 'in_workshop':
             raise UserError(_('Sólo se termina una orden que está en taller.'))
         op = self._tablet_operator(operator_id)
@@ -422,20 +609,22 @@ class WorkshopOrderTablet(models.Model):
                 manual.unlink()
         self.action_declare_result()
         self._tablet_stamp(op, _('Orden terminada'))
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
-    def tablet_delete_output(self, line_id, operator_id=False):
+    def tablet_delete_output(self, line_id, operator_id=False, known_revision=False):
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         line = self._tablet_editable_output(line_id)
         line.unlink()
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
     # ─── Operador (login compartido) ────────────────────────────────────────
-    def _workshop_board_payload_extend(self, data):
-        data = super()._workshop_board_payload_extend(data)
-        if self.tablet_operator_id:
-            data['responsible'] = self.tablet_operator_id.name
-        return data
+    def _workshop_board_payloads_extend(self, payloads):
+        payloads = super()._workshop_board_payloads_extend(payloads)
+        for order, data in zip(self, payloads):
+            if order.tablet_operator_id:
+                data['responsible'] = order.tablet_operator_id.name
+        return payloads
 
     def _tablet_operator(self, operator_id):
         """Operador válido para el usuario actual o vacío."""
@@ -487,8 +676,9 @@ class WorkshopOrderTablet(models.Model):
             ))
         return self.get_tablet_order_detail()
 
-    def tablet_pause(self, reason=False, note=False, operator_id=False):
+    def tablet_pause(self, reason=False, note=False, operator_id=False, known_revision=False):
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         op = self._tablet_operator(operator_id)
         valid = {code for code, _label in WORKSHOP_PAUSE_REASONS}
         if reason and reason not in valid:
@@ -500,14 +690,15 @@ class WorkshopOrderTablet(models.Model):
                 open_session.operator_id = op.id
         self.action_pause_timer(reason=reason or False, note=note or False)
         self._tablet_stamp(op, _('Reloj pausado'))
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
-    def tablet_resume(self, operator_id=False):
+    def tablet_resume(self, operator_id=False, known_revision=False):
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         op = self._tablet_operator(operator_id)
         self.action_resume_timer()
         self._tablet_stamp(op, _('Reloj reanudado'))
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
     def tablet_take(self, operator_id=False):
         """El operador se asigna como responsable de la orden."""
@@ -524,7 +715,8 @@ class WorkshopOrderTablet(models.Model):
             self.message_post(body=_('Orden tomada desde tableta por %s.') % self.env.user.name)
         return self.get_tablet_order_detail()
 
-    def tablet_add_progress_log(self, area_sqm, consumptions, notes=False, date=False, operator_id=False):
+    def tablet_add_progress_log(self, area_sqm, consumptions, notes=False, date=False, operator_id=False,
+                                known_revision=False):
         """Registra una corrida de bitácora desde la tableta.
 
         `consumptions`: lista de {input_line_id, consumed_sqm}. Las validaciones
@@ -532,6 +724,7 @@ class WorkshopOrderTablet(models.Model):
         corrida) las aplican las constraints del modelo.
         """
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         if self.state != 'in_workshop':
             raise UserError(_('Sólo se registra bitácora en órdenes en taller.'))
         lines = []
@@ -568,10 +761,11 @@ class WorkshopOrderTablet(models.Model):
             vals['date'] = date
         self.env['workshop.progress.log'].create(vals)
         self._tablet_stamp(op, _('Corrida registrada (%.2f m²)') % area)
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
-    def tablet_delete_progress_log(self, log_id, operator_id=False):
+    def tablet_delete_progress_log(self, log_id, operator_id=False, known_revision=False):
         self.ensure_one()
+        begin = self._tablet_mutation_begin(known_revision)
         op = self._tablet_operator(operator_id)
         if self.state != 'in_workshop':
             raise UserError(_('Sólo se edita la bitácora de órdenes en taller.'))
@@ -581,7 +775,7 @@ class WorkshopOrderTablet(models.Model):
         log_desc = '%s · %.2f m²' % (log.date, log.area_sqm or 0.0)
         log.unlink()
         self._tablet_stamp(op, _('Corrida borrada (%s)') % log_desc)
-        return self.get_tablet_order_detail()
+        return self._tablet_mutation_result(begin)
 
     def tablet_declare_result(self, operator_id=False):
         """Paso 3 desde la tableta: cierra la orden (devuelve no usadas, cuadra merma)."""
@@ -591,7 +785,277 @@ class WorkshopOrderTablet(models.Model):
         self._tablet_stamp(op, _('Resultado declarado'))
         return self.get_tablet_order_detail()
 
+    # ─── Lote de comandos (idempotente) ─────────────────────────────────────
+    _TABLET_COMMANDS = {
+        'add_output': lambda order, a, op: order.tablet_add_output(
+            a.get('kind'), a.get('values'), operator_id=op),
+        'update_output': lambda order, a, op: order.tablet_update_output(
+            a.get('line_id'), a.get('values'), operator_id=op),
+        'delete_output': lambda order, a, op: order.tablet_delete_output(
+            a.get('line_id'), operator_id=op),
+        'add_log': lambda order, a, op: order.tablet_add_progress_log(
+            a.get('area_sqm'), a.get('consumptions'), notes=a.get('notes') or False,
+            date=a.get('date') or False, operator_id=op),
+        'delete_log': lambda order, a, op: order.tablet_delete_progress_log(
+            a.get('log_id'), operator_id=op),
+        'pause': lambda order, a, op: order.tablet_pause(
+            reason=a.get('reason') or False, note=a.get('note') or False, operator_id=op),
+        'resume': lambda order, a, op: order.tablet_resume(operator_id=op),
+    }
+
+    def _tablet_check_command(self, command):
+        """(llave, operación, argumentos) de un comando, validados."""
+        if not isinstance(command, dict):
+            raise UserError(_('Comando de tableta inválido.'))
+        key = str(command.get('key') or '').strip()
+        op = command.get('op')
+        if not key or len(key) > 128:
+            raise UserError(_('Cada comando necesita una llave de idempotencia.'))
+        if op not in self._TABLET_COMMANDS:
+            raise UserError(_('Operación de tableta desconocida: %s') % op)
+        args = command.get('args') or {}
+        if not isinstance(args, dict):
+            raise UserError(_('Argumentos inválidos en el comando %s.') % key)
+        return key, op, args
+
+    def _tablet_apply_command(self, command, operator_id=False):
+        """Aplica UN comando si su llave es nueva. Devuelve la llave y si aplicó."""
+        self.ensure_one()
+        key, op, args = self._tablet_check_command(command)
+        if not self.env['workshop.tablet.command'].sudo()._claim(key, self.id, op):
+            return key, False
+        op_id = command.get('operator_id') or operator_id or False
+        self._TABLET_COMMANDS[op](
+            self.with_context(tablet_command_batch=True), args, op_id,
+        )
+        return key, True
+
+    @api.model
+    def tablet_apply_commands(self, order_id, commands, operator_id=False, known_revision=False):
+        """Aplica en UNA transacción un lote ordenado de comandos de la tableta.
+
+        `commands`: [{'key', 'op', 'args', 'operator_id'?}] con `op` en
+        add_output / update_output / delete_output / add_log / delete_log /
+        pause / resume. Las llaves ya vistas (reintentos) se omiten. Si un
+        comando falla se revierte el lote completo (llaves incluidas) y la
+        tableta puede reintentarlo tal cual. Responde una sola vez: delta
+        contra `known_revision` o el detalle completo, más `applied` y
+        `duplicates` con las llaves.
+        """
+        order = self.browse(int(order_id)).exists()
+        if not order:
+            raise UserError(_('La orden ya no existe.'))
+        begin = order._tablet_mutation_begin(known_revision)
+        applied, duplicates = [], []
+        for command in commands or []:
+            key, done = order._tablet_apply_command(command, operator_id=operator_id)
+            (applied if done else duplicates).append(key)
+        result = order._tablet_mutation_result(begin)
+        result.update({'applied': applied, 'duplicates': duplicates})
+        return result
+
+    # ─── Bitácora sin red (journal) ─────────────────────────────────────────
+    def _tablet_journal_resolution(self, op, args):
+        """¿Sigue teniendo sentido una acción hecha sin red?
+
+        Devuelve None (aplicar), ('noop', motivo) si el servidor ya está en el
+        estado que buscaba la acción, o ('conflict', motivo) si ya no se puede
+        (p. ej. la orden se declaró en otra tableta).
+        """
+        self.ensure_one()
+        if op in ('delete_output', 'delete_log'):
+            model = 'workshop.output.line' if op == 'delete_output' else 'workshop.progress.log'
+            raw = args.get('line_id') if op == 'delete_output' else args.get('log_id')
+            try:
+                record = self.env[model].browse(int(raw)).exists()
+            except (TypeError, ValueError):
+                record = self.env[model]
+            if not record or record.order_id != self:
+                return ('noop', 'already_deleted')
+        if self.state != 'in_workshop':
+            return ('conflict', 'order_closed')
+        if op == 'pause' and not self.timer_running:
+            return ('noop', 'already_paused')
+        if op == 'resume' and self.timer_running:
+            return ('noop', 'already_running')
+        if op == 'update_output':
+            try:
+                line = self.env['workshop.output.line'].browse(int(args.get('line_id'))).exists()
+            except (TypeError, ValueError):
+                line = self.env['workshop.output.line']
+            if not line or line.order_id != self:
+                return ('conflict', 'line_missing')
+            if line.state in ('produced', 'received', 'scrapped', 'cancelled'):
+                return ('conflict', 'line_locked')
+        return None
+
+    def _tablet_sync_entry(self, entry, operator_id=False):
+        """Aplica una entrada del journal en su propio savepoint."""
+        self.ensure_one()
+        key = str((entry or {}).get('key') or '') if isinstance(entry, dict) else ''
+        try:
+            key, op, args = self._tablet_check_command(entry)
+        except UserError as exc:
+            return {'key': key, 'status': 'error', 'reason': 'invalid', 'message': str(exc)}
+        data = self.env.cr.precommit.data
+        bumped_before = dict(data.get(TABLET_DETAIL_REV_KEY) or {})
+        order = self
+        if op in ('pause', 'resume') and entry.get('client_ts'):
+            order = self.with_context(workshop_timer_at=entry['client_ts'])
+        try:
+            with self.env.cr.savepoint():
+                resolution = order._tablet_journal_resolution(op, args)
+                if resolution:
+                    # También se reclama la llave: un reintento sale como duplicado.
+                    claimed = self.env['workshop.tablet.command'].sudo()._claim(key, self.id, op)
+                    if not claimed:
+                        return {'key': key, 'status': 'duplicate'}
+                    return {'key': key, 'status': resolution[0], 'reason': resolution[1]}
+                key, done = order._tablet_apply_command(entry, operator_id=operator_id)
+        except (UserError, ValidationError) as exc:
+            # El savepoint deshizo la revisión de detalle: que vuelva a avanzar.
+            data[TABLET_DETAIL_REV_KEY] = bumped_before
+            return {'key': key, 'status': 'error', 'reason': 'rejected', 'message': str(exc)}
+        return {'key': key, 'status': 'applied' if done else 'duplicate'}
+
+    @api.model
+    def tablet_sync_journal(self, entries, operator_id=False, known_revisions=None):
+        """Sincroniza el journal que la tableta acumuló sin red.
+
+        `entries`: [{'key', 'order_id', 'op', 'args', 'client_ts'?,
+        'operator_id'?}] en el orden en que se hicieron, de cualquier orden.
+        Cada entrada corre en su propio savepoint y se clasifica:
+
+        - `applied`: se aplicó; `duplicate`: la llave ya se había aplicado.
+        - `noop`: el servidor ya estaba en ese estado (pausa sobre pausa,
+          borrado de algo que ya no existe).
+        - `conflict`: ya no aplica (orden declarada o cancelada en otro lado,
+          salida cerrada); la tableta la descarta y avisa al operador.
+        - `error`: la regla de negocio la rechazó (mensaje incluido).
+
+        Pausas y reanudaciones usan `client_ts` (acotado) como hora del reloj.
+        Responde un detalle por orden tocada, delta si `known_revisions`
+        ({order_id: revisión}) coincide, y la revisión del tablero.
+        """
+        known_revisions = {
+            str(k): v for k, v in (known_revisions or {}).items()
+        }
+        begins = {}
+        results = []
+        for entry in entries or []:
+            try:
+                order = self.browse(int(entry.get('order_id'))).exists()
+            except (TypeError, ValueError, AttributeError):
+                order = self.browse()
+            if not order:
+                results.append({
+                    'key': (entry or {}).get('key') if isinstance(entry, dict) else False,
+                    'status': 'conflict', 'reason': 'order_missing',
+                })
+                continue
+            if order.id not in begins:
+                begins[order.id] = order._tablet_mutation_begin(
+                    known_revisions.get(str(order.id), False)
+                )
+            results.append(order._tablet_sync_entry(entry, operator_id=operator_id))
+        return {
+            'results': results,
+            'orders': {
+                str(order_id): self.browse(order_id)._tablet_mutation_result(begin)
+                for order_id, begin in begins.items()
+            },
+            'board_revision': self._workshop_board_revision(),
+            'server_now': _dt(fields.Datetime.now()),
+        }
+
     @api.model
     def tablet_reorder_queue(self, ordered_ids):
         self.reorder_workshop_queue(ordered_ids)
         return True
+
+    @api.model
+    def tablet_move_before(self, order_id, anchor_id=False, after_id=False):
+        """Arrastre de UNA tarjeta en la tableta: escribe sólo esa orden."""
+        return self.move_before(order_id, anchor_id, after_id) is not False
+
+
+# ─── Marcas de cambio para las respuestas delta ─────────────────────────────
+class WorkshopInputLineTablet(models.Model):
+    _inherit = 'workshop.input.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        _tablet_mark_dirty(lines)
+        return lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        _tablet_mark_dirty(self)
+        return res
+
+    def unlink(self):
+        _tablet_mark_dirty(self)
+        return super().unlink()
+
+
+class WorkshopOutputLineTablet(models.Model):
+    _inherit = 'workshop.output.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        _tablet_mark_dirty(lines)
+        return lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        _tablet_mark_dirty(self)
+        return res
+
+    def unlink(self):
+        _tablet_mark_dirty(self)
+        return super().unlink()
+
+
+class WorkshopWorkSessionTablet(models.Model):
+    _inherit = 'workshop.work.session'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        sessions = super().create(vals_list)
+        _tablet_mark_dirty(sessions)
+        return sessions
+
+    def write(self, vals):
+        res = super().write(vals)
+        _tablet_mark_dirty(self)
+        return res
+
+    def unlink(self):
+        _tablet_mark_dirty(self)
+        return super().unlink()
+
+
+class WorkshopProgressLogTablet(models.Model):
+    _inherit = 'workshop.progress.log'
+
+    # Una corrida cambia el consumido/restante de sus placas: también viajan.
+    @api.model_create_multi
+    def create(self, vals_list):
+        logs = super().create(vals_list)
+        _tablet_mark_dirty(logs)
+        _tablet_mark_dirty(logs.consumption_line_ids.input_line_id)
+        return logs
+
+    def write(self, vals):
+        inputs = self.consumption_line_ids.input_line_id
+        res = super().write(vals)
+        _tablet_mark_dirty(self)
+        _tablet_mark_dirty(inputs | self.consumption_line_ids.input_line_id)
+        return res
+
+    def unlink(self):
+        _tablet_mark_dirty(self)
+        _tablet_mark_dirty(self.consumption_line_ids.input_line_id)
+        return super().unlink()
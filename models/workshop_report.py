@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Datos de los PDF del taller (ticket y orden de recolección).
+
+Al imprimir en lote (tickets de todo el turno) se cargan de una pasada las
+líneas, lotes, productos y ubicaciones de todos los documentos antes de
+renderizar, en lugar de leerlos renglón por renglón dentro del QWeb. El PDF
+del ticket además se guarda como adjunto con una huella de su contenido
+(`print_attachment_name`) y se reutiliza hasta que el ticket cambie.
+"""
+from odoo import api, models
+
+# Medidas del lote que imprime la orden de recolección (stock_lot_dimensions).
+PICK_LOT_FIELDS = ('name', 'x_grosor', 'x_ancho', 'x_alto', 'x_bloque')
+
+
+class ReportWorkshopTicket(models.AbstractModel):
+    _name = 'report.stone_workshop.report_workshop_ticket'
+    _description = 'PDF de ticket de taller'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        # Sólo se llega aquí por los tickets sin PDF vigente: los guardados de
+        # versiones anteriores ya no sirven.
+        docs = self.env['workshop.ticket'].browse(docids)
+        docs._workshop_print_prefetch()
+        docs._workshop_purge_stale_print_attachments()
+        return {
+            'doc_ids': docs.ids,
+            'doc_model': 'workshop.ticket',
+            'docs': docs,
+            'data': data,
+        }
+
+
+class ReportWorkshopPick(models.AbstractModel):
+    _name = 'report.stone_workshop.report_workshop_pick'
+    _description = 'PDF de orden de recolección de taller'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['workshop.order'].browse(docids)
+        lines = docs.input_line_ids
+        lines.fetch(['state', 'lot_id', 'product_id', 'location_id', 'area_sqm', 'qty_in', 'block_name'])
+        lot_model = self.env['stock.lot']
+        lines.lot_id.fetch([fname for fname in PICK_LOT_FIELDS if fname in lot_model._fields])
+        lines.location_id.fetch(['complete_name'])
+        lines.product_id.mapped('display_name')
+        return {
+            'doc_ids': docs.ids,
+            'doc_model': 'workshop.order',
+            'docs': docs,
+            'data': data,
+        }
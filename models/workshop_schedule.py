@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""Programación a capacidad finita de la cola del taller.
+
+Recorre, en una sola pasada, primero las órdenes en ejecución (lo que les falta
+de su estimado) y después la cola priorizada en el mismo orden del panel
+(estacionadas arriba, luego `queue_sequence`). Cada orden ocupa capacidad
+diaria del centro de trabajo que quede libre primero (o del taller, si no hay
+centros) sobre su calendario laboral y recibe un inicio y un fin proyectados.
+El avance entre días se hace con la aritmética cerrada del calendario, así que
+el costo es O(n) sin importar cuántos días abarque una orden. El resultado se
+guarda por revisión del tablero y viaja en cada tarjeta.
+"""
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+import pytz
+
+from odoo import api, fields, models
+
+from .workshop_calendar import parse_holidays
+from .workshop_order import WORKSHOP_HOURS_PER_DAY
+
+# Hora local en que arranca la jornada del taller. Las horas proyectadas se
+# reparten sobre una jornada de WORKSHOP_HOURS_PER_DAY a partir de aquí.
+WORKSHOP_DAY_START_HOUR = 8
+
+# Programaciones por proceso: {(bd, usuario, compañías, tz, fecha): (caduca,
+# revisión, plan)}. El usuario va en la llave por las reglas de registro; la
+# caducidad corta evita que los inicios proyectados (calculados desde "ahora")
+# se queden congelados mientras el tablero no cambia de revisión.
+WORKSHOP_SCHEDULE_CACHE_TTL = 60.0
+_SCHEDULE_CACHE = {}
+
+
+class WorkshopOrderSchedule(models.Model):
+    _inherit = 'workshop.order'
+
+    @api.model
+    def _workshop_schedule_tz(self):
+        return pytz.timezone(self.env.user.tz or self.env.company.partner_id.tz or 'UTC')
+
+    @api.model
+    def _workshop_schedule_to_utc(self, day, minutes_used, capacity_minutes, tz):
+        """Momento (UTC, naive) de la jornada de `day` tras `minutes_used` de capacidad."""
+        fraction = (minutes_used / capacity_minutes) if capacity_minutes > 0 else 0.0
+        local = datetime.combine(day, dt_time(WORKSHOP_DAY_START_HOUR)) + timedelta(
+            hours=fraction * WORKSHOP_HOURS_PER_DAY,
+        )
+        return tz.localize(local).astimezone(pytz.utc).replace(tzinfo=None)
+
+    @api.model
+    def _workshop_schedule_origin(self, calendar, capacity_minutes, tz):
+        """Día y capacidad ya consumida en el punto de arranque (ahora)."""
+        now_local = fields.Datetime.now().replace(tzinfo=pytz.utc).astimezone(tz)
+        today = now_local.date()
+        if not calendar.is_working_day(today):
+            return calendar.next_working_day(today), 0.0
+        shift_start = datetime.combine(today, dt_time(WORKSHOP_DAY_START_HOUR))
+        elapsed_h = (now_local.replace(tzinfo=None) - shift_start).total_seconds() / 3600.0
+        if elapsed_h <= 0:
+            return today, 0.0
+        if elapsed_h >= WORKSHOP_HOURS_PER_DAY:
+            return calendar.add_working_days(today, 1), 0.0
+        return today, capacity_minutes * elapsed_h / WORKSHOP_HOURS_PER_DAY
+
+    @api.model
+    def _workshop_schedule_advance(self, calendar, day, used, minutes, capacity_minutes):
+        """Avanza el cursor (día, minutos usados) en `minutes` de trabajo.
+
+        Días completos con `add_working_days` (forma cerrada) y el resto dentro
+        del día en que termina.
+        """
+        total = used + max(0.0, minutes)
+        full_days, rest = divmod(total, capacity_minutes)
+        full_days = int(full_days)
+        if full_days and rest <= 1e-9:
+            # Termina justo al cierre de una jornada: se queda en ese día.
+            full_days -= 1
+            rest = capacity_minutes
+        if full_days:
+            day = calendar.add_working_days(day, full_days)
+        return day, rest
+
+    @api.model
+    def _workshop_schedule_lanes(self, tz):
+        """Carriles del programador: un centro de trabajo activo = un carril.
+
+        Sin centros configurados hay un solo carril con la capacidad y el
+        calendario generales del taller (el comportamiento de siempre).
+        """
+        workcenters = self.env['workshop.workcenter'].search([
+            ('company_id', 'in', self.env.companies.ids),
+        ])
+        if not workcenters:
+            calendar = self._get_workshop_calendar()
+            capacity = self._get_daily_capacity_hours() * 60.0
+            day, used = self._workshop_schedule_origin(calendar, capacity, tz)
+            return [{
+                'id': False, 'name': '', 'sequence': 0, 'calendar': calendar,
+                'capacity': capacity, 'day': day, 'used': used, 'load': 0.0, 'count': 0,
+            }]
+        general = parse_holidays(
+            self.env['ir.config_parameter'].sudo().get_param('stone_workshop.holidays')
+        )
+        lanes = []
+        for index, wc in enumerate(workcenters):
+            calendar = wc._get_working_calendar(general_holidays=general)
+            capacity = wc.daily_capacity_hours * 60.0
+            day, used = self._workshop_schedule_origin(calendar, capacity, tz)
+            lanes.append({
+                'id': wc.id, 'name': wc.name, 'sequence': index, 'calendar': calendar,
+                'capacity': capacity, 'day': day, 'used': used, 'load': 0.0, 'count': 0,
+                'process_ids': set(wc.process_ids.ids),
+            })
+        return lanes
+
+    @api.model
+    def _workshop_schedule_plan(self, rows):
+        """Programación por lista de todas las órdenes activas de `rows`.
+
+        Cada orden, en orden de prioridad, va al carril elegible que quede
+        libre primero: su centro fijo si lo tiene, si no los centros de su
+        proceso, y si el proceso no declara centros, cualquiera. Devuelve:
+
+        - `orders`: `{order_id: {'projected_start', 'projected_finish',
+          'projected_finish_label', 'workcenter_id', 'workcenter'}}` con
+          datetimes UTC en texto.
+        - `workcenters`: carga asignada por centro (vacío sin centros).
+        """
+        tz = self._workshop_schedule_tz()
+        lanes = self._workshop_schedule_lanes(tz)
+        by_id = {lane['id']: lane for lane in lanes if lane['id']}
+        by_process = {}
+        for lane in by_id.values():
+            for process_id in lane['process_ids']:
+                by_process.setdefault(process_id, []).append(lane)
+
+        schedule = {}
+        for row, minutes in self._workshop_schedule_sequence(rows):
+            pinned = row.get('workcenter_id') and row['workcenter_id'][0]
+            process_id = row.get('process_id') and row['process_id'][0]
+            if pinned and pinned in by_id:
+                candidates = [by_id[pinned]]
+            else:
+                candidates = by_process.get(process_id) or lanes
+            lane = min(candidates, key=lambda ln: (ln['day'], ln['used'] / ln['capacity'], ln['sequence']))
+            start = self._workshop_schedule_to_utc(lane['day'], lane['used'], lane['capacity'], tz)
+            lane['day'], lane['used'] = self._workshop_schedule_advance(
+                lane['calendar'], lane['day'], lane['used'], minutes, lane['capacity'],
+            )
+            finish = self._workshop_schedule_to_utc(lane['day'], lane['used'], lane['capacity'], tz)
+            schedule[row['id']] = {
+                'projected_start': fields.Datetime.to_string(start),
+                'projected_finish': fields.Datetime.to_string(finish),
+                'projected_finish_label': self._format_spanish_date(lane['day']),
+                'workcenter_id': lane['id'],
+                'workcenter': lane['name'],
+            }
+            lane['load'] += minutes
+            lane['count'] += 1
+            if lane['used'] >= lane['capacity'] - 1e-9:
+                # Jornada llena: el carril queda libre al abrir el siguiente día hábil.
+                lane['day'] = lane['calendar'].add_working_days(lane['day'], 1)
+                lane['used'] = 0.0
+
+        workcenters = [{
+            'id': lane['id'],
+            'name': lane['name'],
+            'capacity_hours': lane['capacity'] / 60.0,
+            'load_hours': lane['load'] / 60.0,
+            'load_days': (lane['load'] / lane['capacity']) if lane['capacity'] else 0.0,
+            'order_count': lane['count'],
+            'next_free_date': self._format_spanish_date(lane['day']),
+            'next_free_day': lane['day'],
+        } for lane in lanes if lane['id']]
+        return {'orders': schedule, 'workcenters': workcenters}
+
+    @api.model
+    def _workshop_queue_schedule_compute(self, rows):
+        """Inicio/fin proyectados por orden (ver `_workshop_schedule_plan`)."""
+        return self._workshop_schedule_plan(rows)['orders']
+
+    @api.model
+    def _workshop_schedule_sequence(self, rows):
+        """Órdenes en el orden en que ocupan capacidad, con sus minutos pendientes.
+
+        Primero las que están en ejecución (por fecha de inicio), luego la cola
+        con el mismo criterio del panel. En taller cuenta sólo lo que falta.
+        """
+        ids = self._workshop_board_ids_from_rows(rows, limit=None)
+        by_id = {r['id']: r for r in rows}
+        ordered = []
+        for order_id in ids['execution'] + ids['queue']:
+            row = by_id[order_id]
+            minutes = row['estimated_minutes'] or 0.0
+            if row['state'] == 'in_workshop':
+                minutes = max(0.0, minutes - (row['worked_seconds_closed'] or 0.0) / 60.0)
+            ordered.append((row, minutes))
+        return ordered
+
+    @api.model
+    def get_workshop_queue_plan(self, rows=None):
+        """Programación completa (órdenes + carga por centro), por revisión.
+
+        Se calcula una vez por revisión del tablero, usuario, compañía, zona
+        horaria y día, y a lo más se reutiliza WORKSHOP_SCHEDULE_CACHE_TTL
+        segundos; cualquier cambio en órdenes o centros avanza la revisión.
+        """
+        tz = self._workshop_schedule_tz()
+        key = (
+            self.env.cr.dbname,
+            self.env.uid,
+            tuple(sorted(self.env.companies.ids)),
+            tz.zone,
+            fields.Date.context_today(self),
+        )
+        revision = self._workshop_board_revision()
+        now = time.monotonic()
+        cached = _SCHEDULE_CACHE.get(key)
+        if cached and cached[0] > now and cached[1] == revision:
+            return cached[2]
+        if rows is None:
+            rows = self._workshop_active_order_rows()
+        plan = self._workshop_schedule_plan(rows)
+        for stale in [k for k, v in _SCHEDULE_CACHE.items() if v[0] <= now or k[4] != key[4]]:
+            _SCHEDULE_CACHE.pop(stale, None)
+        _SCHEDULE_CACHE[key] = (now + WORKSHOP_SCHEDULE_CACHE_TTL, revision, plan)
+        return plan
+
+    @api.model
+    def get_workshop_queue_schedule(self):
+        """Inicio/fin proyectados de todas las órdenes activas.
+
+        Pensado para que ventas cotice fechas sin una llamada por orden.
+        """
+        return self.get_workshop_queue_plan()['orders']
+
+    @api.model
+    def _workshop_capacity_from_rows(self, rows, plan=None):
+        """Con centros de trabajo, la capacidad es la suma de los carriles.
+
+        El próximo espacio es el primer centro que queda libre y cada centro
+        reporta su carga (h asignadas, días de cola y cuándo se desocupa).
+        """
+        res = super()._workshop_capacity_from_rows(rows)
+        if plan is None:
+            plan = self._workshop_schedule_plan(rows)
+        workcenters = plan['workcenters']
+        if workcenters:
+            total = sum(wc['capacity_hours'] for wc in workcenters)
+            res['capacity_hours'] = total
+            res['next_slot_days'] = (res['backlog_hours'] / total) if total > 0 else 0.0
+            first_free = min(workcenters, key=lambda wc: wc['next_free_day'])
+            res['next_slot_date'] = first_free['next_free_date']
+        res['workcenters'] = [
+            {k: v for k, v in wc.items() if k != 'next_free_day'} for wc in workcenters
+        ]
+        return res
+
+    @api.model
+    def _workshop_board_annotate_schedule(self, cards, schedule):
+        """Copia las fechas proyectadas a las tarjetas del panel."""
+        empty = {
+            'projected_start': False, 'projected_finish': False,
+            'projected_finish_label': '', 'workcenter_id': False, 'workcenter': '',
+        }
+        for card in cards:
+            card.update(schedule.get(card['id'], empty))
+        return cards
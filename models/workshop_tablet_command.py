@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Llaves de idempotencia de los comandos de la tableta.
+
+Con Wi-Fi inestable la app reintenta. Cada comando lleva una llave generada
+en la tableta; antes de aplicarlo se inserta aquí con `ON CONFLICT DO
+NOTHING`: si la llave ya existía es un reintento y se omite. La inserción vive
+en la misma transacción que el comando, así que si éste falla la llave también
+se revierte y el reintento vuelve a aplicarse. Un cron purga las llaves viejas.
+"""
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Días que se conservan las llaves (ventana de reintento de la tableta).
+TABLET_COMMAND_RETENTION_DAYS = 7
+
+
+class WorkshopTabletCommand(models.Model):
+    _name = 'workshop.tablet.command'
+    _description = 'Comando aplicado desde la tableta (idempotencia)'
+    _order = 'id desc'
+    _rec_name = 'key'
+
+    key = fields.Char(string='Llave', required=True, readonly=True)
+    order_id = fields.Many2one(
+        'workshop.order', string='Orden', index=True, ondelete='cascade', readonly=True,
+    )
+    op = fields.Char(string='Operación', readonly=True)
+    user_id = fields.Many2one('res.users', string='Usuario', readonly=True)
+
+    _key_uniq = models.Constraint(
+        'unique(key)',
+        'La llave del comando de tableta debe ser única.',
+    )
+
+    @api.model
+    def _claim(self, key, order_id, op):
+        """Registra la llave; False si ya se había aplicado (reintento)."""
+        self.env.cr.execute("""
+            INSERT INTO workshop_tablet_command (
+                key, order_id, op, user_id, create_uid, create_date, write_uid, write_date
+            )
+            VALUES (%(key)s, %(order)s, %(op)s, %(uid)s,
+                    %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (key) DO NOTHING
+            RETURNING id
+        """, {'key': key, 'order': order_id or None, 'op': op, 'uid': self.env.uid})
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _cron_purge(self, days=TABLET_COMMAND_RETENTION_DAYS):
+        """Cron: borra las llaves más viejas que la ventana de reintento."""
+        limit = fields.Datetime.now() - timedelta(days=days)
+        self.env.cr.execute(
+            'DELETE FROM workshop_tablet_command WHERE create_date < %s', (limit,),
+        )
+        _logger.info(
+            '[STONE WORKSHOP] llaves de comandos de tableta purgadas: %s.', self.env.cr.rowcount,
+        )
+        # De paso, las revisiones de detalle que ya quedaron atrás.
+        purged = self.env['workshop.order']._tablet_purge_detail_revisions()
+        _logger.info('[STONE WORKSHOP] revisiones de detalle de tableta purgadas: %s.', purged)
+        return True
@@ -1,7 +1,10 @@
-from collections import OrderedDict
+import hashlib
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+from .workshop_order import PROGRESS_SELECTOR_PAGE_SIZE
 
 
 WORKSHOP_TICKET_LOCK_STATES = ('draft', 'prepared', 'consumed')
@@ -54,138 +57,263 @@ class WorkshopOrder(models.Model):
         Devuelve el ticket creado o False si no hay nada que ticketear.
         """
         self.ensure_one()
-        if self.state != 'in_workshop':
-            return False
-
-        locked_ids = self._get_locked_workshop_ticket_input_line_ids()
-        lines = self.input_line_ids.filtered(lambda l: (
-            l.state != 'cancelled'
-            and l.lot_id
-            and l.product_id
-            and l.is_consumed
-            and not l.is_used
-            and l.id not in locked_ids
-        ))
-        if not lines:
-            return False
-
-        ticket = self.env['workshop.ticket'].create({
-            'order_id': self.id,
-            'responsible_id': (
-                self.responsible_id.id
-                if getattr(self, 'responsible_id', False) and self.responsible_id
-                else self.env.user.id
-            ),
-            'notes': notes or False,
-            'line_ids': [(0, 0, {
-                'sequence': index + 1,
-                'input_line_id': line.id,
-                'qty': line.qty_in,
-                'area_sqm': self._input_line_area(line),
-            }) for index, line in enumerate(lines)],
-        })
-        ticket.action_prepare()
-        return ticket
+        return self._workshop_prepare_tickets_batch(notes=notes)[:1] or False
 
-    def _get_locked_workshop_ticket_input_line_ids(self, exclude_ticket_id=None):
-        self.ensure_one()
-        tickets = self.workshop_ticket_ids.filtered(
-            lambda t: t.state in WORKSHOP_TICKET_LOCK_STATES
+    def _workshop_prepare_tickets_batch(self, notes=False):
+        """Un ticket preparado por orden en taller con sus placas elegibles.
+
+        Todo en lote: una consulta de candados y una de placas para todas las
+        órdenes, un `create` de tickets (las líneas van en el mismo lote) y la
+        preparación en bloque. Devuelve los tickets creados.
+        """
+        orders = self.filtered(lambda o: o.state == 'in_workshop')
+        if not orders:
+            return self.env['workshop.ticket']
+        locked_ids = orders._get_locked_workshop_ticket_input_line_ids()
+        lines = self.env['workshop.input.line'].search([
+            ('order_id', 'in', orders.ids),
+            ('state', '!=', 'cancelled'),
+            ('lot_id', '!=', False),
+            ('product_id', '!=', False),
+            ('is_consumed', '=', True),
+            ('is_used', '=', False),
+            ('id', 'not in', list(locked_ids)),
+        ], order='order_id, sequence, id')
+        lines_by_order = {}
+        for line in lines:
+            lines_by_order.setdefault(line.order_id, []).append(line)
+
+        vals_list = []
+        for order in orders:
+            order_lines = lines_by_order.get(order)
+            if not order_lines:
+                continue
+            vals_list.append({
+                'order_id': order.id,
+                'responsible_id': order.responsible_id.id or self.env.user.id,
+                'notes': notes or False,
+                'line_ids': [(0, 0, {
+                    'sequence': index + 1,
+                    'input_line_id': line.id,
+                    'qty': line.qty_in,
+                    'area_sqm': order._input_line_area(line),
+                }) for index, line in enumerate(order_lines)],
+            })
+        tickets = self.env['workshop.ticket'].create(vals_list)
+        tickets.action_prepare()
+        return tickets
+
+    def action_bulk_prepare_workshop_tickets(self):
+        """Acción masiva: prepara el ticket de surtido de varias órdenes."""
+        tickets = self._workshop_prepare_tickets_batch()
+        skipped = len(self) - len(tickets)
+        return tickets._workshop_ticket_summary_action(
+            _('Tickets preparados'),
+            _('%(tickets)s ticket(s) preparados con %(count)s placa(s), %(area).2f m². '
+              '%(skipped)s orden(es) sin placas para ticket o fuera de taller.') % {
+                'tickets': len(tickets),
+                'count': sum(tickets.mapped('line_count')),
+                'area': sum(tickets.mapped('total_area_sqm')),
+                'skipped': skipped,
+            },
         )
-        if exclude_ticket_id:
-            tickets = tickets.filtered(lambda t: t.id != exclude_ticket_id)
-        return set(tickets.mapped('line_ids.input_line_id').ids)
 
-    def _get_ticket_line_to_ticket_map(self, exclude_ticket_id=None):
-        self.ensure_one()
-        tickets = self.workshop_ticket_ids.filtered(
-            lambda t: t.state in WORKSHOP_TICKET_LOCK_STATES
+    # ─── Candados de ticket (SQL) ───────────────────────────────────────────
+    def _get_ticket_line_to_ticket_map(self, exclude_ticket_id=None, input_line_ids=None):
+        """`{input_line_id: [folios]}` de las placas amarradas a un ticket vivo.
+
+        Una sola consulta agrupada sobre las líneas de ticket unidas al estado
+        del ticket, para todas las órdenes de `self`. La comparten el selector,
+        el wizard y la preparación masiva; `_validate_ticket_lines` usa la
+        variante por ticket (`_ticket_collisions`). `input_line_ids` acota la
+        consulta a las placas que se van a validar.
+        """
+        if not self.ids:
+            return {}
+        self.env['workshop.ticket'].flush_model(['name', 'state', 'order_id'])
+        self.env['workshop.ticket.line'].flush_model(['ticket_id', 'input_line_id'])
+        query = SQL(
+            """
+            SELECT l.input_line_id, array_agg(t.name ORDER BY t.id)
+              FROM workshop_ticket_line l
+              JOIN workshop_ticket t ON t.id = l.ticket_id
+             WHERE t.order_id = ANY(%(orders)s)
+               AND t.state IN %(states)s
+               AND t.id != %(exclude)s
+            """,
+            orders=list(self.ids),
+            states=WORKSHOP_TICKET_LOCK_STATES,
+            exclude=int(exclude_ticket_id or 0),
         )
-        if exclude_ticket_id:
-            tickets = tickets.filtered(lambda t: t.id != exclude_ticket_id)
+        if input_line_ids is not None:
+            if not input_line_ids:
+                return {}
+            query = SQL('%s AND l.input_line_id = ANY(%s)', query, list(input_line_ids))
+        self.env.cr.execute(SQL('%s GROUP BY l.input_line_id', query))
+        return {input_line_id: list(names) for input_line_id, names in self.env.cr.fetchall()}
 
-        result = {}
-        for ticket in tickets:
-            for line in ticket.line_ids:
-                if line.input_line_id:
-                    result.setdefault(line.input_line_id.id, []).append(ticket.name)
-        return result
+    def _get_locked_workshop_ticket_input_line_ids(self, exclude_ticket_id=None):
+        return set(self._get_ticket_line_to_ticket_map(exclude_ticket_id=exclude_ticket_id))
 
-    def get_workshop_ticket_selector_data(self, editing_ticket_id=None):
+    # ─── Selector de placas del ticket (paginado) ───────────────────────────
+    def _ticket_selector_domain(self, editing_ticket, search=None):
+        """Placas que puede tomar el ticket: activas, en taller, sin corrida y
+        sin otro ticket vivo (salvo las del ticket que se edita)."""
         self.ensure_one()
-
-        editing_ticket = self.env['workshop.ticket'].browse(
-            int(editing_ticket_id or 0)
-        ).exists()
-        editing_input_ids = set(editing_ticket.mapped('line_ids.input_line_id').ids)
-        locked_input_ids = self._get_locked_workshop_ticket_input_line_ids(
+        editing_ids = editing_ticket.line_ids.input_line_id.ids
+        locked_ids = self._get_locked_workshop_ticket_input_line_ids(
             exclude_ticket_id=editing_ticket.id if editing_ticket else None
         )
+        domain = [
+            ('order_id', '=', self.id),
+            ('state', '!=', 'cancelled'),
+            ('lot_id', '!=', False),
+            ('product_id', '!=', False),
+            ('is_consumed', '=', True),
+            ('id', 'not in', list(locked_ids)),
+            '|', ('is_used', '=', False), ('id', 'in', editing_ids),
+        ]
+        search = (search or '').strip()
+        if search:
+            domain += [
+                '|', '|', '|',
+                ('lot_id.name', 'ilike', search),
+                ('block_name', 'ilike', search),
+                ('product_id.name', 'ilike', search),
+                ('location_id.complete_name', 'ilike', search),
+            ]
+        return domain
 
-        groups_map = OrderedDict()
-        active_lines = self.input_line_ids.filtered(
-            lambda line: line.state != 'cancelled'
-            and line.lot_id
-            and line.product_id
-            and line.is_consumed
-        ).sorted(lambda line: (
-            line.product_id.display_name or '',
-            line.lot_id.name or '',
-            line.sequence or 0,
-            line.id,
+    def _ticket_selector_line(self, line, editing_ids):
+        self.ensure_one()
+        product = line.product_id
+        return {
+            'rowKey': 'input-%s' % line.id,
+            'inputLineId': line.id,
+            'lotId': line.lot_id.id,
+            'lotName': line.lot_id.name or '',
+            'productId': product.id,
+            'productName': product.display_name or '',
+            'qty': line.qty_in or 0.0,
+            'areaSqm': self._input_line_area(line) or 0.0,
+            'widthCm': line.width_cm or 0.0,
+            'heightCm': line.height_cm or 0.0,
+            'thicknessCm': line.thickness_cm or 0.0,
+            'blockName': line.block_name or '',
+            'tone': line.tone or '',
+            'locationId': line.location_id.id if line.location_id else 0,
+            'locationName': line.location_id.display_name if line.location_id else '',
+            'state': line.state or '',
+            'isUsed': bool(line.is_used),
+            'isSelected': line.id in editing_ids,
+        }
+
+    def _ticket_selector_group_areas(self, domain, products):
+        """{producto: m²} de las placas de `domain`, con la regla de `_input_line_area`.
+
+        Se suma en SQL línea por línea: en productos con UdM de área la
+        cantidad sustituye a un área vacía o menor a un cuarto de ella, igual
+        que el m² que reporta cada placa del selector.
+        """
+        self.ensure_one()
+        InputLine = self.env['workshop.input.line']
+        area_product_ids = [product.id for product in products if self._product_uom_is_area(product)]
+        InputLine.flush_model(['product_id', 'area_sqm', 'qty_in'])
+        query = InputLine._search(domain)
+
+        def col(name):
+            return SQL.identifier(query.table, name)
+
+        line_area = SQL(
+            """
+            CASE
+                WHEN %(product)s = ANY(%(area_products)s)
+                     AND coalesce(%(qty)s, 0) > 0
+                     AND coalesce(%(area)s, 0) < %(qty)s * 0.25 THEN %(qty)s
+                WHEN coalesce(%(area)s, 0) > 0 THEN %(area)s
+                ELSE coalesce(%(qty)s, 0)
+            END
+            """,
+            product=col('product_id'), area=col('area_sqm'), qty=col('qty_in'),
+            area_products=area_product_ids,
+        )
+        self.env.cr.execute(SQL(
+            '%s GROUP BY %s',
+            query.select(col('product_id'), SQL('sum(%s)', line_area)),
+            col('product_id'),
         ))
+        return dict(self.env.cr.fetchall())
 
-        for line in active_lines:
-            if line.id in locked_input_ids:
-                continue
-            if line.is_used and line.id not in editing_input_ids:
-                continue
+    def _ticket_selector_editing(self, editing_ticket_id):
+        return self.env['workshop.ticket'].browse(int(editing_ticket_id or 0)).exists()
 
-            product = line.product_id
-            pid = product.id
-            if pid not in groups_map:
-                groups_map[pid] = {
-                    'groupKey': 'product-%s' % pid,
-                    'productId': pid,
-                    'productName': product.display_name or '',
-                    'lines': [],
-                    'lineCount': 0,
-                    'selectedCount': 0,
-                    'totalArea': 0.0,
-                }
-
-            area = self._input_line_area(line)
-            selected = line.id in editing_input_ids
-
-            line_data = {
-                'rowKey': 'input-%s' % line.id,
-                'inputLineId': line.id,
-                'lotId': line.lot_id.id,
-                'lotName': line.lot_id.name or '',
-                'productId': pid,
-                'productName': product.display_name or '',
-                'qty': line.qty_in or 0.0,
-                'areaSqm': area or 0.0,
-                'widthCm': line.width_cm or 0.0,
-                'heightCm': line.height_cm or 0.0,
-                'thicknessCm': line.thickness_cm or 0.0,
-                'blockName': line.block_name or '',
-                'tone': line.tone or '',
-                'locationId': line.location_id.id if line.location_id else 0,
-                'locationName': line.location_id.display_name if line.location_id else '',
-                'state': line.state or '',
-                'isUsed': bool(line.is_used),
-                'isSelected': selected,
-            }
+    def get_workshop_ticket_selector_data(self, editing_ticket_id=None, search=None):
+        """Grupos por producto con su resumen y, si caben en una página, sus placas.
+
+        Igual que el selector de bitácora: conteos en SQL, placas por página
+        (`get_workshop_ticket_selector_lines`) al expandir un grupo y las
+        placas del ticket que se edita siempre en `selected`.
+        """
+        self.ensure_one()
+        InputLine = self.env['workshop.input.line']
+        editing_ticket = self._ticket_selector_editing(editing_ticket_id)
+        editing_ids = set(editing_ticket.line_ids.input_line_id.ids)
+        domain = self._ticket_selector_domain(editing_ticket, search=search)
+        summaries = InputLine._read_group(domain, ['product_id'], ['__count'])
+        group_areas = self._ticket_selector_group_areas(
+            domain, [product for product, _count in summaries],
+        )
 
-            group = groups_map[pid]
-            group['lines'].append(line_data)
-            group['lineCount'] += 1
-            if selected:
-                group['selectedCount'] += 1
-                group['totalArea'] += area or 0.0
+        selected = [
+            self._ticket_selector_line(line, editing_ids)
+            for line in editing_ticket.line_ids.input_line_id.sorted(
+                lambda l: (l.lot_id.name or '', l.sequence or 0, l.id)
+            )
+        ]
+        inline = {}
+        if sum(count for _product, count in summaries) <= PROGRESS_SELECTOR_PAGE_SIZE:
+            for line in InputLine.search(domain, order='lot_id, sequence, id'):
+                inline.setdefault(line.product_id.id, []).append(
+                    self._ticket_selector_line(line, editing_ids)
+                )
 
-        return [group for group in groups_map.values() if group['lineCount'] > 0]
+        groups = []
+        for product, count in summaries:
+            lines = inline.get(product.id, [])
+            groups.append({
+                'groupKey': 'product-%s' % product.id,
+                'productId': product.id,
+                'productName': product.display_name or '',
+                'lines': lines,
+                'loaded': len(lines) >= count,
+                'lineCount': count,
+                'groupArea': group_areas.get(product.id) or 0.0,
+            })
+        return {
+            'groups': groups,
+            'selected': selected,
+            'pageSize': PROGRESS_SELECTOR_PAGE_SIZE,
+        }
+
+    def get_workshop_ticket_selector_lines(self, product_id, offset=0, limit=None,
+                                           editing_ticket_id=None, search=None):
+        """Una página de placas de un grupo del selector de ticket."""
+        self.ensure_one()
+        editing_ticket = self._ticket_selector_editing(editing_ticket_id)
+        editing_ids = set(editing_ticket.line_ids.input_line_id.ids)
+        domain = self._ticket_selector_domain(editing_ticket, search=search) + [
+            ('product_id', '=', int(product_id)),
+        ]
+        limit = min(int(limit or PROGRESS_SELECTOR_PAGE_SIZE), PROGRESS_SELECTOR_PAGE_SIZE * 5)
+        offset = max(0, int(offset or 0))
+        lines = self.env['workshop.input.line'].search(
+            domain, order='lot_id, sequence, id', offset=offset, limit=limit + 1,
+        )
+        return {
+            'lines': [self._ticket_selector_line(line, editing_ids) for line in lines[:limit]],
+            'offset': offset,
+            'hasMore': len(lines) > limit,
+        }
 
     def action_open_workshop_ticket_wizard(self):
         self.ensure_one()
@@ -307,6 +435,12 @@ class WorkshopTicket(models.Model):
         compute='_compute_totals',
         digits=(12, 4),
     )
+    print_attachment_name = fields.Char(
+        string='PDF en caché',
+        compute='_compute_print_attachment_name',
+        help='Nombre del PDF guardado del ticket. Lleva una huella del contenido '
+             'impreso: mientras el ticket no cambie se reimprime el mismo adjunto.',
+    )
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -324,7 +458,81 @@ class WorkshopTicket(models.Model):
             ticket.total_qty = sum(ticket.line_ids.mapped('qty'))
             ticket.total_area_sqm = sum(ticket.line_ids.mapped('area_sqm'))
 
+    def _ticket_collisions(self):
+        """`{ticket_id: {input_line_id: [folios]}}` de placas ya amarradas a
+        OTRO ticket vivo. Una sola consulta para todos los tickets de `self`."""
+        input_line_ids = self.line_ids.input_line_id.ids
+        if not input_line_ids:
+            return {}
+        self.env['workshop.ticket'].flush_model(['name', 'state', 'order_id'])
+        self.env['workshop.ticket.line'].flush_model(['ticket_id', 'input_line_id'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT mine.ticket_id, l.input_line_id, array_agg(t.name ORDER BY t.id)
+              FROM workshop_ticket_line mine
+              JOIN workshop_ticket_line l ON l.input_line_id = mine.input_line_id
+                                         AND l.ticket_id != mine.ticket_id
+              JOIN workshop_ticket t ON t.id = l.ticket_id
+             WHERE mine.ticket_id = ANY(%(tickets)s)
+               AND t.state IN %(states)s
+          GROUP BY mine.ticket_id, l.input_line_id
+            """,
+            tickets=list(self.ids),
+            states=WORKSHOP_TICKET_LOCK_STATES,
+        ))
+        result = {}
+        for ticket_id, input_line_id, names in self.env.cr.fetchall():
+            result.setdefault(ticket_id, {})[input_line_id] = list(names)
+        return result
+
+    # ─── PDF en caché ───────────────────────────────────────────────────────
+    def _workshop_print_hash(self):
+        """Huella de todo lo que muestra el PDF del ticket."""
+        self.ensure_one()
+        payload = [
+            self.name, self.state, self.company_id.id,
+            self.order_id.display_name, self.order_id.process_id.display_name,
+            self.responsible_id.display_name, str(self.date_ticket or ''), self.notes or '',
+            self.line_count, '%.4f' % (self.total_area_sqm or 0.0),
+        ] + [
+            (
+                line.lot_id.name or '', line.product_id.display_name or '',
+                line.block_name or '', line.location_id.complete_name or '',
+                '%.4f' % (line.area_sqm or 0.0),
+            )
+            for line in self.line_ids.sorted(lambda l: (l.sequence, l.id))
+        ]
+        return hashlib.sha1(repr(payload).encode()).hexdigest()[:12]
+
+    def _compute_print_attachment_name(self):
+        for ticket in self:
+            ticket.print_attachment_name = 'Ticket-Taller-%s-%s.pdf' % (
+                (ticket.name or '').replace('/', '-'), ticket._workshop_print_hash(),
+            )
+
+    def _workshop_print_prefetch(self):
+        """Carga de una pasada las líneas, lotes, productos y ubicaciones del lote."""
+        lines = self.line_ids
+        lines.fetch(['sequence', 'lot_id', 'product_id', 'block_name', 'location_id', 'area_sqm'])
+        lines.lot_id.fetch(['name'])
+        lines.location_id.fetch(['complete_name'])
+        lines.product_id.mapped('display_name')
+        self.order_id.fetch(['name', 'process_id'])
+
+    def _workshop_purge_stale_print_attachments(self):
+        """Borra los PDF guardados de versiones anteriores de los tickets."""
+        if not self:
+            return
+        stale = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', self.ids),
+            ('name', '=like', 'Ticket-Taller-%.pdf'),
+        ])
+        current = {(ticket.id, ticket.print_attachment_name) for ticket in self}
+        stale.filtered(lambda a: (a.res_id, a.name) not in current).unlink()
+
     def _validate_ticket_lines(self):
+        collisions_by_ticket = self._ticket_collisions()
         for ticket in self:
             if not ticket.line_ids:
                 raise UserError(_('Selecciona al menos una placa/lote para el ticket.'))
@@ -363,9 +571,7 @@ class WorkshopTicket(models.Model):
                     'Hay placas duplicadas dentro del mismo ticket: %s'
                 ) % ', '.join(duplicates.keys()))
 
-            locked_map = ticket.order_id._get_ticket_line_to_ticket_map(
-                exclude_ticket_id=ticket.id
-            )
+            locked_map = collisions_by_ticket.get(ticket.id, {})
             collisions = {}
             for input_line in input_lines:
                 if input_line.id in locked_map:
@@ -381,66 +587,102 @@ class WorkshopTicket(models.Model):
                 ) % msg)
 
     def action_prepare(self):
-        for ticket in self:
-            if ticket.state not in ('draft', 'prepared'):
-                continue
-            ticket._validate_ticket_lines()
-            ticket.write({'state': 'prepared'})
-            ticket.message_post(body=_(
+        tickets = self.filtered(lambda t: t.state in ('draft', 'prepared'))
+        if not tickets:
+            return True
+        tickets._validate_ticket_lines()
+        tickets.write({'state': 'prepared'})
+        tickets._message_log_batch(bodies={
+            ticket.id: _(
                 'Ticket preparado con %(count)s placa(s), %(area).4f m².'
             ) % {
                 'count': ticket.line_count,
                 'area': ticket.total_area_sqm,
-            })
+            }
+            for ticket in tickets
+        })
         return True
 
     def action_mark_consumed(self):
-        for ticket in self:
-            if ticket.state == 'consumed':
-                continue
-            if ticket.state == 'cancelled':
-                raise UserError(_('No puedes consumir un ticket cancelado.'))
+        """Consume los tickets en lote.
 
-            if ticket.state == 'draft':
-                ticket.action_prepare()
+        Una corrida por ticket: todas las corridas (con sus filas de consumo)
+        salen de un solo `create` y estado y fecha de todos los tickets de un
+        solo `write`. La corrida es distinta en cada ticket, así que ésa sí se
+        escribe ticket por ticket.
+        """
+        if self.filtered(lambda t: t.state == 'cancelled'):
+            raise UserError(_('No puedes consumir un ticket cancelado.'))
+        tickets = self.filtered(lambda t: t.state != 'consumed')
+        if not tickets:
+            return True
 
-            ticket._validate_ticket_lines()
-            input_lines = ticket.line_ids.mapped('input_line_id')
-            area = sum(ticket.order_id._input_line_area(line) for line in input_lines)
+        tickets.filtered(lambda t: t.state == 'draft').action_prepare()
+        tickets._validate_ticket_lines()
 
-            # El ticket consume cada placa íntegra por defecto (puede ajustarse
-            # luego desde el selector visual de la bitácora). Una fila de
-            # consumo por placa con su área total.
-            consumption_commands = [
-                (0, 0, {
-                    'input_line_id': line.id,
-                    'consumed_sqm': ticket.order_id._input_line_area(line),
-                })
-                for line in input_lines
-            ]
-            progress_log = self.env['workshop.progress.log'].create({
-                'order_id': ticket.order_id.id,
+        # El ticket consume cada placa íntegra por defecto (puede ajustarse
+        # luego desde el selector visual de la bitácora). Una fila de
+        # consumo por placa con su área total.
+        vals_list = []
+        for ticket in tickets:
+            order = ticket.order_id
+            input_lines = ticket.line_ids.mapped('input_line_id')
+            areas = [(line, order._input_line_area(line)) for line in input_lines]
+            vals_list.append({
+                'order_id': order.id,
                 'ticket_id': ticket.id,
                 'date': fields.Date.context_today(ticket),
                 'responsible_id': ticket.responsible_id.id or self.env.user.id,
-                'consumption_line_ids': consumption_commands,
-                'area_sqm': area,
+                'consumption_line_ids': [
+                    (0, 0, {'input_line_id': line.id, 'consumed_sqm': area})
+                    for line, area in areas
+                ],
+                'area_sqm': sum(area for _line, area in areas),
                 'notes': ticket.notes or _('Consumo registrado desde %s') % ticket.name,
             })
+        progress_logs = self.env['workshop.progress.log'].create(vals_list)
 
-            ticket.write({
-                'state': 'consumed',
-                'consumed_date': fields.Datetime.now(),
-                'progress_log_id': progress_log.id,
-            })
-            ticket.message_post(body=_(
+        tickets.write({'state': 'consumed', 'consumed_date': fields.Datetime.now()})
+        for ticket, progress_log in zip(tickets, progress_logs):
+            ticket.progress_log_id = progress_log
+        tickets._message_log_batch(bodies={
+            ticket.id: _(
                 'Ticket consumido. Se generó la corrida %(log)s con %(count)s placa(s).'
             ) % {
                 'log': progress_log.display_name,
-                'count': len(input_lines),
-            })
+                'count': len(progress_log.consumption_line_ids),
+            }
+            for ticket, progress_log in zip(tickets, progress_logs)
+        })
         return True
 
+    def action_bulk_mark_consumed(self):
+        """Acción masiva: consume los tickets preparados seleccionados."""
+        tickets = self.filtered(lambda t: t.state in ('draft', 'prepared'))
+        tickets.action_mark_consumed()
+        return tickets._workshop_ticket_summary_action(
+            _('Tickets consumidos'),
+            _('%(tickets)s ticket(s) consumidos, %(count)s placa(s) registradas en bitácora. '
+              '%(skipped)s ticket(s) omitidos (ya consumidos o cancelados).') % {
+                'tickets': len(tickets),
+                'count': sum(tickets.mapped('line_count')),
+                'skipped': len(self) - len(tickets),
+            },
+        )
+
+    def _workshop_ticket_summary_action(self, title, message):
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': title,
+                'message': message,
+                'type': 'success' if self else 'warning',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            },
+        }
+
     def action_cancel(self):
         for ticket in self:
             if ticket.state == 'consumed':
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Centros de trabajo del taller (sierras, pulidoras, estaciones manuales).
+
+Cada centro tiene su capacidad diaria y su calendario (días de descanso y
+feriados propios además de los del taller). Un proceso declara en qué centros
+puede correr; sin centros declarados, cualquier centro activo le sirve. El
+programador de la cola (`workshop_schedule`) reparte las órdenes entre los
+centros en paralelo.
+"""
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+from .workshop_calendar import WorkingCalendar, parse_holidays
+
+
+class WorkshopWorkcenter(models.Model):
+    _name = 'workshop.workcenter'
+    _description = 'Centro de trabajo del taller'
+    _order = 'sequence, name'
+
+    name = fields.Char(string='Nombre', required=True)
+    code = fields.Char(string='Código')
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+    company_id = fields.Many2one(
+        'res.company', string='Compañía', required=True, index=True,
+        default=lambda self: self.env.company,
+    )
+    daily_capacity_hours = fields.Float(
+        string='Capacidad diaria (h)', digits=(12, 2), default=8.0,
+        help='Horas de máquina/estación disponibles por día hábil.',
+    )
+    non_working_weekdays = fields.Char(
+        string='Días de descanso', default='6',
+        help='Días de la semana sin turno, separados por coma '
+             '(0 = lunes … 6 = domingo). Vacío: labora toda la semana.',
+    )
+    holidays = fields.Text(
+        string='Feriados propios',
+        help='Fechas AAAA-MM-DD en que este centro no labora (mantenimiento, '
+             'paros). Se suman a los feriados generales del taller.',
+    )
+    process_ids = fields.Many2many(
+        'workshop.process', 'workshop_process_workcenter_rel',
+        'workcenter_id', 'process_id', string='Procesos',
+        help='Procesos que pueden ejecutarse en este centro.',
+    )
+    color = fields.Integer(string='Color', default=0)
+
+    _code_company_uniq = models.Constraint(
+        'unique(code, company_id)',
+        'El código del centro de trabajo debe ser único por compañía.',
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        workcenters = super().create(vals_list)
+        workcenters._workshop_board_touch_company()
+        return workcenters
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._workshop_board_touch_company()
+        return res
+
+    def unlink(self):
+        self._workshop_board_touch_company()
+        return super().unlink()
+
+    def _workshop_board_touch_company(self):
+        """Capacidad o calendario cambió: las fechas proyectadas se recalculan."""
+        self.env['workshop.order'].sudo().search([
+            ('company_id', 'in', self.company_id.ids),
+            ('state', 'in', ('draft', 'in_workshop')),
+        ])._workshop_board_touch()
+
+    @api.constrains('daily_capacity_hours')
+    def _check_daily_capacity_hours(self):
+        for rec in self:
+            if rec.daily_capacity_hours <= 0.0:
+                raise ValidationError(_(
+                    'La capacidad diaria del centro "%s" debe ser mayor a cero.'
+                ) % rec.name)
+
+    @api.constrains('non_working_weekdays')
+    def _check_non_working_weekdays(self):
+        for rec in self:
+            days = rec._parse_non_working_weekdays()
+            if len(days) >= 7:
+                raise ValidationError(_(
+                    'El centro "%s" necesita al menos un día laborable.'
+                ) % rec.name)
+
+    def _parse_non_working_weekdays(self):
+        self.ensure_one()
+        raw = self.non_working_weekdays or ''
+        days = set()
+        for token in raw.replace(';', ',').split(','):
+            token = token.strip()
+            if token.isdigit() and 0 <= int(token) <= 6:
+                days.add(int(token))
+        return days
+
+    def _get_working_calendar(self, general_holidays=None):
+        """Calendario del centro: sus descansos + feriados generales y propios."""
+        self.ensure_one()
+        if general_holidays is None:
+            general_holidays = parse_holidays(
+                self.env['ir.config_parameter'].sudo().get_param('stone_workshop.holidays')
+            )
+        return WorkingCalendar(
+            self._parse_non_working_weekdays(),
+            tuple(general_holidays) + parse_holidays(self.holidays),
+        )
+
+
+class WorkshopProcessWorkcenter(models.Model):
+    _inherit = 'workshop.process'
+
+    workcenter_ids = fields.Many2many(
+        'workshop.workcenter', 'workshop_process_workcenter_rel',
+        'process_id', 'workcenter_id', string='Centros de trabajo',
+        help='Centros donde puede correr este proceso. Vacío: cualquier centro activo.',
+    )
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'workcenter_ids' in vals:
+            self.env['workshop.order'].sudo().search([
+                ('process_id', 'in', self.ids),
+                ('state', 'in', ('draft', 'in_workshop')),
+            ])._workshop_board_touch()
+        return res
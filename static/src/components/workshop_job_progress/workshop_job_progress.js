@@ -0,0 +1,110 @@
+/** @odoo-module **/
+/**
+ * Avance de un trabajo en segundo plano (workshop.job).
+ *
+ * Mientras el trabajo está en cola o en ejecución consulta su estado cada
+ * POLL_MS con `get_job_status` (una lectura ligera) y sólo recarga el
+ * registro cuando algo cambió. Al terminar o fallar deja de consultar.
+ */
+import { Component, useState, onMounted, onWillUnmount } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { standardFieldProps } from "@web/views/fields/standard_field_props";
+import { useService } from "@web/core/utils/hooks";
+
+const POLL_MS = 2000;
+const ACTIVE_STATES = ["pending", "running"];
+
+export class WorkshopJobProgress extends Component {
+    static template = "stone_workshop.WorkshopJobProgress";
+    static props = { ...standardFieldProps };
+
+    setup() {
+        this.orm = useService("orm");
+        this.state = useState({ status: null });
+        this._timer = null;
+
+        onMounted(() => this.schedule());
+        onWillUnmount(() => clearTimeout(this._timer));
+    }
+
+    get jobState() {
+        return this.state.status?.state || this.props.record.data.state;
+    }
+
+    get percent() {
+        const value = this.state.status ? this.state.status.progress : this.props.record.data.progress;
+        return Math.max(0, Math.min(100, Math.round(value || 0)));
+    }
+
+    get isActive() {
+        return ACTIVE_STATES.includes(this.jobState);
+    }
+
+    get barClass() {
+        return {
+            pending: "bg-secondary",
+            running: "bg-info progress-bar-striped progress-bar-animated",
+            done: "bg-success",
+            failed: "bg-danger",
+            cancelled: "bg-secondary",
+        }[this.jobState] || "bg-secondary";
+    }
+
+    get label() {
+        const status = this.state.status;
+        const done = status ? status.progressDone : this.props.record.data.progress_done;
+        const total = status ? status.progressTotal : this.props.record.data.progress_total;
+        const counts = `${done || 0} de ${total || 0}`;
+        switch (this.jobState) {
+            case "pending":
+                return `En cola · ${counts}`;
+            case "running":
+                return `Procesando · ${counts}`;
+            case "done":
+                return `Terminado · ${counts}`;
+            case "failed":
+                return `Fallido · ${counts}`;
+            default:
+                return `Cancelado · ${counts}`;
+        }
+    }
+
+    schedule() {
+        clearTimeout(this._timer);
+        if (!this.isActive || !this.props.record.resId) {
+            return;
+        }
+        this._timer = setTimeout(() => this.poll(), POLL_MS);
+    }
+
+    async poll() {
+        const record = this.props.record;
+        let status;
+        try {
+            [status] = await this.orm.call("workshop.job", "get_job_status", [[record.resId]]);
+        } catch {
+            // Sin red momentánea: se reintenta en la siguiente vuelta.
+            this.schedule();
+            return;
+        }
+        if (!status) {
+            return;
+        }
+        const previous = this.state.status;
+        this.state.status = status;
+        const changed = !previous
+            || previous.state !== status.state
+            || previous.progressDone !== status.progressDone
+            || previous.attempts !== status.attempts;
+        if (changed && (status.state !== record.data.state || !ACTIVE_STATES.includes(status.state))) {
+            await record.load();
+        }
+        this.schedule();
+    }
+}
+
+registry.category("fields").add("workshop_job_progress", {
+    component: WorkshopJobProgress,
+    displayName: "Avance de trabajo en segundo plano",
+    supportedTypes: ["float"],
+});
@@ -14,6 +14,8 @@ export class WorkshopProgressLotSelector extends Component {
         this.notification = useService("notification");
         this.state = useState({
             groups: [],
+            selected: [],
+            pageSize: 80,
             operationMode: "",
             isLoading: false,
             version: 0,
@@ -181,63 +183,87 @@ export class WorkshopProgressLotSelector extends Component {
         return map;
     }
 
-    normalizeGroups(groups) {
-        const currentConsumptionMap = this.getCurrentConsumptionMap();
-        const siblingConsumed = this.getSiblingConsumedById();
+    getConsumptionMaps(props = this.props, consumptionMap = null) {
+        return {
+            currentConsumptionMap: consumptionMap || this.getCurrentConsumptionMap(props),
+            siblingConsumed: this.getSiblingConsumedById(props),
+        };
+    }
+
+    // Normaliza una placa del servidor contra lo que ve el cliente. Devuelve
+    // null si la placa ya no tiene remanente y no está seleccionada.
+    normalizeLine(line, groupKey, maps, lineIndex = 0) {
+        const { currentConsumptionMap, siblingConsumed } = maps;
+        const inputLineId = parseInt(line.inputLineId || 0, 10);
+        const consumedHere = parseFloat(
+            currentConsumptionMap[inputLineId] !== undefined
+                ? currentConsumptionMap[inputLineId]
+                : line.consumedInThisLog || 0
+        ) || 0;
+        const totalArea = parseFloat(line.areaSqm || 0) || 0;
+        // Consumo en OTRAS corridas: tomamos el mayor entre lo que ve el
+        // cliente (todas las corridas hermanas, guardadas o no) y lo que
+        // ya descontó el servidor (corridas guardadas). El max evita que
+        // una placa consumida al total reaparezca disponible en otra línea.
+        const siblingFromClient = parseFloat(siblingConsumed[inputLineId] || 0) || 0;
+        const siblingFromServer = Math.max(0, totalArea - parseFloat(line.remainingSqm || 0));
+        const usedOther = Math.max(siblingFromClient, siblingFromServer);
+        const remaining = Math.max(0, totalArea - usedOther);
+        const isSelected = consumedHere > 0;
+
+        if (remaining <= 0.0001 && !isSelected) {
+            return null;
+        }
+
+        return {
+            ...line,
+            inputLineId,
+            _key: line.rowKey || `${groupKey}-${inputLineId || lineIndex}`,
+            groupKey,
+            isSelected,
+            consumedHere,
+            remainingSqm: remaining,
+        };
+    }
 
+    // Los grupos llegan con su resumen; las placas sólo si el servidor las
+    // incluyó (`loaded`). Las demás se piden por página al expandir el grupo.
+    normalizeGroups(groups, maps = this.getConsumptionMaps()) {
         return (groups || []).map((group, groupIndex) => {
             const groupKey = group.groupKey || `progress-group-${group.productId || 0}-${groupIndex}`;
-            const normalized = {
+            const lines = (group.lines || [])
+                .map((line, lineIndex) => this.normalizeLine(line, groupKey, maps, lineIndex))
+                .filter(Boolean);
+            const loaded = !!group.loaded;
+            return {
                 ...group,
                 _key: groupKey,
-                lines: [],
-                lineCount: 0,
-                selectedCount: 0,
-                totalArea: 0,
+                lines,
+                loaded,
+                hasMore: !loaded,
+                offset: (group.lines || []).length,
+                lineCount: loaded ? lines.length : (group.lineCount || 0),
+                selectedCount: group.selectedCount || 0,
+                totalArea: group.totalArea || 0,
             };
+        }).filter((group) => group.lineCount > 0 || group.selectedCount > 0);
+    }
 
-            for (const [lineIndex, line] of (group.lines || []).entries()) {
-                const inputLineId = parseInt(line.inputLineId || 0, 10);
-                const consumedHere = parseFloat(
-                    currentConsumptionMap[inputLineId] !== undefined
-                        ? currentConsumptionMap[inputLineId]
-                        : line.consumedInThisLog || 0
-                ) || 0;
-                const totalArea = parseFloat(line.areaSqm || 0) || 0;
-                // Consumo en OTRAS corridas: tomamos el mayor entre lo que ve el
-                // cliente (todas las corridas hermanas, guardadas o no) y lo que
-                // ya descontó el servidor (corridas guardadas). El max evita que
-                // una placa consumida al total reaparezca disponible en otra línea.
-                const siblingFromClient = parseFloat(siblingConsumed[inputLineId] || 0) || 0;
-                const siblingFromServer = Math.max(0, totalArea - parseFloat(line.remainingSqm || 0));
-                const usedOther = Math.max(siblingFromClient, siblingFromServer);
-                const remaining = Math.max(0, totalArea - usedOther);
-                const isSelected = consumedHere > 0;
-
-                if (remaining <= 0.0001 && !isSelected) {
-                    continue;
-                }
-
-                const cleanLine = {
-                    ...line,
-                    inputLineId,
-                    _key: line.rowKey || `${groupKey}-${inputLineId || lineIndex}`,
-                    groupKey,
-                    isSelected,
-                    consumedHere,
-                    remainingSqm: remaining,
-                };
-
-                normalized.lines.push(cleanLine);
-                normalized.lineCount += 1;
-                if (isSelected) {
-                    normalized.selectedCount += 1;
-                    normalized.totalArea += consumedHere;
-                }
-            }
+    normalizeSelected(lines, maps = this.getConsumptionMaps()) {
+        return (lines || [])
+            .map((line, lineIndex) => this.normalizeLine(line, `progress-group-${line.productId || 0}`, maps, lineIndex))
+            .filter((line) => line && line.consumedHere > 0);
+    }
 
-            return normalized;
-        }).filter((group) => group.lineCount > 0 || group.selectedCount > 0);
+    getSelectorArgs(props = this.props, consumptionMap = null) {
+        const map = consumptionMap || this.getCurrentConsumptionMap(props);
+        return {
+            current_input_line_ids: consumptionMap
+                ? this._normalizeIds(Object.keys(map).filter((id) => (parseFloat(map[id]) || 0) > 0))
+                : this.getCurrentSelectedIds(props),
+            editing_log_id: this.getEditingLogId(props) || false,
+            current_consumptions: map,
+        };
     }
 
     async loadGroups(props = this.props) {
@@ -246,6 +272,7 @@ export class WorkshopProgressLotSelector extends Component {
 
         if (!orderId) {
             this.state.groups = [];
+            this.state.selected = [];
             this.state.operationMode = "";
             this.state.version += 1;
             return;
@@ -257,22 +284,22 @@ export class WorkshopProgressLotSelector extends Component {
                 "workshop.order",
                 "get_workshop_progress_selector_data",
                 [[orderId]],
-                {
-                    current_input_line_ids: this.getCurrentSelectedIds(props),
-                    editing_log_id: this.getEditingLogId(props) || false,
-                    current_consumptions: this.getCurrentConsumptionMap(props),
-                }
+                this.getSelectorArgs(props)
             );
 
             if (token !== this._loadToken) return;
 
             const groups = Array.isArray(result) ? result : (result?.groups || []);
+            const maps = this.getConsumptionMaps(props);
             this.state.operationMode = result?.operationMode || "";
-            this.state.groups = this.normalizeGroups(groups);
+            this.state.pageSize = result?.pageSize || this.state.pageSize;
+            this.state.groups = this.normalizeGroups(groups, maps);
+            this.state.selected = this.normalizeSelected(result?.selected, maps);
             this.state.version += 1;
         } catch (error) {
             console.error("[WORKSHOP PROGRESS LOT SELECTOR] load failed:", error);
             this.state.groups = [];
+            this.state.selected = [];
             this.state.operationMode = "";
         } finally {
             if (token === this._loadToken) {
@@ -281,13 +308,9 @@ export class WorkshopProgressLotSelector extends Component {
         }
     }
 
-    get allLines() {
-        void this.state.version;
-        return this.state.groups.flatMap((group) => group.lines || []);
-    }
-
     get selectedLines() {
-        return this.allLines.filter((line) => line.consumedHere > 0);
+        void this.state.version;
+        return this.state.selected || [];
     }
 
     get selectedCount() {
@@ -383,25 +406,62 @@ export class WorkshopProgressLotSelector extends Component {
     renderPopupDOM() {
         const root = this._popupRoot;
         const self = this;
+        const orderId = this.getOrderId();
 
         // popupState.consumed: Map<inputLineId, consumed_sqm capturado en esta corrida>
+        // popupState.lines: Map<inputLineId, placa> con todo lo ya cargado
+        // (seleccionadas + páginas de los grupos expandidos).
         const popupState = {
             groups: JSON.parse(JSON.stringify(this.state.groups || [])),
             consumed: new Map(),
+            lines: new Map(),
             collapsed: {},
             search: "",
+            onlyAvailable: false,
+            onlySelected: false,
+            loadToken: 0,
+            searchTimer: null,
         };
 
-        for (const group of popupState.groups) {
-            popupState.collapsed[group._key] = false;
-            for (const line of group.lines || []) {
-                const consumed = parseFloat(line.consumedHere || 0) || 0;
-                if (consumed > 0) {
-                    popupState.consumed.set(line.inputLineId, consumed);
+        const registerLines = (lines) => {
+            for (const line of lines || []) {
+                if (line?.inputLineId) popupState.lines.set(line.inputLineId, line);
+            }
+        };
+
+        const resetGroups = (groups) => {
+            popupState.groups = groups;
+            for (const group of popupState.groups) {
+                // Grupos sin placas cargadas arrancan colapsados: se piden al expandir.
+                if (popupState.collapsed[group._key] === undefined || !group.loaded) {
+                    popupState.collapsed[group._key] = !group.loaded;
                 }
+                registerLines(group.lines);
+            }
+        };
+
+        registerLines(JSON.parse(JSON.stringify(this.state.selected || [])));
+        resetGroups(popupState.groups);
+        for (const line of popupState.lines.values()) {
+            const consumed = parseFloat(line.consumedHere || 0) || 0;
+            if (consumed > 0) {
+                popupState.consumed.set(line.inputLineId, consumed);
             }
         }
 
+        const consumptionMap = () => {
+            const map = {};
+            for (const [id, value] of popupState.consumed) map[id] = value;
+            return map;
+        };
+
+        const filterArgs = () => ({
+            ...self.getSelectorArgs(self.props, consumptionMap()),
+            search: popupState.search || false,
+            only_available: popupState.onlyAvailable,
+            only_selected: popupState.onlySelected,
+        });
+
         const selectedArea = () => {
             let total = 0;
             for (const [, value] of popupState.consumed) {
@@ -412,39 +472,28 @@ export class WorkshopProgressLotSelector extends Component {
 
         const selectedLinesList = () => {
             const lines = [];
-            for (const group of popupState.groups) {
-                for (const line of group.lines || []) {
-                    if (popupState.consumed.has(line.inputLineId)) {
-                        lines.push(line);
-                    }
-                }
+            for (const id of popupState.consumed.keys()) {
+                const line = popupState.lines.get(id);
+                if (line) lines.push(line);
             }
             return lines;
         };
 
-        const matchesSearch = (line) => {
-            const query = popupState.search.trim().toLowerCase();
-            if (!query) return true;
-            return [
-                line.lotName,
-                line.productName,
-                line.blockName,
-                line.tone,
-                line.locationName,
-            ].some((value) => String(value || "").toLowerCase().includes(query));
-        };
-
         const recalcGroup = (group) => {
             group.selectedCount = 0;
             group.totalArea = 0;
+            for (const [id, value] of popupState.consumed) {
+                const line = popupState.lines.get(id);
+                const consumed = parseFloat(value || 0) || 0;
+                if (line && line.productId === group.productId && consumed > 0) {
+                    group.selectedCount += 1;
+                    group.totalArea += consumed;
+                }
+            }
             for (const line of group.lines || []) {
                 const consumed = parseFloat(popupState.consumed.get(line.inputLineId) || 0) || 0;
                 line.consumedHere = consumed;
                 line.isSelected = consumed > 0;
-                if (line.isSelected) {
-                    group.selectedCount += 1;
-                    group.totalArea += consumed;
-                }
             }
         };
 
@@ -452,6 +501,72 @@ export class WorkshopProgressLotSelector extends Component {
             for (const group of popupState.groups) recalcGroup(group);
         };
 
+        // Recarga los resúmenes con los filtros actuales (búsqueda en servidor).
+        const reloadGroups = async () => {
+            const token = ++popupState.loadToken;
+            try {
+                const result = await self.orm.call(
+                    "workshop.order",
+                    "get_workshop_progress_selector_data",
+                    [[orderId]],
+                    filterArgs()
+                );
+                if (token !== popupState.loadToken || !self._popupRoot) return;
+                const maps = self.getConsumptionMaps(self.props, consumptionMap());
+                registerLines(self.normalizeSelected(result?.selected, maps));
+                resetGroups(self.normalizeGroups(result?.groups || [], maps));
+            } catch (error) {
+                console.error("[WORKSHOP PROGRESS LOT SELECTOR] filter failed:", error);
+            }
+            render();
+        };
+
+        // Siguiente página de placas de un grupo.
+        const loadPage = async (group) => {
+            if (!group || group._loading || !group.hasMore) return;
+            const token = popupState.loadToken;
+            group._loading = true;
+            render();
+            try {
+                const result = await self.orm.call(
+                    "workshop.order",
+                    "get_workshop_progress_selector_lines",
+                    [[orderId], group.productId],
+                    {
+                        ...filterArgs(),
+                        offset: group.offset || 0,
+                        limit: self.state.pageSize,
+                    }
+                );
+                if (token !== popupState.loadToken || !self._popupRoot) return;
+                const maps = self.getConsumptionMaps(self.props, consumptionMap());
+                const known = new Set((group.lines || []).map((line) => line.inputLineId));
+                for (const [index, raw] of (result?.lines || []).entries()) {
+                    const line = self.normalizeLine(raw, group._key, maps, index);
+                    if (!line || known.has(line.inputLineId)) continue;
+                    group.lines.push(line);
+                    registerLines([line]);
+                }
+                group.offset = (group.offset || 0) + (result?.lines || []).length;
+                group.hasMore = !!result?.hasMore;
+                group.loaded = !group.hasMore;
+            } catch (error) {
+                console.error("[WORKSHOP PROGRESS LOT SELECTOR] page failed:", error);
+                group.hasMore = false;
+            } finally {
+                group._loading = false;
+            }
+            render();
+        };
+
+        const loadAll = async (group) => {
+            while (group && group.hasMore && self._popupRoot) {
+                const before = group.offset || 0;
+                await loadPage(group);
+                if ((group.offset || 0) === before) break;
+            }
+        };
+
         const toggleLine = (line) => {
             if (popupState.consumed.has(line.inputLineId)) {
                 popupState.consumed.delete(line.inputLineId);
@@ -518,10 +633,12 @@ export class WorkshopProgressLotSelector extends Component {
         };
 
         const render = () => {
+            if (!self._popupRoot) return;
             recalcAll();
             const count = Array.from(popupState.consumed.values()).filter((v) => (parseFloat(v || 0) || 0) > 0).length;
             const area = selectedArea();
             const selected = selectedLinesList();
+            const scrollTop = root.querySelector("#wpls-body")?.scrollTop || 0;
 
             let selectedChips = "";
             for (const line of selected.slice(0, 8)) {
@@ -534,14 +651,10 @@ export class WorkshopProgressLotSelector extends Component {
 
             let groupsHtml = "";
             for (const group of popupState.groups) {
-                const visibleLines = (group.lines || []).filter(matchesSearch);
-                if (!visibleLines.length && popupState.search) continue;
-
                 const collapsed = !!popupState.collapsed[group._key];
-                const visibleSelected = visibleLines.filter((line) => popupState.consumed.has(line.inputLineId)).length;
                 let rows = "";
 
-                for (const line of visibleLines) {
+                for (const line of group.lines || []) {
                     const consumed = parseFloat(popupState.consumed.get(line.inputLineId) || 0) || 0;
                     const isSelected = consumed > 0;
                     const remaining = parseFloat(line.remainingSqm || 0) || 0;
@@ -572,13 +685,25 @@ export class WorkshopProgressLotSelector extends Component {
                         </tr>`;
                 }
 
+                let pager = "";
+                if (group._loading) {
+                    pager = `<div class="wpls-group-more"><i class="fa fa-circle-o-notch fa-spin"></i> Cargando placas...</div>`;
+                } else if (group.hasMore) {
+                    pager = `
+                        <div class="wpls-group-more">
+                            <span>${(group.lines || []).length} de ${group.lineCount}</span>
+                            <button type="button" class="wpls-mini-btn" data-load-more="${self.escapeHtml(group._key)}"><i class="fa fa-angle-double-down"></i> Cargar más</button>
+                        </div>`;
+                }
+
                 groupsHtml += `
                     <div class="wpls-group ${collapsed ? "is-collapsed" : ""}" data-group-key="${self.escapeHtml(group._key)}">
                         <div class="wpls-group-header" data-group-toggle="${self.escapeHtml(group._key)}">
                             <span class="wpls-chevron"><i class="fa ${collapsed ? "fa-chevron-right" : "fa-chevron-down"}"></i></span>
                             <span class="wpls-product"><i class="fa fa-cube"></i>${self.escapeHtml(group.productName || "Producto")}</span>
-                            <span class="wpls-pill">${visibleLines.length} visible(s)</span>
-                            <span class="wpls-pill wpls-pill-selected">${visibleSelected} sel.</span>
+                            <span class="wpls-pill">${group.lineCount} placa(s)</span>
+                            <span class="wpls-pill">${self.formatNum(group.remainingArea, 2)} m² disp.</span>
+                            <span class="wpls-pill wpls-pill-selected">${group.selectedCount} sel.</span>
                             <button type="button" class="wpls-mini-btn" data-select-group="${self.escapeHtml(group._key)}" title="Marcar todas con su remanente"><i class="fa fa-check-square-o"></i></button>
                             <button type="button" class="wpls-mini-btn wpls-mini-clear" data-clear-group="${self.escapeHtml(group._key)}" title="Limpiar grupo"><i class="fa fa-square-o"></i></button>
                         </div>
@@ -600,7 +725,8 @@ export class WorkshopProgressLotSelector extends Component {
                                     </tr>
                                 </thead>
                                 <tbody>${rows}</tbody>
-                            </table>`}
+                            </table>
+                            ${pager}`}
                     </div>`;
             }
 
@@ -632,6 +758,8 @@ export class WorkshopProgressLotSelector extends Component {
                                 <i class="fa fa-search"></i>
                                 <input type="text" id="wpls-search-input" value="${self.escapeHtml(popupState.search)}" placeholder="Buscar por lote, producto, bloque, tono o ubicación..."/>
                             </div>
+                            <label class="wpls-filter"><input type="checkbox" id="wpls-only-available" ${popupState.onlyAvailable ? "checked" : ""}/> Con remanente</label>
+                            <label class="wpls-filter"><input type="checkbox" id="wpls-only-selected" ${popupState.onlySelected ? "checked" : ""}/> Sólo seleccionadas</label>
                             <button type="button" class="wpls-btn wpls-btn-soft" id="wpls-expand-all"><i class="fa fa-expand"></i> Expandir</button>
                             <button type="button" class="wpls-btn wpls-btn-soft" id="wpls-collapse-all"><i class="fa fa-compress"></i> Colapsar</button>
                         </div>
@@ -661,6 +789,9 @@ export class WorkshopProgressLotSelector extends Component {
                     </div>
                 </div>`;
 
+            const body = root.querySelector("#wpls-body");
+            if (body) body.scrollTop = scrollTop;
+
             root.querySelector("#wpls-overlay")?.addEventListener("click", (event) => {
                 if (event.target.id === "wpls-overlay") self.destroyPopup();
             });
@@ -675,12 +806,26 @@ export class WorkshopProgressLotSelector extends Component {
                 searchInput.setSelectionRange(searchInput.value.length, searchInput.value.length);
                 searchInput.addEventListener("input", () => {
                     popupState.search = searchInput.value || "";
-                    render();
+                    // La búsqueda corre en el servidor: esperamos a que deje de teclear.
+                    clearTimeout(popupState.searchTimer);
+                    popupState.searchTimer = setTimeout(reloadGroups, 300);
                 });
             }
 
+            root.querySelector("#wpls-only-available")?.addEventListener("change", (event) => {
+                popupState.onlyAvailable = !!event.target.checked;
+                reloadGroups();
+            });
+            root.querySelector("#wpls-only-selected")?.addEventListener("change", (event) => {
+                popupState.onlySelected = !!event.target.checked;
+                reloadGroups();
+            });
+
             root.querySelector("#wpls-expand-all")?.addEventListener("click", () => {
-                for (const key of Object.keys(popupState.collapsed)) popupState.collapsed[key] = false;
+                for (const group of popupState.groups) {
+                    popupState.collapsed[group._key] = false;
+                    if (!group.lines.length) loadPage(group);
+                }
                 render();
             });
             root.querySelector("#wpls-collapse-all")?.addEventListener("click", () => {
@@ -692,16 +837,29 @@ export class WorkshopProgressLotSelector extends Component {
                 el.addEventListener("click", () => {
                     const key = el.dataset.groupToggle;
                     popupState.collapsed[key] = !popupState.collapsed[key];
+                    const group = popupState.groups.find((g) => g._key === key);
+                    if (!popupState.collapsed[key] && group && !group.lines.length && group.hasMore) {
+                        loadPage(group);
+                        return;
+                    }
                     render();
                 });
             });
 
-            root.querySelectorAll("[data-select-group]").forEach((button) => {
+            root.querySelectorAll("[data-load-more]").forEach((button) => {
                 button.addEventListener("click", (event) => {
+                    event.stopPropagation();
+                    loadPage(popupState.groups.find((g) => g._key === button.dataset.loadMore));
+                });
+            });
+
+            root.querySelectorAll("[data-select-group]").forEach((button) => {
+                button.addEventListener("click", async (event) => {
                     event.stopPropagation();
                     const key = button.dataset.selectGroup;
                     const group = popupState.groups.find((g) => g._key === key);
-                    for (const line of (group?.lines || []).filter(matchesSearch)) {
+                    await loadAll(group);
+                    for (const line of group?.lines || []) {
                         const remaining = parseFloat(line.remainingSqm || 0) || 0;
                         if (remaining > 0) {
                             popupState.consumed.set(line.inputLineId, remaining);
@@ -712,11 +870,12 @@ export class WorkshopProgressLotSelector extends Component {
             });
 
             root.querySelectorAll("[data-clear-group]").forEach((button) => {
-                button.addEventListener("click", (event) => {
+                button.addEventListener("click", async (event) => {
                     event.stopPropagation();
                     const key = button.dataset.clearGroup;
                     const group = popupState.groups.find((g) => g._key === key);
-                    for (const line of (group?.lines || []).filter(matchesSearch)) {
+                    await loadAll(group);
+                    for (const line of group?.lines || []) {
                         popupState.consumed.delete(line.inputLineId);
                     }
                     render();
@@ -731,10 +890,7 @@ export class WorkshopProgressLotSelector extends Component {
                         return;
                     }
                     const id = parseInt(row.dataset.lineId, 10);
-                    if (!id) return;
-                    const line = popupState.groups
-                        .flatMap((g) => g.lines || [])
-                        .find((l) => l.inputLineId === id);
+                    const line = id && popupState.lines.get(id);
                     if (!line) return;
                     toggleLine(line);
                     render();
@@ -748,9 +904,7 @@ export class WorkshopProgressLotSelector extends Component {
                 input.addEventListener("input", (event) => {
                     event.stopPropagation();
                     const id = parseInt(input.dataset.lineInput, 10);
-                    const line = popupState.groups
-                        .flatMap((g) => g.lines || [])
-                        .find((l) => l.inputLineId === id);
+                    const line = popupState.lines.get(id);
                     if (!line) return;
                     setConsumed(line, input.value);
                 });
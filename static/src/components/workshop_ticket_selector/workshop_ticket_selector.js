@@ -11,15 +11,22 @@ export class WorkshopTicketSelector extends Component {
 
     setup() {
         this.orm = useService("orm");
+        // `selection`: {inputLineId: placa} — la selección vive aparte de los
+        // grupos porque éstos se cargan por página y pueden no estar completos.
         this.state = useState({
             groups: [],
             collapsed: {},
+            selection: {},
+            search: "",
+            pageSize: 80,
             isLoading: true,
         });
         this._writeTimeout = null;
+        this._searchTimeout = null;
+        this._loadToken = 0;
 
         onWillStart(async () => {
-            await this.loadGroups();
+            await this.loadGroups({ seedSelection: true });
             this.writeSelectionsToRecord();
         });
 
@@ -52,7 +59,8 @@ export class WorkshopTicketSelector extends Component {
         return this.extractId(data.editing_ticket_id);
     }
 
-    async loadGroups() {
+    async loadGroups({ seedSelection = false } = {}) {
+        const token = ++this._loadToken;
         this.state.isLoading = true;
         try {
             const orderId = this.getOrderId();
@@ -61,22 +69,32 @@ export class WorkshopTicketSelector extends Component {
                 return;
             }
 
-            const groups = await this.orm.call(
+            const result = await this.orm.call(
                 "workshop.order",
                 "get_workshop_ticket_selector_data",
                 [[orderId]],
-                { editing_ticket_id: this.getEditingTicketId() || false }
+                {
+                    editing_ticket_id: this.getEditingTicketId() || false,
+                    search: this.state.search || false,
+                }
             );
+            if (token !== this._loadToken) return;
 
-            this.state.groups = this.normalizeGroups(groups || []);
+            this.state.pageSize = result?.pageSize || this.state.pageSize;
+            this.state.groups = this.normalizeGroups(result?.groups || []);
             this.syncCollapsedState();
-            this.recalcAll();
-            this.applyStoredSelections();
+            if (seedSelection && !this.applyStoredSelections()) {
+                for (const line of result?.selected || []) {
+                    this.state.selection[line.inputLineId] = line;
+                }
+            }
         } catch (error) {
             console.error("[WORKSHOP TICKET SELECTOR] load failed:", error);
             this.state.groups = [];
         } finally {
-            this.state.isLoading = false;
+            if (token === this._loadToken) {
+                this.state.isLoading = false;
+            }
         }
     }
 
@@ -84,20 +102,27 @@ export class WorkshopTicketSelector extends Component {
         return (groups || []).map((group, groupIndex) => {
             const groupKey = group.groupKey || `group-${group.productId || 0}-${groupIndex}`;
             group._key = groupKey;
-            group.lines = (group.lines || []).map((line, lineIndex) => {
-                line._key = line.rowKey || `${groupKey}-${line.inputLineId || 0}-${lineIndex}`;
-                line.groupKey = groupKey;
-                line.isSelected = !!line.isSelected;
-                return line;
-            });
+            group.lines = this.normalizeLines(group.lines, groupKey);
+            group.offset = group.lines.length;
+            group.hasMore = !group.loaded;
+            group.isPageLoading = false;
             return group;
         });
     }
 
+    normalizeLines(lines, groupKey, startIndex = 0) {
+        return (lines || []).map((line, lineIndex) => {
+            line._key = line.rowKey || `${groupKey}-${line.inputLineId || 0}-${startIndex + lineIndex}`;
+            line.groupKey = groupKey;
+            return line;
+        });
+    }
+
     syncCollapsedState() {
         const next = {};
         for (const group of this.state.groups) {
-            next[group._key] = this.state.collapsed[group._key] || false;
+            // Los grupos que no vinieron completos se cargan al expandirlos.
+            next[group._key] = group.loaded ? (this.state.collapsed[group._key] || false) : true;
         }
         this.state.collapsed = next;
     }
@@ -105,26 +130,22 @@ export class WorkshopTicketSelector extends Component {
     applyStoredSelections() {
         const root = this.getRootRecord();
         const raw = root?.data?.widget_selections;
-        if (!raw || raw === "[]") return;
+        if (!raw || raw === "[]") return false;
 
         try {
             const selections = JSON.parse(raw);
-            if (!Array.isArray(selections)) return;
-            const ids = new Set(
-                selections
-                    .map((item) => parseInt(item.inputLineId || 0, 10))
-                    .filter(Boolean)
-            );
-            if (!ids.size) return;
-
-            for (const group of this.state.groups) {
-                for (const line of group.lines || []) {
-                    line.isSelected = ids.has(parseInt(line.inputLineId || 0, 10));
-                }
+            if (!Array.isArray(selections)) return false;
+            const next = {};
+            for (const item of selections) {
+                const id = parseInt(item.inputLineId || 0, 10);
+                if (id) next[id] = { ...item, inputLineId: id };
             }
-            this.recalcAll();
+            if (!Object.keys(next).length) return false;
+            this.state.selection = next;
+            return true;
         } catch (error) {
             console.warn("[WORKSHOP TICKET SELECTOR] invalid stored selections", error);
+            return false;
         }
     }
 
@@ -136,23 +157,17 @@ export class WorkshopTicketSelector extends Component {
     }
 
     doWriteSelectionsToRecord() {
-        const selections = [];
-        for (const group of this.state.groups) {
-            for (const line of group.lines || []) {
-                if (!line.isSelected) continue;
-                selections.push({
-                    inputLineId: line.inputLineId || 0,
-                    lotId: line.lotId || 0,
-                    lotName: line.lotName || "",
-                    productId: line.productId || 0,
-                    productName: line.productName || "",
-                    qty: line.qty || 0,
-                    areaSqm: line.areaSqm || 0,
-                    locationId: line.locationId || 0,
-                    locationName: line.locationName || "",
-                });
-            }
-        }
+        const selections = Object.values(this.state.selection).map((line) => ({
+            inputLineId: line.inputLineId || 0,
+            lotId: line.lotId || 0,
+            lotName: line.lotName || "",
+            productId: line.productId || 0,
+            productName: line.productName || "",
+            qty: line.qty || 0,
+            areaSqm: line.areaSqm || 0,
+            locationId: line.locationId || 0,
+            locationName: line.locationName || "",
+        }));
 
         const root = this.getRootRecord();
         if (root?.update) {
@@ -160,8 +175,57 @@ export class WorkshopTicketSelector extends Component {
         }
     }
 
+    onSearchInput(ev) {
+        this.state.search = ev.target.value || "";
+        // La búsqueda corre en el servidor: esperamos a que deje de teclear.
+        clearTimeout(this._searchTimeout);
+        this._searchTimeout = setTimeout(() => this.loadGroups(), 300);
+    }
+
+    async loadPage(group) {
+        if (!group || group.isPageLoading || !group.hasMore) return;
+        const token = this._loadToken;
+        group.isPageLoading = true;
+        try {
+            const result = await this.orm.call(
+                "workshop.order",
+                "get_workshop_ticket_selector_lines",
+                [[this.getOrderId()], group.productId],
+                {
+                    offset: group.offset || 0,
+                    limit: this.state.pageSize,
+                    editing_ticket_id: this.getEditingTicketId() || false,
+                    search: this.state.search || false,
+                }
+            );
+            if (token !== this._loadToken) return;
+            const known = new Set(group.lines.map((line) => line.inputLineId));
+            const fresh = (result?.lines || []).filter((line) => !known.has(line.inputLineId));
+            group.lines.push(...this.normalizeLines(fresh, group._key, group.lines.length));
+            group.offset = (group.offset || 0) + (result?.lines || []).length;
+            group.hasMore = !!result?.hasMore;
+            group.loaded = !group.hasMore;
+        } catch (error) {
+            console.error("[WORKSHOP TICKET SELECTOR] page failed:", error);
+            group.hasMore = false;
+        } finally {
+            group.isPageLoading = false;
+        }
+    }
+
+    async loadAll(group) {
+        while (group && group.hasMore) {
+            const before = group.offset || 0;
+            await this.loadPage(group);
+            if ((group.offset || 0) === before) break;
+        }
+    }
+
     toggleGroup(group) {
         this.state.collapsed[group._key] = !this.state.collapsed[group._key];
+        if (!this.state.collapsed[group._key] && !group.lines.length) {
+            this.loadPage(group);
+        }
     }
 
     isCollapsed(group) {
@@ -171,6 +235,7 @@ export class WorkshopTicketSelector extends Component {
     expandAll() {
         for (const group of this.state.groups) {
             this.state.collapsed[group._key] = false;
+            if (!group.lines.length) this.loadPage(group);
         }
     }
 
@@ -180,63 +245,52 @@ export class WorkshopTicketSelector extends Component {
         }
     }
 
-    toggleLine(line) {
-        line.isSelected = !line.isSelected;
-        this.recalcGroupByLine(line);
-        this.state.groups = [...this.state.groups];
-        this.writeSelectionsToRecord();
+    isSelected(line) {
+        return !!this.state.selection[line.inputLineId];
     }
 
-    selectAllInGroup(group) {
-        for (const line of group.lines || []) {
-            line.isSelected = true;
+    toggleLine(line) {
+        if (this.isSelected(line)) {
+            delete this.state.selection[line.inputLineId];
+        } else {
+            this.state.selection[line.inputLineId] = line;
         }
-        this.recalcGroup(group);
-        this.state.groups = [...this.state.groups];
         this.writeSelectionsToRecord();
     }
 
-    clearGroup(group) {
+    async selectAllInGroup(group) {
+        await this.loadAll(group);
         for (const line of group.lines || []) {
-            line.isSelected = false;
+            this.state.selection[line.inputLineId] = line;
         }
-        this.recalcGroup(group);
-        this.state.groups = [...this.state.groups];
         this.writeSelectionsToRecord();
     }
 
-    recalcGroupByLine(line) {
-        const group = this.state.groups.find((g) => g._key === line.groupKey);
-        if (group) this.recalcGroup(group);
-    }
-
-    recalcGroup(group) {
-        group.selectedCount = 0;
-        group.totalArea = 0;
-        for (const line of group.lines || []) {
-            if (line.isSelected) {
-                group.selectedCount += 1;
-                group.totalArea += line.areaSqm || 0;
+    async clearGroup(group) {
+        for (const line of Object.values(this.state.selection)) {
+            if (line.productId === group.productId) {
+                delete this.state.selection[line.inputLineId];
             }
         }
+        this.writeSelectionsToRecord();
     }
 
-    recalcAll() {
-        for (const group of this.state.groups) {
-            this.recalcGroup(group);
-        }
+    groupSelectedCount(group) {
+        return Object.values(this.state.selection).filter((line) => line.productId === group.productId).length;
+    }
+
+    groupSelectedArea(group) {
+        return Object.values(this.state.selection)
+            .filter((line) => line.productId === group.productId)
+            .reduce((total, line) => total + (line.areaSqm || 0), 0);
     }
 
     get totalSelectedCount() {
-        let total = 0;
-        for (const group of this.state.groups) total += group.selectedCount || 0;
-        return total;
+        return Object.keys(this.state.selection).length;
     }
 
     get totalSelectedArea() {
-        let total = 0;
-        for (const group of this.state.groups) total += group.totalArea || 0;
-        return total;
+        return Object.values(this.state.selection).reduce((total, line) => total + (line.areaSqm || 0), 0);
     }
 
     formatNum(value, decimals = 2) {
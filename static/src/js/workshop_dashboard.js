@@ -48,6 +48,8 @@ class StoneWorkshopDashboard extends Component {
         this.orm = useService("orm");
         this.action = useService("action");
         this.notification = useService("notification");
+        this.busService = useService("bus_service");
+        this.companyService = useService("company");
         this.state = useState({
             kpis: {
                 done_today: 0,
@@ -72,9 +74,19 @@ class StoneWorkshopDashboard extends Component {
             tick: 0,
             capacity: { next_slot_days: 0, capacity_hours: 8, backlog_hours: 0, next_slot_date: "" },
             access: { can_reorder: true, can_set_priority: true },
+            // Serie de los últimos días (m² útiles y rendimiento) del resumen diario.
+            trend: [],
         });
 
         this._tickInterval = null;
+        // Última revisión del tablero pintada; el servidor responde "unchanged"
+        // si sigue vigente (p. ej. al reconectar el bus sin cambios).
+        this.boardRevision = null;
+        // Deltas del tablero publicados por el servidor en el bus: otras
+        // tabletas/paneles pausan, reanudan o reordenan y aquí se parcha.
+        this._onBoardDelta = (notice) => this._applyBoardDelta(notice);
+        this._resyncTimeout = null;
+        this._onBusReconnect = () => this.loadSnapshot();
 
         // No bloqueamos el primer render con las RPC: el panel se pinta de
         // inmediato (shell) y los datos llegan después. Así "entrar" es instantáneo
@@ -85,6 +97,9 @@ class StoneWorkshopDashboard extends Component {
             this._tickInterval = setInterval(() => {
                 this.state.tick = (this.state.tick + 1) % 1000000;
             }, 1000);
+            this.busService.subscribe("stone_workshop/board_delta", this._onBoardDelta);
+            // Si se perdió la conexión pudimos perder deltas: lectura condicional.
+            this.busService.addEventListener("reconnect", this._onBusReconnect);
         });
 
         onWillUnmount(() => {
@@ -92,20 +107,27 @@ class StoneWorkshopDashboard extends Component {
                 clearInterval(this._tickInterval);
                 this._tickInterval = null;
             }
+            clearTimeout(this._resyncTimeout);
+            this.busService.unsubscribe("stone_workshop/board_delta", this._onBoardDelta);
+            this.busService.removeEventListener("reconnect", this._onBusReconnect);
         });
     }
 
     async loadDashboard() {
         this.state.loading = true;
-        // allSettled: cada bloque carga independiente; si uno falla, los demás
-        // siguen mostrándose (cada loader ya captura su propio error).
+        // Una sola llamada: tablero, KPIs, capacidad y permisos. KPIs y
+        // capacidad ya vienen protegidos en el servidor (si fallan llegan vacíos).
         try {
-            await Promise.allSettled([
-                this.loadKpis(),
-                this.loadBoard(),
-                this.loadCapacity(),
-                this.loadAccess(),
-            ]);
+            const data = await this.orm.call(
+                "workshop.order",
+                "get_workshop_dashboard_bootstrap",
+                [],
+            );
+            this.state.access = data.access || this.state.access;
+            this.state.trend = data.trend || [];
+            this._applySnapshot(data);
+        } catch (error) {
+            console.error("[STONE WORKSHOP] bootstrap failed:", error);
         } finally {
             this.state.loading = false;
             const d = new Date();
@@ -128,47 +150,108 @@ class StoneWorkshopDashboard extends Component {
         };
     }
 
-    async loadKpis() {
+    // Carga cola priorizada (borradores + órdenes devueltas a la cola por la
+    // regla de 24 h), órdenes en ejecución, KPIs y capacidad en una sola
+    // llamada. Manda la última revisión pintada: si el tablero no cambió, el
+    // servidor contesta "unchanged" y no se toca nada.
+    async loadSnapshot({ force = false } = {}) {
         try {
-            const kpis = await this.orm.call("workshop.order", "get_workshop_kpis", []);
-            this.state.kpis = { ...this.state.kpis, ...kpis };
+            const snapshot = await this.orm.call(
+                "workshop.order",
+                "get_workshop_board_snapshot",
+                [],
+                { since_revision: force ? false : this.boardRevision },
+            );
+            this._applySnapshot(snapshot);
         } catch (error) {
-            console.error("[STONE WORKSHOP] loadKpis failed:", error);
+            console.error("[STONE WORKSHOP] loadSnapshot failed:", error);
         }
     }
 
-    // Carga cola priorizada (borradores + órdenes devueltas a la cola por la
-    // regla de 24 h) y las órdenes en ejecución, en una sola llamada.
-    async loadBoard() {
-        try {
-            const board = await this.orm.call("workshop.order", "get_workshop_board", []);
-            this.state.priorityQueue = (board.queue || []).map((o, idx) =>
-                this._decorateBoard(o, idx === 0),
-            );
-            this.state.executingOrders = (board.execution || []).map((o) =>
-                this._decorateBoard(o, false),
-            );
-        } catch (error) {
-            console.error("[STONE WORKSHOP] loadBoard failed:", error);
+    _applySnapshot(snapshot) {
+        if (!snapshot) {
+            return;
         }
+        this.boardRevision = snapshot.revision;
+        if (snapshot.unchanged) {
+            return;
+        }
+        this.state.kpis = { ...this.state.kpis, ...(snapshot.kpis || {}) };
+        this.state.capacity = snapshot.capacity || this.state.capacity;
+        this.state.priorityQueue = (snapshot.queue || []).map((o, idx) =>
+            this._decorateBoard(o, idx === 0),
+        );
+        this.state.executingOrders = (snapshot.execution || []).map((o) =>
+            this._decorateBoard(o, false),
+        );
     }
 
-    async loadCapacity() {
-        try {
-            const ov = await this.orm.call("workshop.order", "get_workshop_capacity_overview", []);
-            this.state.capacity = ov || this.state.capacity;
-        } catch (error) {
-            console.error("[STONE WORKSHOP] capacity overview failed:", error);
+    // Aviso del bus: la revisión nueva y los deltas de nuestras compañías.
+    // Si es la revisión siguiente a la pintada se parcha en sitio; ante un
+    // hueco (aviso perdido o desordenado), varias compañías activas o un delta
+    // que no alcanza, se pide el snapshot con lectura condicional.
+    _applyBoardDelta(notice) {
+        if (!notice || (this.boardRevision !== null && notice.revision <= this.boardRevision)) {
+            return;
         }
+        if (this.boardRevision === null || notice.revision !== this.boardRevision + 1) {
+            this._scheduleResync();
+            return;
+        }
+        const activeCompanies = this.companyService.activeCompanyIds || [];
+        const deltas = (notice.deltas || []).filter((d) => activeCompanies.includes(d.company_id));
+        if (deltas.length && (activeCompanies.length !== 1 || !this._patchBoard(deltas[0]))) {
+            this._scheduleResync();
+            return;
+        }
+        this.boardRevision = notice.revision;
     }
 
-    async loadAccess() {
-        try {
-            const acc = await this.orm.call("workshop.order", "get_workshop_dashboard_access", []);
-            this.state.access = acc || this.state.access;
-        } catch (error) {
-            console.error("[STONE WORKSHOP] access check failed:", error);
+    // Los pedidos de resincronización seguidos se agrupan en uno.
+    _scheduleResync() {
+        clearTimeout(this._resyncTimeout);
+        this._resyncTimeout = setTimeout(() => this.loadSnapshot(), 250);
+    }
+
+    // Aplica el delta de la compañía activa. Devuelve false (sin tocar nada)
+    // si el servidor pidió resincronizar o el delta referencia una tarjeta
+    // que no tenemos pintada.
+    _patchBoard(delta) {
+        if (delta.resync) {
+            return false;
+        }
+        const known = new Map();
+        for (const order of [...this.state.priorityQueue, ...this.state.executingOrders]) {
+            known.set(order.id, order);
+        }
+        for (const id of delta.removed || []) {
+            known.delete(id);
+        }
+        for (const card of delta.cards || []) {
+            known.set(card.id, this._decorateBoard(card, false));
+        }
+        // Las fechas proyectadas de las demás tarjetas se corren con la cola.
+        for (const [id, projected] of Object.entries(delta.schedule || {})) {
+            const order = known.get(Number(id));
+            if (order) {
+                known.set(order.id, { ...order, ...projected });
+            }
         }
+        const pick = (ids) => ids.map((id) => known.get(id));
+        const queue = pick(delta.queue_order || []);
+        const execution = pick(delta.execution_order || []);
+        if (queue.includes(undefined) || execution.includes(undefined)) {
+            return false;
+        }
+        this.state.priorityQueue = queue.map((o, idx) => ({ ...o, is_next: idx === 0 }));
+        this.state.executingOrders = execution.map((o) => ({ ...o, is_next: false }));
+        if (delta.kpis) {
+            this.state.kpis = { ...this.state.kpis, ...delta.kpis };
+        }
+        if (delta.capacity) {
+            this.state.capacity = delta.capacity;
+        }
+        return true;
     }
 
     // Tiempo trabajado en vivo (s). Depende de state.tick para refrescar cada segundo.
@@ -202,6 +285,19 @@ class StoneWorkshopDashboard extends Component {
         return remaining / 60 / 8;
     }
 
+    // Altura (px) de la barra del día relativa al mejor día de la serie.
+    trendHeight(day) {
+        const max = Math.max(...this.state.trend.map((d) => d.area_out || 0), 0);
+        return max > 0 ? Math.round(((day.area_out || 0) / max) * 40) : 2;
+    }
+
+    // Barra de carga relativa al centro más cargado.
+    workcenterLoadWidth(wc) {
+        const list = this.state.capacity.workcenters || [];
+        const max = Math.max(...list.map((w) => w.load_hours || 0), 0);
+        return max > 0 ? Math.round(((wc.load_hours || 0) / max) * 100) : 0;
+    }
+
     fmtDays(value) {
         const n = parseFloat(value || 0);
         if (!Number.isFinite(n) || n <= 0) return "0";
@@ -213,6 +309,8 @@ class StoneWorkshopDashboard extends Component {
     }
 
     // ─── Pausar / reanudar cronómetro ────────────────────────────────────
+    // El delta del bus suele llegar antes que la respuesta; la lectura
+    // condicional de después sólo trae datos si todavía no se aplicó.
     // Pausa directa de un clic, sin pedir motivo. El motivo se captura a mano
     // (opcional) en la pestaña "Tiempos" de la orden cuando se quiera.
     async pauseOrder(order) {
@@ -222,7 +320,7 @@ class StoneWorkshopDashboard extends Component {
             console.error("[STONE WORKSHOP] pause failed:", error);
             this.notification.add("No se pudo pausar la orden.", { type: "danger" });
         }
-        await this.loadBoard();
+        await this.loadSnapshot();
     }
 
     async resumeOrder(order) {
@@ -232,7 +330,7 @@ class StoneWorkshopDashboard extends Component {
             console.error("[STONE WORKSHOP] resume failed:", error);
             this.notification.add("No se pudo reanudar la orden.", { type: "danger" });
         }
-        await this.loadBoard();
+        await this.loadSnapshot();
     }
 
     // ─── Drag-and-drop de la cola ────────────────────────────────────────
@@ -289,16 +387,24 @@ class StoneWorkshopDashboard extends Component {
         // Re-decorar para refrescar `is_next` (la primera fila pasa a ser la siguiente).
         this.state.priorityQueue = queue.map((o, idx) => ({ ...o, is_next: idx === 0 }));
 
+        // Sólo viaja la tarjeta movida y la que queda debajo. Si cae al final
+        // de lo visible va la de arriba ("después de"): la que sigue en la cola
+        // completa puede ser una tarjeta oculta que el panel no tiene.
+        const anchor = queue[toIndex + 1];
+        const after = anchor ? null : queue[toIndex - 1];
         try {
-            await this.orm.call(
+            const rank = await this.orm.call(
                 "workshop.order",
-                "reorder_workshop_queue",
-                [queue.map((o) => o.id)],
+                "move_before",
+                [moved.id, anchor ? anchor.id : false, after ? after.id : false],
             );
+            if (rank === false) {
+                await this.loadSnapshot({ force: true });
+            }
         } catch (error) {
             console.error("[STONE WORKSHOP] reorder failed:", error);
             this.notification.add("No se pudo guardar el nuevo orden de la cola.", { type: "danger" });
-            await this.loadBoard();
+            await this.loadSnapshot({ force: true });
         }
     }
 
@@ -0,0 +1,2 @@
+from . import test_result_lots
+from . import test_workshop_board
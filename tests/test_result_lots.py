@@ -0,0 +1,59 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestResultLotNormalization(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product = cls.env['product.product'].create({
+            'name': 'Placa resultado',
+            'type': 'consu',
+            'is_storable': True,
+            'tracking': 'lot',
+        })
+        cls.process = cls.env['workshop.process'].create({'name': 'Pulido'})
+        cls.order = cls.env['workshop.order'].create({
+            'process_id': cls.process.id,
+            'operation_mode': 'rework',
+            'output_line_ids': [
+                (0, 0, {'product_id': cls.product.id, 'output_type': 'finished_slab'})
+                for _index in range(3)
+            ],
+        })
+
+    def _names(self):
+        return {
+            line.id: (line.lot_name, line.lot_id.name)
+            for line in self.order.output_line_ids
+        }
+
+    def test_normalize_chunk_twice(self):
+        """Renombrar dos veces el mismo tramo deja folios únicos y estables."""
+        self.order._normalize_result_lots_batch()
+        first = self._names()
+        self.assertEqual(len({lot_name for lot_name, _lot in first.values()}), 3)
+        for lot_name, lot in first.values():
+            self.assertEqual(lot_name, lot)
+
+        # Intercambia los folios de las dos primeras salidas (y sus lotes):
+        # la segunda pasada tiene que liberar y volver a tomar nombres sin
+        # chocar con la restricción de lote único.
+        line_a, line_b = self.order.output_line_ids[:2]
+        name_a, name_b = line_a.lot_id.name, line_b.lot_id.name
+        line_a.lot_id.name = '%s-TMP' % name_a
+        line_b.lot_id.name = name_a
+        line_a.lot_id.name = name_b
+        line_a.lot_name = '%s-TMP' % name_a
+        line_b.lot_name = name_a
+        line_a.lot_name = name_b
+
+        self.order._normalize_result_lots_batch()
+        second = self._names()
+        self.assertEqual(len({lot_name for lot_name, _lot in second.values()}), 3)
+        for lot_name, lot in second.values():
+            self.assertEqual(lot_name, lot)
+
+        self.order._normalize_result_lots_batch()
+        self.assertEqual(self._names(), second)
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestWorkshopBoardOrder(TransactionCase):
+
+    def _row(self, order_id, date_start, state='in_workshop', parked=False):
+        return {
+            'id': order_id,
+            'state': state,
+            'parked_in_queue': parked,
+            'queue_sequence': 0,
+            'create_date': datetime(2026, 1, 1),
+            'date_start': date_start,
+        }
+
+    def test_execution_with_mixed_empty_date_start(self):
+        """Las OTs sin inicio (False) van al final, ordenadas por id."""
+        rows = [
+            self._row(3, False),
+            self._row(1, datetime(2026, 1, 2, 9)),
+            self._row(4, False),
+            self._row(2, datetime(2026, 1, 1, 9)),
+            self._row(5, False, state='draft'),
+        ]
+        ids = self.env['workshop.order']._workshop_board_ids_from_rows(rows)
+        self.assertEqual(ids['execution'], [2, 1, 3, 4])
+        self.assertEqual(ids['queue'], [5])
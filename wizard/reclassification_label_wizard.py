@@ -4,6 +4,13 @@ import base64
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 
+# Etiquetas por llamada al generador ZPL. Un contenedor de 300 placas se
+# genera en varias tandas cortas en lugar de una sola gigante.
+LABEL_CHUNK_SIZE = 100
+# Lotes que se generan dentro de la petición; por encima, el .zpl se genera en
+# un trabajo en segundo plano (workshop.job) para no topar el timeout HTTP.
+LABEL_SYNC_LIMIT = LABEL_CHUNK_SIZE
+
 
 class ReclassificationLabelWizard(models.TransientModel):
     """Impresión de etiquetas ZPL para los lotes NUEVOS de una
@@ -34,8 +41,51 @@ class ReclassificationLabelWizard(models.TransientModel):
             wizard.lot_count = len(
                 wizard.reclassification_id.line_ids.mapped('lot_to_id'))
 
-    def action_print(self):
-        self.ensure_one()
+    def _label_quants(self, lots):
+        """Un quant por lote (interno primero) con UNA búsqueda para todos.
+
+        Devuelve (ids de quant en el orden de `lots`, nombres sin existencias).
+        """
+        quants = self.env['stock.quant'].sudo().search([
+            ('lot_id', 'in', lots.ids),
+            ('quantity', '>', 0),
+        ], order='id')
+        best = {}
+        for quant in quants:
+            current = best.get(quant.lot_id.id)
+            if not current or (
+                current.location_id.usage != 'internal'
+                and quant.location_id.usage == 'internal'
+            ):
+                best[quant.lot_id.id] = quant
+        quant_ids = [best[lot.id].id for lot in lots if lot.id in best]
+        missing = [lot.name for lot in lots if lot.id not in best]
+        return quant_ids, missing
+
+    def _render_labels(self, quant_ids):
+        """ZPL de todos los quants, generado por tandas.
+
+        Los datos de lote y producto se cargan de una pasada antes de generar;
+        cada etiqueta ZPL es un bloque ^XA…^XZ independiente, así que las
+        tandas se concatenan tal cual.
+        """
+        Quant = self.env['stock.quant']
+        quants = Quant.browse(quant_ids)
+        quants.mapped('lot_id.name')
+        quants.mapped('product_id.display_name')
+        chunks = []
+        for start in range(0, len(quant_ids), LABEL_CHUNK_SIZE):
+            result = Quant.generate_zpl_labels(
+                quant_ids[start:start + LABEL_CHUNK_SIZE], self.label_format)
+            if not result.get('success'):
+                raise UserError(
+                    result.get('message', _('Error al generar etiquetas.')))
+            chunks.append(result.get('zpl_data') or '')
+        return '\n'.join(chunk.strip('\n') for chunk in chunks if chunk)
+
+    def _check_printable(self):
+        """Validaciones previas a generar: reclasificación aplicada, lotes
+        nuevos y generador disponible. Devuelve los lotes."""
         rec = self.reclassification_id
         if rec.state != 'done':
             raise UserError(_(
@@ -47,53 +97,41 @@ class ReclassificationLabelWizard(models.TransientModel):
         if not lots:
             raise UserError(_('La reclasificación no tiene lotes nuevos.'))
 
-        Quant = self.env['stock.quant'].sudo()
-        quant_ids = []
-        missing = []
-        for lot in lots:
-            quant = Quant.search([
-                ('lot_id', '=', lot.id),
-                ('location_id.usage', '=', 'internal'),
-                ('quantity', '>', 0),
-            ], limit=1)
-            if not quant:
-                quant = Quant.search([
-                    ('lot_id', '=', lot.id),
-                    ('quantity', '>', 0),
-                ], limit=1)
-            if quant:
-                quant_ids.append(quant.id)
-            else:
-                missing.append(lot.name)
+        if not hasattr(self.env['stock.quant'], 'generate_zpl_labels'):
+            raise UserError(_(
+                'El módulo de impresión de etiquetas (generate_zpl_labels) '
+                'no está disponible.'
+            ))
+        return lots
+
+    def _create_label_attachment(self, res_model, res_id):
+        """Genera el .zpl y lo adjunta a (`res_model`, `res_id`).
 
+        Avisa en el chatter de la reclasificación los lotes sin existencias.
+        """
+        self.ensure_one()
+        rec = self.reclassification_id
+        lots = self._check_printable()
+        quant_ids, missing = self._label_quants(lots)
         if not quant_ids:
             raise UserError(_(
                 'No se encontraron existencias de los lotes reclasificados '
                 'para imprimir (¿ya salieron del inventario?).'
             ))
 
-        if not hasattr(self.env['stock.quant'], 'generate_zpl_labels'):
-            raise UserError(_(
-                'El módulo de impresión de etiquetas (generate_zpl_labels) '
-                'no está disponible.'
-            ))
-
-        result = self.env['stock.quant'].generate_zpl_labels(
-            quant_ids, self.label_format)
-        if not result.get('success'):
-            raise UserError(
-                result.get('message', _('Error al generar etiquetas.')))
+        zpl_data = self._render_labels(quant_ids)
 
         filename = 'etiquetas_%s_%s.zpl' % (
             (rec.name or 'RECLA').replace('/', '-'), self.label_format)
-        attachment = self.env['ir.attachment'].create({
+        # sudo: el trabajo en segundo plano es de solo lectura para su dueño.
+        attachment = self.env['ir.attachment'].sudo().create({
             'name': filename,
             'type': 'binary',
             'datas': base64.b64encode(
-                (result.get('zpl_data') or '').encode('utf-8')),
+                zpl_data.encode('utf-8')),
             'mimetype': 'text/plain',
-            'res_model': 'stock.lot.reclassification',
-            'res_id': rec.id,
+            'res_model': res_model,
+            'res_id': res_id,
         })
 
         if missing:
@@ -101,7 +139,22 @@ class ReclassificationLabelWizard(models.TransientModel):
                 'Etiquetas generadas (%(fmt)s). Sin existencias para: '
                 '%(lots)s.'
             ) % {'fmt': self.label_format, 'lots': ', '.join(missing)})
+        return attachment
+
+    def action_print(self):
+        """Hasta una tanda se descarga al momento; más lotes se generan en un
+        trabajo en segundo plano y el .zpl queda adjunto al trabajo."""
+        self.ensure_one()
+        rec = self.reclassification_id
+        lots = self._check_printable()
+        if len(lots) > LABEL_SYNC_LIMIT:
+            return rec.with_context(
+                workshop_job_method='_workshop_job_print_labels',
+                workshop_job_context={'workshop_label_format': self.label_format},
+            ).action_run_in_background()
 
+        attachment = self._create_label_attachment(
+            'stock.lot.reclassification', rec.id)
         return {
             'type': 'ir.actions.act_url',
             'url': '/web/content/%s?download=true' % attachment.id,
@@ -146,7 +146,8 @@ class WorkshopTicketWizard(models.TransientModel):
     def _validate_no_ticket_collision(self, input_lines, exclude_ticket_id=None):
         self.ensure_one()
         ticket_map = self.order_id._get_ticket_line_to_ticket_map(
-            exclude_ticket_id=exclude_ticket_id
+            exclude_ticket_id=exclude_ticket_id,
+            input_line_ids=input_lines.ids,
         )
         collisions = {}
         for line in input_lines: